@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class AsistentAppConfig(AppConfig):
+    name = 'asistent_app'
+    verbose_name = 'Asistent App'
+
+    def ready(self):
+        # Perfil de conexión SQLite (PRAGMA por conexión)
+        from . import db  # noqa: F401
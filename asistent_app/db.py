@@ -0,0 +1,29 @@
+"""
+Perfil de conexión para SQLite.
+
+Cada conexión nueva recibe los PRAGMA de ``SQLITE_PRAGMAS`` (synchronous=NORMAL,
+mmap, caché de páginas y busy_timeout, y WAL con ``DB_SQLITE_WAL=1``). Con WAL
+los lectores no bloquean al escritor y con busy_timeout una escritura
+concurrente espera el bloqueo en lugar de fallar con "database is locked".
+
+El receptor se registra en AsistentAppConfig.ready(). journal_mode es el
+único PRAGMA persistente (cambia el encabezado del archivo), por eso es
+opcional: la base de desarrollo versionada no se modifica al ejecutar
+manage.py.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def aplicar_pragmas_sqlite(sender, connection, **kwargs):
+    """Aplica los PRAGMA configurados a cada conexión SQLite nueva"""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    if not pragmas:
+        return
+    with connection.cursor() as cursor:
+        for nombre, valor in pragmas.items():
+            cursor.execute(f'PRAGMA {nombre} = {valor}')
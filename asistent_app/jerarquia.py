@@ -0,0 +1,241 @@
+"""
+Jerarquías con ruta materializada.
+
+Cada nodo guarda en ``ruta`` los ids de sus ancestros y el propio, con ancho
+fijo y terminados en '/' (p. ej. ``0000000003/0000000012/``), y en ``nivel``
+su profundidad (0 = raíz). Con eso:
+
+- ancestros: una consulta por clave primaria con los ids de la ruta;
+- descendientes (y conteos sobre el subárbol): un rango sobre el índice de
+  ``ruta`` (``ruta >= prefijo AND ruta < prefijo + '~'``), que a diferencia de
+  LIKE usa el índice en cualquier motor;
+- árbol completo: una consulta ordenada por ``ruta`` (cada padre aparece
+  antes que sus hijos).
+
+La ruta se mantiene en ``save()``: al mover un nodo se reescribe su subárbol
+con un solo UPDATE, y la detección de ciclos solo recorre la ruta del nuevo
+padre (O(profundidad)). ``bulk_create`` y ``QuerySet.update`` del campo padre
+no la actualizan; para nodos sin ruta se recurre a una consulta recursiva
+(WITH RECURSIVE) sobre el campo padre. Un descendiente sin ruta no entra en
+el rango de su subárbol hasta que se guarda.
+
+Los rangos de subárbol se limitan además a la empresa del nodo
+(``campo_empresa``), que también es la primera columna del índice.
+"""
+from django.core.exceptions import ValidationError
+from django.db import connections, models, router, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Concat, Substr
+
+SEPARADOR = '/'
+ANCHO = 10
+
+# Mayor que los dígitos y el separador: cierra el rango de un subárbol
+FIN_SUBARBOL = '~'
+
+# Niveles que caben en la columna ruta; también corta ciclos en la consulta recursiva
+PROFUNDIDAD_MAXIMA = 512 // (ANCHO + len(SEPARADOR))
+
+
+def segmento(pk):
+    return f'{pk:0{ANCHO}d}{SEPARADOR}'
+
+
+def ids_de_ruta(ruta):
+    return [int(parte) for parte in ruta.split(SEPARADOR) if parte]
+
+
+def filtro_subarbol(ruta, prefijo='', incluir_raiz=True):
+    """
+    Condiciones de rango para los nodos bajo ``ruta`` (``prefijo`` para
+    relaciones). Una ruta vacía no selecciona nada: el rango ``'' .. '~'``
+    abarcaría todas las filas.
+    """
+    if not ruta:
+        return {f'{prefijo}pk__in': []}
+    return {
+        f'{prefijo}ruta__gte' if incluir_raiz else f'{prefijo}ruta__gt': ruta,
+        f'{prefijo}ruta__lt': ruta + FIN_SUBARBOL,
+    }
+
+
+def ancestros_cte(modelo, pk, using='default'):
+    """
+    Ids desde la raíz hasta ``pk`` (incluido) siguiendo el campo padre con
+    WITH RECURSIVE, sin depender de la ruta materializada.
+    """
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    tabla = quote(modelo._meta.db_table)
+    columna_pk = quote(modelo._meta.pk.column)
+    columna_padre = quote(modelo._meta.get_field(modelo.campo_padre).column)
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'WITH RECURSIVE cadena (id, padre_id, profundidad) AS ('
+            f' SELECT {columna_pk}, {columna_padre}, 0 FROM {tabla} WHERE {columna_pk} = %s'
+            f' UNION ALL'
+            f' SELECT t.{columna_pk}, t.{columna_padre}, c.profundidad + 1'
+            f' FROM {tabla} t JOIN cadena c ON t.{columna_pk} = c.padre_id'
+            f' WHERE c.profundidad < %s'
+            f') SELECT id FROM cadena ORDER BY profundidad DESC',
+            [pk, PROFUNDIDAD_MAXIMA]
+        )
+        return [fila[0] for fila in cursor.fetchall()]
+
+
+def calcular_rutas(padres):
+    """
+    Rutas y niveles a partir de {pk: pk_padre}. Un ciclo o un padre
+    inexistente convierten el nodo en raíz.
+    """
+    rutas = {}
+
+    def resolver(pk, visitados):
+        if pk in rutas:
+            return rutas[pk]
+        padre = padres.get(pk)
+        if padre is None or padre not in padres or padre in visitados:
+            rutas[pk] = segmento(pk)
+        else:
+            rutas[pk] = resolver(padre, visitados | {pk}) + segmento(pk)
+        return rutas[pk]
+
+    for pk in padres:
+        resolver(pk, frozenset())
+    return {pk: (ruta, len(ids_de_ruta(ruta)) - 1) for pk, ruta in rutas.items()}
+
+
+def construir_arbol(nodos, campo_padre):
+    """
+    Anida ``nodos`` (diccionarios) en una lista de raíces con 'hijos'. No
+    depende del orden, de modo que tolera nodos sin ruta; los hermanos
+    conservan el orden recibido.
+    """
+    por_id = {nodo['id']: nodo for nodo in nodos}
+    raices = []
+    for nodo in por_id.values():
+        nodo.setdefault('hijos', [])
+        padre = por_id.get(nodo[campo_padre])
+        if padre is None:
+            raices.append(nodo)
+        else:
+            padre.setdefault('hijos', []).append(nodo)
+    return raices
+
+
+class NodoJerarquico(models.Model):
+    """Modelo abstracto con ruta materializada sobre la FK ``campo_padre``"""
+    ruta = models.CharField(max_length=512, default='', db_index=True, editable=False, verbose_name='Ruta')
+    nivel = models.PositiveIntegerField(default=0, editable=False, verbose_name='Nivel')
+
+    campo_padre = None
+    # FK que acota los subárboles (None: la tabla entera es una sola jerarquía)
+    campo_empresa = 'empresa'
+
+    class Meta:
+        abstract = True
+
+    def clean(self):
+        super().clean()
+        padre_id = getattr(self, self._meta.get_field(self.campo_padre).attname)
+        if self.crearia_ciclo(padre_id):
+            raise ValidationError({self.campo_padre: 'No puede depender de sí mismo ni de uno de sus descendientes'})
+
+    def crearia_ciclo(self, padre_id, using='default'):
+        """True si ``padre_id`` es este nodo o uno de sus descendientes"""
+        if self.pk is None or not padre_id:
+            return False
+        return self.pk in ids_de_ruta(self._ruta_de(padre_id, using))
+
+    def _ruta_de(self, pk, using, ruta=None):
+        """Ruta guardada de ``pk`` o, si falta, la calculada con la consulta recursiva"""
+        if ruta is None:
+            ruta = type(self)._default_manager.using(using).filter(pk=pk).values_list('ruta', flat=True).first()
+        if ruta:
+            return ruta
+        return ''.join(segmento(ancestro) for ancestro in ancestros_cte(type(self), pk, using))
+
+    def save(self, *args, **kwargs):
+        update_fields = kwargs.get('update_fields')
+        padre = self._meta.get_field(self.campo_padre)
+        if update_fields is not None and not {padre.name, padre.attname} & set(update_fields):
+            return super().save(*args, **kwargs)
+
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            if self.pk is None:
+                # El id forma parte de la ruta: se inserta y luego se completa
+                super().save(*args, **kwargs)
+                self._asignar_ruta(using)
+                type(self)._default_manager.using(using).filter(pk=self.pk).update(
+                    ruta=self.ruta, nivel=self.nivel
+                )
+                return
+
+            ruta_anterior = self._asignar_ruta(using)
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'ruta', 'nivel'}
+            super().save(*args, **kwargs)
+            if ruta_anterior and ruta_anterior != self.ruta:
+                self._mover_subarbol(ruta_anterior, using)
+
+    def _asignar_ruta(self, using):
+        """Calcula ruta y nivel desde el padre; retorna la ruta guardada hasta ahora"""
+        padre_id = getattr(self, self._meta.get_field(self.campo_padre).attname)
+        rutas = dict(
+            type(self)._default_manager.using(using).filter(pk__in=[self.pk, padre_id]).values_list('pk', 'ruta')
+        )
+        ruta_padre = self._ruta_de(padre_id, using, rutas.get(padre_id)) if padre_id else ''
+        if self.pk in ids_de_ruta(ruta_padre):
+            raise ValueError('Un nodo no puede moverse dentro de su propio subárbol')
+
+        self.ruta = ruta_padre + segmento(self.pk)
+        self.nivel = len(ids_de_ruta(self.ruta)) - 1
+        return rutas.get(self.pk, '')
+
+    def _mover_subarbol(self, ruta_anterior, using):
+        """Reescribe con un UPDATE el prefijo de la ruta de todos los descendientes"""
+        nivel_anterior = len(ids_de_ruta(ruta_anterior)) - 1
+        type(self)._default_manager.using(using).filter(
+            **filtro_subarbol(ruta_anterior, incluir_raiz=False)
+        ).update(
+            ruta=Concat(Value(self.ruta), Substr('ruta', len(ruta_anterior) + 1)),
+            nivel=F('nivel') + (self.nivel - nivel_anterior),
+        )
+
+    def _desprender_subarbol(self, using):
+        """
+        Tras borrar un nodo cuyos hijos quedan sin padre (SET_NULL), quita su
+        prefijo de la ruta de los descendientes: los hijos pasan a ser raíces.
+        """
+        if not self.ruta:
+            return
+        type(self)._default_manager.using(using).filter(
+            **filtro_subarbol(self.ruta, incluir_raiz=False)
+        ).update(
+            ruta=Substr('ruta', len(self.ruta) + 1),
+            nivel=F('nivel') - (self.nivel + 1),
+        )
+
+    def ruta_vigente(self, using='default'):
+        """Ruta guardada o, si falta (``bulk_create``, ``update``), la calculada"""
+        if self.ruta or self.pk is None:
+            return self.ruta
+        return self._ruta_de(self.pk, using, self.ruta)
+
+    def filtro_subarbol(self, prefijo='', incluir_propio=True):
+        """``filtro_subarbol`` de este nodo, acotado a su empresa"""
+        filtro = filtro_subarbol(self.ruta_vigente(), prefijo, incluir_propio)
+        if self.campo_empresa:
+            campo = self._meta.get_field(self.campo_empresa)
+            filtro[f'{prefijo}{campo.attname}'] = getattr(self, campo.attname)
+        return filtro
+
+    def ancestros(self):
+        """Ancestros desde la raíz hasta el padre"""
+        ids = ids_de_ruta(self.ruta) if self.ruta else ancestros_cte(type(self), self.pk)
+        return type(self)._default_manager.filter(pk__in=ids[:-1]).order_by('nivel')
+
+    def descendientes(self, incluir_propio=False):
+        return type(self)._default_manager.filter(**self.filtro_subarbol(incluir_propio=incluir_propio))
@@ -0,0 +1,134 @@
+"""
+Precarga de relaciones a partir de los serializers.
+
+Cada vista de listado o detalle aplica al queryset los ``select_related`` y
+``prefetch_related`` que necesita su serializer, de modo que el número de
+consultas no crece con el tamaño de la página. El plan se arma así:
+
+- campos con ``source`` punteado (``empleado.empresa.razon_social``) y
+  serializers anidados: se siguen las relaciones del modelo; las de un solo
+  objeto (FK, OneToOne) van a ``select_related`` y las múltiples a
+  ``prefetch_related``;
+- lo que no se deduce de los campos (métodos del modelo o
+  SerializerMethodField) se declara en el serializer con
+  ``select_relacionado`` (lista de lookups) y ``prefetch_relacionado``
+  (lookups o ``Prefetch``). Los serializers anidados aportan sus
+  declaraciones con el prefijo de la relación.
+
+Bajo una relación múltiple todo se precarga con ``prefetch_related``.
+"""
+from functools import lru_cache
+
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+# Límite de anidamiento, por si un serializer se incluye a sí mismo
+PROFUNDIDAD_MAXIMA = 5
+
+
+def _relacion(modelo, atributo):
+    """Campo de relación de ``modelo`` accesible como ``atributo`` (o None)"""
+    for campo in modelo._meta.get_fields():
+        if not campo.is_relation or campo.related_model is None:
+            continue
+        # Las relaciones inversas se acceden por su accessor (p. ej. 'employee_set')
+        nombre = campo.get_accessor_name() if campo.auto_created and not campo.concrete else campo.name
+        if nombre == atributo:
+            return campo
+    return None
+
+
+def _seguir(modelo, atributos):
+    """
+    Recorre ``atributos`` mientras sean relaciones. Retorna el lookup, el
+    modelo alcanzado, si alguna relación es múltiple y si se consumieron todos.
+    """
+    partes, multiple = [], False
+    for atributo in atributos:
+        campo = _relacion(modelo, atributo)
+        if campo is None:
+            return partes, modelo, multiple, False
+        partes.append(atributo)
+        multiple = multiple or campo.one_to_many or campo.many_to_many
+        modelo = campo.related_model
+    return partes, modelo, multiple, True
+
+
+def _con_prefijo(lookup, prefijo):
+    if isinstance(lookup, Prefetch):
+        # Copia: el mismo Prefetch se reutiliza entre peticiones
+        return Prefetch(prefijo + lookup.prefetch_through, queryset=lookup.queryset, to_attr=lookup.to_attr)
+    return prefijo + lookup
+
+
+def _recorrer(serializer, modelo, prefijo, bajo_prefetch, select, prefetch, profundidad):
+    for lookup in getattr(serializer, 'select_relacionado', ()):
+        if bajo_prefetch:
+            prefetch.append(prefijo + lookup)
+        else:
+            select.add(prefijo + lookup)
+    for lookup in getattr(serializer, 'prefetch_relacionado', ()):
+        prefetch.append(_con_prefijo(lookup, prefijo))
+
+    if profundidad >= PROFUNDIDAD_MAXIMA:
+        return
+
+    for campo in serializer.fields.values():
+        if campo.write_only or campo.source == '*':
+            continue
+        anidado = campo.child if isinstance(campo, serializers.ListSerializer) else campo
+        es_serializer = isinstance(anidado, serializers.BaseSerializer)
+
+        # En un campo simple el último atributo es el valor, no una relación
+        atributos = campo.source_attrs if es_serializer else campo.source_attrs[:-1]
+        partes, destino, multiple, completo = _seguir(modelo, atributos)
+        if partes:
+            lookup = prefijo + '__'.join(partes)
+            if bajo_prefetch or multiple:
+                prefetch.append(lookup)
+            else:
+                select.add(lookup)
+
+        if es_serializer and completo:
+            _recorrer(
+                anidado, destino, prefijo + '__'.join(partes) + '__' if partes else prefijo,
+                bajo_prefetch or multiple, select, prefetch, profundidad + 1,
+            )
+
+
+@lru_cache(maxsize=None)
+def plan_de_precarga(serializer_class, modelo):
+    """(select_related, prefetch_related) que necesita ``serializer_class`` sobre ``modelo``"""
+    select, prefetch = set(), []
+    _recorrer(serializer_class(), modelo, '', False, select, prefetch, 0)
+
+    # Un select_related que es prefijo de otro es redundante
+    select = sorted(
+        lookup for lookup in select
+        if not any(otro.startswith(lookup + '__') for otro in select)
+    )
+    unicos = []
+    for lookup in prefetch:
+        if isinstance(lookup, Prefetch) or lookup not in unicos:
+            unicos.append(lookup)
+    return tuple(select), tuple(unicos)
+
+
+def precargar(queryset, serializer_class):
+    """Aplica a ``queryset`` el plan de precarga de ``serializer_class``"""
+    select, prefetch = plan_de_precarga(serializer_class, queryset.model)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*(_con_prefijo(lookup, '') for lookup in prefetch))
+    return queryset
+
+
+class PrecargaRelacionesMixin:
+    """
+    Aplica el plan de precarga del serializer de la acción en filter_queryset,
+    que DRF usa en los listados y en get_object.
+    """
+
+    def filter_queryset(self, queryset):
+        return precargar(super().filter_queryset(queryset), self.get_serializer_class())
@@ -0,0 +1,56 @@
+"""
+Enrutamiento de lecturas a la réplica.
+
+Solo las vistas marcadas explícitamente (estadísticas, listados, exportación
+y horas trabajadas) leen de la réplica: lo hacen dentro de ``leer_de_replica()``,
+que fija el alias en una variable de contexto. El resto de lecturas y todas
+las escrituras (marcación, registro de empleados) van a 'default', de modo
+que quien acaba de escribir lee sus propios datos sin retraso de replicación.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+
+_alias_lectura = ContextVar('alias_lectura', default=None)
+
+
+def alias_lectura():
+    """Alias de lectura vigente ('default' fuera de ``leer_de_replica``)"""
+    return _alias_lectura.get() or 'default'
+
+
+@contextmanager
+def leer_de_replica():
+    """Envía a la réplica (si está configurada) las lecturas del bloque"""
+    token = _alias_lectura.set(getattr(settings, 'READ_REPLICA_ALIAS', None))
+    try:
+        yield
+    finally:
+        _alias_lectura.reset(token)
+
+
+class ReplicaRouter:
+    """Lecturas a la réplica solo dentro de ``leer_de_replica``; escrituras y migraciones a 'default'"""
+
+    def db_for_read(self, model, **hints):
+        # None deja que Django use la base de la instancia relacionada o 'default'
+        return _alias_lectura.get()
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # La réplica contiene los mismos datos que 'default'
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class LecturaReplicaMixin:
+    """Atiende la vista con sus lecturas dirigidas a la réplica"""
+
+    def dispatch(self, request, *args, **kwargs):
+        with leer_de_replica():
+            return super().dispatch(request, *args, **kwargs)
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
@@ -46,6 +47,9 @@ INSTALLED_APPS = [
     'django_filters',
     'drf_spectacular',
 
+    # Proyecto (perfil de conexión SQLite, ver asistent_app/db.py)
+    'asistent_app',
+
     # Apps locales
     'companies',
     'departments', 
@@ -90,13 +94,82 @@ WSGI_APPLICATION = 'asistent_app.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Motor configurable por entorno: DB_ENGINE=sqlite (por defecto) o postgresql.
+# Si se define DB_REPLICA_HOST (PostgreSQL) o DB_REPLICA_NAME (archivo SQLite)
+# se agrega el alias 'replica' para las lecturas pesadas (ver asistent_app/routers.py)
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'asistent_app'),
+            'USER': os.environ.get('DB_USER', 'postgres'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # El pool nativo de Django 5.x reemplaza a CONN_MAX_AGE (requiere psycopg[pool])
+            'CONN_MAX_AGE': 0,
+            'OPTIONS': {
+                'pool': {
+                    'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+                    'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+                    'timeout': int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+                },
+            },
+        }
+    }
+    if os.environ.get('DB_REPLICA_HOST'):
+        DATABASES['replica'] = {
+            **DATABASES['default'],
+            'HOST': os.environ['DB_REPLICA_HOST'],
+            'PORT': os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+            'USER': os.environ.get('DB_REPLICA_USER', DATABASES['default']['USER']),
+            'PASSWORD': os.environ.get('DB_REPLICA_PASSWORD', DATABASES['default']['PASSWORD']),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': os.environ.get('DB_NAME', BASE_DIR / 'db.sqlite3'),
+            # Conexiones persistentes (se verifican antes de reutilizarlas)
+            'CONN_MAX_AGE': 600,
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {
+                # Segundos que una escritura espera el bloqueo antes de fallar
+                'timeout': 20,
+                # Toma el bloqueo de escritura al iniciar la transacción: evita
+                # errores "database is locked" al promover una lectura a escritura
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
+    if os.environ.get('DB_REPLICA_NAME'):
+        DATABASES['replica'] = {**DATABASES['default'], 'NAME': os.environ['DB_REPLICA_NAME']}
+
+if 'replica' in DATABASES:
+    # En las pruebas la réplica apunta a la misma base que 'default'
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['asistent_app.routers.ReplicaRouter']
+
+# Alias usado por las vistas de lectura pesada (None si no hay réplica)
+READ_REPLICA_ALIAS = 'replica' if 'replica' in DATABASES else None
+
+# PRAGMA aplicados a cada conexión SQLite (ver asistent_app/db.py)
+SQLITE_PRAGMAS = {
+    'synchronous': 'NORMAL',
+    'busy_timeout': 20000,
+    'cache_size': -65536,  # 64 MiB
+    'mmap_size': 268435456,  # 256 MiB
+    'temp_store': 'MEMORY',
 }
 
+# journal_mode=WAL queda escrito en el archivo de la base (no es por conexión):
+# se activa solo con DB_SQLITE_WAL=1, en despliegues con su propia base
+if os.environ.get('DB_SQLITE_WAL') == '1':
+    SQLITE_PRAGMAS = {'journal_mode': 'WAL', **SQLITE_PRAGMAS}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -143,9 +216,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 AUTH_USER_MODEL = 'users.CustomUser'
 
 # Backends de autenticación personalizados
+# EmailOrUsernameModelBackend hereda de ModelBackend (permisos incluidos); repetir
+# ModelBackend duplicaría la consulta y el hash en cada login fallido
 AUTHENTICATION_BACKENDS = [
     'users.backends.EmailOrUsernameModelBackend',  # Permite login con email o username
-    'django.contrib.auth.backends.ModelBackend',   # Backend por defecto
 ]
 
 # Configuración para archivos media (fotos, logos, etc.)
@@ -159,7 +233,7 @@ MEDIA_ROOT = BASE_DIR / 'media'
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -210,6 +284,21 @@ SIMPLE_JWT = {
     'JTI_CLAIM': 'jti',
 }
 
+# Caché de las marcas de revocación y de los claims de alcance vigentes
+# (users/authentication.py). Debe ser compartida entre procesos (Redis,
+# Memcached): con una caché local (LocMemCache, DummyCache) cada petición se
+# autentica contra la base
+AUTH_REVOCATION_CACHE = 'default'
+
+# Limitación del login (users/lockout.py): fallos permitidos por login y por
+# IP dentro de la ventana deslizante (segundos), duración del bloqueo de la
+# cuenta (segundos, None = desbloqueo manual) y alias de caché de los contadores
+AUTH_LOGIN_MAX_FALLOS = 5
+AUTH_LOGIN_MAX_FALLOS_IP = 50
+AUTH_LOGIN_VENTANA = 900
+AUTH_LOGIN_DURACION_BLOQUEO = 900
+AUTH_LOGIN_CACHE = 'default'
+
 # =============================================================================
 # CORS CONFIGURATION
 # =============================================================================
@@ -234,4 +323,46 @@ SPECTACULAR_SETTINGS = {
     'VERSION': '1.0.0',
     'SERVE_INCLUDE_SCHEMA': False,
     'COMPONENT_SPLIT_REQUEST': True,
-}
\ No newline at end of file
+}
+
+# =============================================================================
+# ATTENDANCE CONFIGURATION
+# =============================================================================
+
+# Registro en memoria de códigos QR: vigencia de cada entrada (segundos)
+ATTENDANCE_QR_REGISTRY_TTL = 300
+
+# Alias de caché para compartir el registro entre procesos (None = solo local)
+ATTENDANCE_QR_REGISTRY_CACHE = None
+
+# Fuente de las estadísticas: 'rollup' (resumen diario pre-agregado) o 'raw' (Attendance)
+ATTENDANCE_STATS_SOURCE = 'rollup'
+
+# Claves de idempotencia de la marcación: alias de caché (compartido entre
+# procesos en producción; con LocMemCache o DummyCache, check --deploy emite
+# attendance.W001) y vigencia de las respuestas guardadas (segundos)
+ATTENDANCE_IDEMPOTENCY_CACHE = 'default'
+ATTENDANCE_IDEMPOTENCY_TTL = 86400
+
+# Cola de escritura diferida de marcaciones: se responde 202 y el comando
+# drenar_cola_marcaciones vuelca la cola a Attendance en lotes
+ATTENDANCE_WRITE_BEHIND = False
+ATTENDANCE_WRITE_BEHIND_PATH = BASE_DIR / 'attendance_queue.sqlite3'
+ATTENDANCE_WRITE_BEHIND_BATCH = 500
+
+# Meses completos que permanecen en Attendance; lo anterior se mueve a
+# AttendanceArchive con el comando archivar_asistencias
+ATTENDANCE_ARCHIVE_MONTHS = 12
+
+# Horas trabajadas por empresa: días máximos por consulta y empleados por página
+ATTENDANCE_HOURS_MAX_DAYS = 93
+ATTENDANCE_HOURS_PAGE_SIZE = 100
+
+# =============================================================================
+# EMPLOYEES CONFIGURATION
+# =============================================================================
+
+# Conteo de empleados activos por empresa, departamento y cargo:
+# 'anotacion' (COUNT en la misma consulta) o 'contador' (columna mantenida por
+# señales; ejecutar recalcular_conteos_empleados al activarlo)
+EMPLOYEES_COUNT_MODE = 'anotacion'
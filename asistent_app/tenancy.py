@@ -0,0 +1,99 @@
+"""
+Alcance por empresa.
+
+Cada usuario ve solo los datos de la empresa de su empleado
+(``request.user.empresa_id``; con ClaimsJWTAuthentication sale del token sin
+consultas). Los superusuarios no tienen restricción y un usuario sin empleado
+no ve nada. Las altas y ediciones se validan igual: el objeto guardado debe
+quedar en la empresa del usuario. Los índices (empresa, activo) de Employee, Department, Position y
+QRCode mantienen estas consultas proporcionales al tamaño de la empresa.
+"""
+from rest_framework.exceptions import PermissionDenied, ValidationError
+
+
+def sin_restriccion(usuario):
+    return bool(getattr(usuario, 'is_superuser', False))
+
+
+def filtrar_por_empresa(queryset, usuario, campo='empresa_id'):
+    """Restringe ``queryset`` a la empresa del usuario"""
+    if sin_restriccion(usuario):
+        return queryset
+    empresa_id = getattr(usuario, 'empresa_id', None)
+    if empresa_id is None:
+        return queryset.none()
+    return queryset.filter(**{campo: empresa_id})
+
+
+def empresa_permitida(usuario, empresa_id=None):
+    """
+    Empresa a consultar en vistas que reciben ``empresa_id`` por parámetro:
+    la indicada para superusuarios y la del usuario para el resto.
+    """
+    if sin_restriccion(usuario):
+        return empresa_id
+    propia = getattr(usuario, 'empresa_id', None)
+    if propia is None or (empresa_id is not None and empresa_id != propia):
+        raise PermissionDenied('No tiene acceso a la empresa solicitada')
+    return propia
+
+
+def empresa_solicitada(request, parametro='empresa'):
+    """Empresa del parámetro ``parametro`` (obligatorio solo para superusuarios)"""
+    valor = request.query_params.get(parametro)
+    try:
+        empresa_id = empresa_permitida(request.user, int(valor) if valor else None)
+    except ValueError:
+        raise ValidationError({parametro: 'Debe ser un número entero'})
+    if empresa_id is None:
+        raise ValidationError({parametro: 'Debe indicar la empresa'})
+    return empresa_id
+
+
+class AlcanceEmpresaMixin:
+    """
+    Aplica el alcance por empresa en filter_queryset, que DRF usa tanto en
+    los listados como en get_object (detalle, edición y eliminación), y en
+    perform_create y perform_update.
+    """
+    campo_empresa = 'empresa_id'
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return filtrar_por_empresa(queryset, self.request.user, self.campo_empresa)
+
+    def perform_create(self, serializer):
+        self.validar_alcance(serializer)
+        super().perform_create(serializer)
+
+    def perform_update(self, serializer):
+        self.validar_alcance(serializer)
+        super().perform_update(serializer)
+
+    def validar_alcance(self, serializer):
+        """
+        Rechaza guardar un objeto fuera de la empresa del usuario. En una
+        edición que no cambia la relación con la empresa no hay nada que
+        validar: get_object ya aplicó el alcance.
+        """
+        usuario = self.request.user
+        if sin_restriccion(usuario):
+            return
+        if self.campo_empresa == 'pk':
+            # La propia empresa: se edita la del usuario, no se crean otras
+            if serializer.instance is None:
+                raise PermissionDenied('No tiene permisos para crear empresas')
+            return
+
+        if '__' in self.campo_empresa:
+            relacion, atributo = self.campo_empresa.split('__', 1)
+        else:
+            relacion, atributo = self.campo_empresa.removesuffix('_id'), 'pk'
+        if relacion not in serializer.validated_data and serializer.instance is not None:
+            return
+
+        valor = serializer.validated_data.get(relacion)
+        for parte in atributo.split('__'):
+            valor = getattr(valor, parte, None)
+        if valor is None or valor != getattr(usuario, 'empresa_id', None):
+            raise PermissionDenied('No tiene acceso a la empresa solicitada')
@@ -0,0 +1,76 @@
+"""
+Datos y comprobaciones compartidos por los tests de las apps.
+
+``EmpresaTestCase`` crea una empresa con su departamento, su cargo y un
+empleado con usuario, autenticado en ``self.client``.
+``assertMismasConsultas`` verifica que una consulta con muchas filas ejecuta
+las mismas consultas SQL que una con pocas.
+"""
+import datetime
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from companies.models import Company
+from departments.models import Department
+from employees.models import Employee
+from positions.models import Position
+from users.models import CustomUser
+
+
+def crear_empresa(numero=1):
+    """Empresa con un departamento y un cargo: (empresa, departamento, cargo)"""
+    empresa = Company.objects.create(
+        razon_social=f'Empresa {numero}', ruc=f'{numero:011d}', direccion='Av. 1',
+        telefono='1', email=f'contacto@empresa{numero}.com'
+    )
+    departamento = Department.objects.create(nombre='Operaciones', codigo='OPS', empresa=empresa)
+    cargo = Position.objects.create(nombre='Operario', codigo='OP', empresa=empresa, departamento=departamento)
+    return empresa, departamento, cargo
+
+
+def crear_empleado(empresa, departamento, cargo, numero, **extra):
+    return Employee.objects.create(
+        nombres='Ana', apellidos='Pérez', dni=f'{numero:08d}',
+        fecha_nacimiento=datetime.date(1990, 1, 1), codigo_empleado=f'E{numero}',
+        fecha_ingreso=datetime.date(2020, 1, 1), salario_actual=1000,
+        empresa=empresa, departamento=departamento, cargo=cargo, **extra
+    )
+
+
+class EmpresaTestCase(TestCase):
+    """Empresa con un empleado y su usuario, autenticado en ``self.client``"""
+
+    def setUp(self):
+        self.empresa, self.departamento, self.cargo = crear_empresa()
+        self.empleado = self.crear_empleado(1)
+        self.usuario = self.crear_usuario()
+        self.client = APIClient()
+        self.client.force_authenticate(self.usuario)
+
+    def crear_usuario(self):
+        return CustomUser.objects.create_user(
+            username=self.empleado.dni, password='secreto123', email='ana@acme.com', empleado=self.empleado
+        )
+
+    def crear_empleado(self, numero, **extra):
+        return crear_empleado(self.empresa, self.departamento, self.cargo, numero, **extra)
+
+    def listar(self, url, **parametros):
+        """Filas de la página de ``url`` (la respuesta debe ser 200)"""
+        respuesta = self.client.get(url, parametros)
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        return respuesta.json()['results']
+
+    def assertMismasConsultas(self, pocas, muchas):
+        """
+        ``muchas()`` ejecuta tantas consultas como ``pocas()``. La primera
+        llamada a ``pocas()`` no se mide: carga las cachés de la petición.
+        """
+        pocas()
+        with CaptureQueriesContext(connection) as consultas:
+            pocas()
+        with self.assertNumQueries(len(consultas)):
+            muchas()
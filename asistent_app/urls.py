@@ -20,11 +20,15 @@ from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
-from users.auth_serializers import CustomTokenObtainPairSerializer
+from users.auth_serializers import CustomTokenObtainPairSerializer, RefreshRotativoSerializer
 
 # Vista personalizada para login con email o username
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+
+# Refresh con rotación y revocación compacta (ver users/tokens.py)
+class RefreshRotativoView(TokenRefreshView):
+    serializer_class = RefreshRotativoSerializer
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularRedocView,
@@ -44,7 +48,7 @@ urlpatterns = [
 
     # Autenticación JWT
     path('api/auth/login/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('api/auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/auth/refresh/', RefreshRotativoView.as_view(), name='token_refresh'),
     
     # Login/Logout para la API browsable
     path('api-auth/', include('rest_framework.urls')),
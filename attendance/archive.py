@@ -0,0 +1,102 @@
+"""
+Archivo de marcaciones antiguas.
+
+Las marcaciones anteriores al corte (``ATTENDANCE_ARCHIVE_MONTHS`` meses
+completos) se mueven de Attendance a AttendanceArchive conservando su id, de
+modo que la tabla vigente y sus índices solo crecen con la historia reciente.
+
+Las consultas acotadas por fecha eligen su origen con ``modelo_para_rango``:
+si el rango empieza después de la última marcación archivada se consulta solo
+Attendance; si alcanza el archivo se usa la vista AttendanceHistorico
+(UNION ALL de ambas tablas), en la que el filtro de fechas se aplica a cada
+tabla con su propio índice. Las consultas sin fecha de inicio también usan la
+vista mientras el archivo tenga marcaciones.
+
+El rollup diario y el estado de marcación no se modifican al archivar: siguen
+reflejando toda la historia, y ``reconstruir_rollup`` la recorre completa.
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections, router, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .filters import inicio_del_dia, parsear_fecha
+from .models import Attendance, AttendanceArchive, AttendanceHistorico
+
+CLAVE_FRONTERA = 'attendance:archivo:frontera'
+
+# Valor guardado en caché cuando el archivo está vacío
+SIN_ARCHIVO = 'vacio'
+
+# Con una caché local por proceso, los demás procesos ven el nuevo archivo
+# como máximo tras este plazo (segundos)
+TTL_FRONTERA = 300
+
+COLUMNAS = [campo.column for campo in AttendanceArchive._meta.concrete_fields]
+
+
+def frontera_archivo():
+    """Fecha y hora de la marcación archivada más reciente (None si no hay archivo)"""
+    frontera = cache.get(CLAVE_FRONTERA)
+    if frontera is None:
+        frontera = AttendanceArchive.objects.aggregate(maximo=Max('fecha_hora'))['maximo'] or SIN_ARCHIVO
+        cache.set(CLAVE_FRONTERA, frontera, TTL_FRONTERA)
+    return None if frontera == SIN_ARCHIVO else frontera
+
+
+def modelo_para_rango(fecha_inicio=None):
+    """Modelo a consultar para marcaciones desde ``fecha_inicio`` (date o texto)"""
+    fecha_inicio = parsear_fecha(fecha_inicio, 'fecha_inicio')
+    frontera = frontera_archivo()
+    if frontera is None:
+        return Attendance
+    if fecha_inicio is not None and inicio_del_dia(fecha_inicio) > frontera:
+        return Attendance
+    return AttendanceHistorico
+
+
+def corte_archivo(meses=None, hoy=None):
+    """Inicio del mes que quedó ``meses`` meses atrás: lo anterior se archiva"""
+    meses = getattr(settings, 'ATTENDANCE_ARCHIVE_MONTHS', 12) if meses is None else meses
+    hoy = hoy or timezone.localdate()
+    indice = hoy.year * 12 + hoy.month - 1 - meses
+    return inicio_del_dia(date(indice // 12, indice % 12 + 1, 1))
+
+
+def archivar(corte, lote=5000):
+    """
+    Mueve a AttendanceArchive las marcaciones anteriores a ``corte`` en lotes
+    (cada uno en su propia transacción) y retorna la cantidad movida.
+    """
+    using = router.db_for_write(Attendance)
+    connection = connections[using]
+    origen = connection.ops.quote_name(Attendance._meta.db_table)
+    destino = connection.ops.quote_name(AttendanceArchive._meta.db_table)
+    columnas = ', '.join(connection.ops.quote_name(columna) for columna in COLUMNAS)
+
+    total = 0
+    while True:
+        ids = list(Attendance.objects.using(using).filter(
+            fecha_hora__lt=corte
+        ).order_by('id').values_list('id', flat=True)[:lote])
+        if not ids:
+            break
+
+        marcadores = ', '.join(['%s'] * len(ids))
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            # SQL directo: INSERT ... SELECT evita materializar las filas y el
+            # DELETE no emite señales (el rollup y el estado no cambian)
+            cursor.execute(
+                f'INSERT INTO {destino} ({columnas}) '
+                f'SELECT {columnas} FROM {origen} WHERE id IN ({marcadores})',
+                ids
+            )
+            cursor.execute(f'DELETE FROM {origen} WHERE id IN ({marcadores})', ids)
+        total += len(ids)
+
+    if total:
+        cache.delete(CLAVE_FRONTERA)
+    return total
@@ -0,0 +1,125 @@
+"""
+Motor de marcación de asistencia por QR.
+
+El código QR se valida contra el registro en memoria (qr_registry); el
+empleado y su estado de marcación (punch_state) se resuelven en una sola
+consulta por clave primaria, sin recorrer Attendance. Con ello se decide
+el tipo (entrada/salida, según el turno abierto y el tipo de turno) y se aplica la regla de anti-duplicados. El
+registro posterior es un INSERT más la actualización del estado.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from employees.models import Employee
+from .jornadas import DURACION_MAXIMA_JORNADA, TURNOS_NOCTURNOS
+from .models import Attendance
+from .qr_registry import registro_qr
+
+# Ventana mínima entre dos marcaciones del mismo empleado
+VENTANA_DUPLICADOS = timedelta(minutes=5)
+
+
+class MarcacionError(Exception):
+    """Error de validación de una marcación (opcionalmente asociado a un campo)"""
+
+    def __init__(self, mensaje, campo=None):
+        super().__init__(mensaje)
+        self.mensaje = mensaje
+        self.campo = campo
+
+
+def resolver_contexto(empleado_id):
+    """
+    Retorna en una sola consulta la empresa y el nombre del empleado junto
+    con su estado de marcación (última marcación). Retorna None si el
+    empleado no existe.
+    """
+    return Employee.objects.filter(pk=empleado_id).order_by().values(
+        'empresa_id', 'nombres', 'apellidos', 'shift_type',
+        ultimo_tipo=F('estado_marcacion__ultimo_tipo'),
+        ultima_fecha_hora=F('estado_marcacion__ultima_fecha_hora'),
+        inicio_turno=F('estado_marcacion__inicio_turno'),
+    ).first()
+
+
+def determinar_tipo(ultimo_tipo, ultima_fecha_hora, ahora=None, inicio_turno=None, shift_type=None):
+    """
+    Determina el tipo de la próxima marcación a partir de la última registrada.
+    Con un turno abierto (desde ``inicio_turno``) la marcación es su salida,
+    salvo que el turno supere DURACION_MAXIMA_JORNADA (no se marcó la salida)
+    o, en turnos diurnos, que haya cambiado el día. Los turnos nocturnos
+    cruzan la medianoche y solo se cierran por duración.
+    """
+    ahora = ahora or timezone.now()
+    if not ultima_fecha_hora or ultimo_tipo == 'salida':
+        return 'entrada'
+    inicio = inicio_turno or ultima_fecha_hora
+    if ahora - inicio > DURACION_MAXIMA_JORNADA:
+        return 'entrada'
+    if shift_type not in TURNOS_NOCTURNOS and timezone.localtime(inicio).date() != timezone.localtime(ahora).date():
+        return 'entrada'
+    return 'salida'
+
+
+def es_duplicada(ultima_fecha_hora, ahora=None):
+    """Indica si existe una marcación dentro de la ventana anti-duplicados"""
+    ahora = ahora or timezone.now()
+    return bool(ultima_fecha_hora) and ultima_fecha_hora >= ahora - VENTANA_DUPLICADOS
+
+
+def validar_marcacion(empleado_id, codigo_qr, ahora=None, pendiente=None):
+    """
+    Valida una marcación QR y retorna los datos necesarios para registrarla:
+    el empleado (instancia parcial, sin consultas adicionales) y el tipo.
+    ``pendiente`` es la última marcación (tipo, fecha_hora) aún no escrita en
+    Attendance (cola de escritura diferida), si la hay.
+    """
+    ahora = ahora or timezone.now()
+
+    # El QR se valida contra el registro en memoria, sin consultar la BD
+    qr_code = registro_qr.obtener(codigo_qr) if codigo_qr else None
+    if qr_code is None or not qr_code[2]:
+        raise MarcacionError("Código QR inválido o inactivo", campo='codigo_qr')
+
+    contexto = resolver_contexto(empleado_id) if empleado_id else None
+    if contexto is None:
+        raise MarcacionError("No se encontró el empleado asociado al usuario")
+
+    # Validar que el empleado pertenece a la empresa del QR
+    if contexto['empresa_id'] != qr_code[1]:
+        raise MarcacionError("No tienes permisos para marcar en esta ubicación")
+
+    ultimo_tipo, ultima_fecha_hora = contexto['ultimo_tipo'], contexto['ultima_fecha_hora']
+    inicio_turno = contexto['inicio_turno']
+    if pendiente and (not ultima_fecha_hora or pendiente[1] > ultima_fecha_hora):
+        ultimo_tipo, ultima_fecha_hora = pendiente
+        inicio_turno = ultima_fecha_hora if ultimo_tipo == 'entrada' else None
+
+    # Validar que no haya marcaciones muy recientes (evitar duplicados)
+    if es_duplicada(ultima_fecha_hora, ahora):
+        raise MarcacionError("Ya has marcado recientemente. Espera al menos 5 minutos.")
+
+    empleado = Employee(
+        id=empleado_id,
+        empresa_id=contexto['empresa_id'],
+        nombres=contexto['nombres'],
+        apellidos=contexto['apellidos'],
+    )
+
+    return {
+        'empleado': empleado,
+        'tipo': determinar_tipo(
+            ultimo_tipo, ultima_fecha_hora, ahora, inicio_turno, contexto['shift_type']
+        ),
+        'metodo': 'qr_movil',
+    }
+
+
+@transaction.atomic
+def registrar_marcacion(empleado, tipo, metodo='qr_movil', **datos):
+    """Registra la marcación (el estado del empleado se actualiza por señal)"""
+    datos.pop('codigo_qr', None)
+    return Attendance.objects.create(empleado=empleado, tipo=tipo, metodo=metodo, **datos)
@@ -0,0 +1,17 @@
+from django.core.checks import Tags, Warning, register
+
+from users.authentication import CACHES_LOCALES
+from .idempotency import obtener_cache
+
+
+@register(Tags.caches, deploy=True)
+def revisar_cache_idempotencia(app_configs, **kwargs):
+    """Con una caché local cada proceso guarda sus propias claves de idempotencia"""
+    if not isinstance(obtener_cache(), CACHES_LOCALES):
+        return []
+    return [Warning(
+        'ATTENDANCE_IDEMPOTENCY_CACHE apunta a una caché local al proceso: un '
+        'reintento atendido por otro proceso vuelve a registrar la marcación.',
+        hint='Configure una caché compartida (Redis, Memcached o DatabaseCache).',
+        id='attendance.W001',
+    )]
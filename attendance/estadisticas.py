@@ -0,0 +1,151 @@
+"""
+Motor de estadísticas de asistencia.
+
+Calcula todas las secciones con a lo sumo dos recorridos de la fuente:
+
+1. Una agrupación por (fecha, método) con conteos condicionales de entradas
+   y salidas, de la que se derivan en Python el resumen, las marcaciones por
+   día y por método (el resultado tiene días × métodos filas).
+2. Una agrupación por empleado para el ranking de los más activos.
+
+La fuente es el resumen diario pre-agregado (AttendanceDailyRollup) o, si
+``ATTENDANCE_STATS_SOURCE = 'raw'``, las marcaciones directamente (incluido
+el archivo si el rango lo alcanza).
+"""
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import TruncDate
+
+from .archive import modelo_para_rango
+from .filters import filtrar_por_fechas
+from .models import AttendanceDailyRollup
+
+SECCIONES = ('resumen', 'por_dia', 'por_metodo', 'empleados')
+
+# Secciones que se derivan de la agrupación por (fecha, método)
+SECCIONES_AGRUPADAS = {'resumen', 'por_dia', 'por_metodo'}
+
+LIMITE_EMPLEADOS = 10
+
+
+class FuenteRollup:
+    """Lee los conteos del resumen diario pre-agregado"""
+
+    def filtrar(self, empleado_id=None, empresa_id=None, fecha_inicio=None, fecha_fin=None):
+        queryset = AttendanceDailyRollup.objects.order_by()
+        if empleado_id:
+            queryset = queryset.filter(empleado_id=empleado_id)
+        if empresa_id:
+            queryset = queryset.filter(empresa_id=empresa_id)
+        if fecha_inicio:
+            queryset = queryset.filter(fecha__gte=fecha_inicio)
+        if fecha_fin:
+            queryset = queryset.filter(fecha__lte=fecha_fin)
+        return queryset
+
+    def por_fecha_y_metodo(self, queryset):
+        return queryset.values('fecha', 'metodo').annotate(
+            n_entradas=Sum('entradas'),
+            n_salidas=Sum('salidas'),
+        )
+
+    def total(self):
+        return Sum(F('entradas') + F('salidas'))
+
+
+class FuenteAttendance:
+    """Agrega directamente sobre las marcaciones (sin resumen pre-agregado)"""
+
+    def filtrar(self, empleado_id=None, empresa_id=None, fecha_inicio=None, fecha_fin=None):
+        queryset = modelo_para_rango(fecha_inicio).objects.order_by()
+        if empleado_id:
+            queryset = queryset.filter(empleado_id=empleado_id)
+        if empresa_id:
+            queryset = queryset.filter(empleado__empresa_id=empresa_id)
+        return filtrar_por_fechas(queryset, fecha_inicio, fecha_fin)
+
+    def por_fecha_y_metodo(self, queryset):
+        return queryset.annotate(
+            fecha=TruncDate('fecha_hora')
+        ).values('fecha', 'metodo').annotate(
+            n_entradas=Count('id', filter=Q(tipo='entrada')),
+            n_salidas=Count('id', filter=Q(tipo='salida')),
+        )
+
+    def total(self):
+        return Count('id')
+
+
+FUENTES = {
+    'rollup': FuenteRollup,
+    'raw': FuenteAttendance,
+}
+
+
+def obtener_fuente(nombre=None):
+    """Retorna la fuente de datos configurada"""
+    nombre = nombre or getattr(settings, 'ATTENDANCE_STATS_SOURCE', 'rollup')
+    return FUENTES[nombre]()
+
+
+def calcular_estadisticas(empleado_id=None, empresa_id=None, fecha_inicio=None,
+                          fecha_fin=None, secciones=SECCIONES, fuente=None):
+    """Retorna un dict con las secciones solicitadas de las estadísticas"""
+    fuente = fuente or obtener_fuente()
+    secciones = set(secciones)
+    queryset = fuente.filtrar(empleado_id, empresa_id, fecha_inicio, fecha_fin)
+    resultado = {}
+
+    # Recorrido 1: agrupación por (fecha, método)
+    if secciones & SECCIONES_AGRUPADAS:
+        por_dia = OrderedDict()
+        por_metodo = {}
+        total_entradas = total_salidas = 0
+
+        for fila in fuente.por_fecha_y_metodo(queryset).order_by('fecha'):
+            entradas, salidas = fila['n_entradas'] or 0, fila['n_salidas'] or 0
+            total_entradas += entradas
+            total_salidas += salidas
+
+            dia = por_dia.setdefault(fila['fecha'], {
+                'fecha': fila['fecha'], 'total': 0, 'entradas': 0, 'salidas': 0
+            })
+            dia['entradas'] += entradas
+            dia['salidas'] += salidas
+            dia['total'] += entradas + salidas
+            por_metodo[fila['metodo']] = por_metodo.get(fila['metodo'], 0) + entradas + salidas
+
+        if 'resumen' in secciones:
+            resultado['resumen'] = {
+                'total_marcaciones': total_entradas + total_salidas,
+                'total_entradas': total_entradas,
+                'total_salidas': total_salidas,
+                'periodo': {
+                    'fecha_inicio': fecha_inicio,
+                    'fecha_fin': fecha_fin
+                }
+            }
+        if 'por_dia' in secciones:
+            resultado['marcaciones_por_dia'] = list(por_dia.values())
+        if 'por_metodo' in secciones:
+            resultado['marcaciones_por_metodo'] = [
+                {'metodo': metodo, 'total': total}
+                for metodo, total in sorted(por_metodo.items(), key=lambda item: -item[1])
+            ]
+
+    # Recorrido 2: empleados más activos (si no se filtró por empleado específico)
+    if 'empleados' in secciones:
+        empleados_activos = []
+        if not empleado_id:
+            empleados_activos = list(queryset.values(
+                'empleado__id',
+                'empleado__nombres',
+                'empleado__apellidos'
+            ).annotate(
+                total_marcaciones=fuente.total()
+            ).order_by('-total_marcaciones')[:LIMITE_EMPLEADOS])
+        resultado['empleados_mas_activos'] = empleados_activos
+
+    return resultado
@@ -0,0 +1,92 @@
+"""
+Exportación en streaming de marcaciones (CSV y NDJSON).
+
+Las filas se leen con ``.values_list().iterator(chunk_size=...)`` (cursor del
+lado del servidor, sin instancias de modelo ni serializers de DRF) y se
+escriben en bloques, de modo que la memoria es constante sin importar cuántas
+marcaciones abarque el rango.
+"""
+import csv
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+
+# (columna de salida, campo del queryset)
+COLUMNAS = (
+    ('id', 'id'),
+    ('empleado_id', 'empleado_id'),
+    ('empleado_dni', 'empleado__dni'),
+    ('empleado_nombres', 'empleado__nombres'),
+    ('empleado_apellidos', 'empleado__apellidos'),
+    ('empresa_id', 'empleado__empresa_id'),
+    ('fecha_hora', 'fecha_hora'),
+    ('tipo', 'tipo'),
+    ('metodo', 'metodo'),
+    ('latitud', 'latitud'),
+    ('longitud', 'longitud'),
+    ('dispositivo_info', 'dispositivo_info'),
+    ('registrado_por', 'registrado_por'),
+    ('observaciones', 'observaciones'),
+)
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+CHUNK_SIZE = 2000
+
+# Filas por bloque escrito en la respuesta
+FILAS_POR_BLOQUE = 500
+
+
+class _Buffer:
+    """Pseudo-archivo para csv.writer: retorna lo escrito en lugar de guardarlo"""
+
+    def write(self, valor):
+        return valor
+
+
+def filas(queryset, chunk_size=CHUNK_SIZE):
+    """Itera las marcaciones como tuplas en el orden de COLUMNAS"""
+    campos = [campo for _, campo in COLUMNAS]
+    indice_fecha = campos.index('fecha_hora')
+    tz = timezone.get_current_timezone()
+    for fila in queryset.values_list(*campos).iterator(chunk_size=chunk_size):
+        fila = list(fila)
+        fila[indice_fecha] = fila[indice_fecha].astimezone(tz).isoformat()
+        yield fila
+
+
+def _en_bloques(lineas):
+    bloque = []
+    for linea in lineas:
+        bloque.append(linea)
+        if len(bloque) >= FILAS_POR_BLOQUE:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def exportar_csv(queryset, chunk_size=CHUNK_SIZE):
+    """Genera el CSV (encabezado incluido) en bloques de texto"""
+    escritor = csv.writer(_Buffer())
+    yield escritor.writerow([columna for columna, _ in COLUMNAS])
+    yield from _en_bloques(escritor.writerow(fila) for fila in filas(queryset, chunk_size))
+
+
+def exportar_ndjson(queryset, chunk_size=CHUNK_SIZE):
+    """Genera un objeto JSON por línea en bloques de texto"""
+    columnas = [columna for columna, _ in COLUMNAS]
+    codificador = DjangoJSONEncoder(ensure_ascii=False)
+    yield from _en_bloques(
+        codificador.encode(dict(zip(columnas, fila))) + '\n'
+        for fila in filas(queryset, chunk_size)
+    )
+
+
+EXPORTADORES = {
+    'csv': exportar_csv,
+    'ndjson': exportar_ndjson,
+}
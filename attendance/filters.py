@@ -0,0 +1,55 @@
+"""
+Filtros de fecha indexables para Attendance.
+
+Los lookups ``fecha_hora__date`` aplican una conversión sobre la columna y
+anulan cualquier índice. Aquí las fechas se traducen a rangos semiabiertos
+[inicio 00:00, fin + 1 día 00:00) en la zona horaria activa, de modo que la
+base de datos compara directamente contra ``fecha_hora``.
+"""
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework import serializers
+
+
+def inicio_del_dia(fecha, tz=None):
+    """Retorna el datetime aware de las 00:00 de la fecha en la zona indicada"""
+    tz = tz or timezone.get_current_timezone()
+    return timezone.make_aware(datetime.combine(fecha, time.min), tz)
+
+
+def parsear_fecha(valor, campo):
+    """Convierte un parámetro (str o date) en date, o lanza ValidationError"""
+    if valor in (None, ''):
+        return None
+    if isinstance(valor, date):
+        return valor
+    try:
+        fecha = parse_date(valor)
+    except ValueError:
+        fecha = None
+    if fecha is None:
+        raise serializers.ValidationError({campo: ["Formato de fecha inválido. Use AAAA-MM-DD."]})
+    return fecha
+
+
+def rango_fechas(fecha_inicio=None, fecha_fin=None, tz=None):
+    """Retorna (desde, hasta) como datetimes para el rango semiabierto de fechas"""
+    desde = inicio_del_dia(fecha_inicio, tz) if fecha_inicio else None
+    hasta = inicio_del_dia(fecha_fin + timedelta(days=1), tz) if fecha_fin else None
+    return desde, hasta
+
+
+def filtrar_por_fechas(queryset, fecha_inicio=None, fecha_fin=None, campo='fecha_hora', tz=None):
+    """Filtra el queryset por un rango de fechas inclusivo sin envolver la columna"""
+    desde, hasta = rango_fechas(
+        parsear_fecha(fecha_inicio, 'fecha_inicio'),
+        parsear_fecha(fecha_fin, 'fecha_fin'),
+        tz
+    )
+    if desde:
+        queryset = queryset.filter(**{f'{campo}__gte': desde})
+    if hasta:
+        queryset = queryset.filter(**{f'{campo}__lt': hasta})
+    return queryset
@@ -0,0 +1,113 @@
+"""
+Claves de idempotencia para la marcación de asistencia.
+
+El cliente envía una cabecera ``Idempotency-Key`` con un valor único por
+intento lógico de marcación. La primera respuesta exitosa se guarda en caché
+junto con una huella de la petición (usuario, ruta y cuerpo); los reintentos
+con la misma clave reciben esa respuesta sin volver a validar ni escribir en
+Attendance.
+
+- Misma clave con otro cuerpo: 422.
+- Misma clave mientras la petición original sigue en curso: 409.
+- Las respuestas de error no se guardan, de modo que el cliente puede
+  reintentar con la misma clave.
+
+La caché se configura con ``ATTENDANCE_IDEMPOTENCY_CACHE``; con varios
+procesos debe ser compartida (p. ej. Redis o base de datos): con una caché
+local cada proceso ve solo sus propias claves y ``check --deploy`` lo advierte
+(attendance.W001, ver checks.py).
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework import status
+from rest_framework.response import Response
+
+CABECERA = 'Idempotency-Key'
+CABECERA_REPETIDA = 'Idempotent-Replayed'
+PREFIJO_CACHE = 'attendance:idem:'
+LONGITUD_MAXIMA = 255
+
+# Marcador de una petición en curso (el bloqueo expira por si el proceso muere)
+EN_CURSO = 'en_curso'
+TTL_EN_CURSO = 60
+
+
+def obtener_cache():
+    return caches[getattr(settings, 'ATTENDANCE_IDEMPOTENCY_CACHE', 'default')]
+
+
+def ttl():
+    return getattr(settings, 'ATTENDANCE_IDEMPOTENCY_TTL', 86400)
+
+
+def clave_cache(usuario_id, clave):
+    """Clave de caché acotada al usuario (la clave del cliente se resume con SHA-256)"""
+    resumen = hashlib.sha256(clave.encode('utf-8')).hexdigest()
+    return f'{PREFIJO_CACHE}{usuario_id}:{resumen}'
+
+
+def huella(request):
+    """Resumen del método, la ruta y el cuerpo de la petición"""
+    cuerpo = json.dumps(request.data, sort_keys=True, default=str)
+    contenido = f'{request.method}\n{request.path}\n{cuerpo}'
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+class IdempotenciaMixin:
+    """Hace idempotente el POST de la vista cuando llega la cabecera Idempotency-Key"""
+
+    def post(self, request, *args, **kwargs):
+        clave = request.headers.get(CABECERA)
+        if not clave:
+            return super().post(request, *args, **kwargs)
+
+        if len(clave) > LONGITUD_MAXIMA:
+            return Response(
+                {'error': f'La cabecera {CABECERA} no puede superar {LONGITUD_MAXIMA} caracteres'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        cache = obtener_cache()
+        llave = clave_cache(request.user.pk, clave)
+        firma = huella(request)
+
+        if not cache.add(llave, {'estado': EN_CURSO, 'huella': firma}, TTL_EN_CURSO):
+            guardada = cache.get(llave)
+            if guardada is not None:
+                if guardada['huella'] != firma:
+                    return Response(
+                        {'error': f'La cabecera {CABECERA} ya se usó con una petición distinta'},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY
+                    )
+                if guardada['estado'] == EN_CURSO:
+                    return Response(
+                        {'error': 'La petición original todavía se está procesando'},
+                        status=status.HTTP_409_CONFLICT
+                    )
+                return Response(
+                    guardada['data'],
+                    status=guardada['status'],
+                    headers={CABECERA_REPETIDA: 'true'}
+                )
+            # La entrada expiró entre add() y get(): se toma el bloqueo de nuevo
+            cache.set(llave, {'estado': EN_CURSO, 'huella': firma}, TTL_EN_CURSO)
+
+        try:
+            response = super().post(request, *args, **kwargs)
+        except Exception:
+            cache.delete(llave)
+            raise
+
+        if status.is_success(response.status_code):
+            cache.set(llave, {
+                'estado': 'completada',
+                'huella': firma,
+                'status': response.status_code,
+                'data': response.data,
+            }, ttl())
+        else:
+            cache.delete(llave)
+        return response
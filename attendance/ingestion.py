@@ -0,0 +1,227 @@
+"""
+Carga por lotes de marcaciones registradas sin conexión.
+
+Los teléfonos y la caseta de seguridad acumulan marcaciones mientras están
+desconectados y las envían juntas. El lote se procesa con un número fijo de
+consultas, sin importar su tamaño:
+
+1. Idempotencia: los ``client_uuid`` ya registrados se buscan en una consulta
+   y se informan como duplicados con el id existente.
+2. Códigos QR (registro en memoria) y empleados se validan en bloque.
+3. Las marcaciones previas de los empleados del lote se leen en una consulta
+   (más las que esperan en la cola de escritura diferida, ver write_behind.py)
+   y cada empleado se recorre en orden cronológico para decidir el tipo
+   (si no viene indicado) y aplicar la regla anti-duplicados.
+4. Las aceptadas se insertan con ``escribir_lote`` (``bulk_create`` en una
+   sola transacción, actualizando explícitamente el rollup diario y el estado
+   de marcación, ya que ``bulk_create`` no emite señales).
+"""
+from datetime import timedelta
+from itertools import chain
+
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from asistent_app.tenancy import sin_restriccion
+from employees.models import Employee
+from .checkin import VENTANA_DUPLICADOS, determinar_tipo, es_duplicada
+from .jornadas import DURACION_MAXIMA_JORNADA
+from .models import Attendance
+from .punch_state import registrar_en_estado
+from .qr_registry import registro_qr
+from .rollup import registrar_en_rollup
+
+LIMITE_LOTE = 500
+
+# Intentos de un lote que choca con otra carga de los mismos client_uuid
+INTENTOS_LOTE = 3
+
+# Margen aceptado por desfase del reloj del dispositivo
+TOLERANCIA_FUTURO = timedelta(minutes=5)
+
+REGISTRADA = 'registrada'
+DUPLICADA = 'duplicada'
+RECHAZADA = 'rechazada'
+
+CAMPOS_OPCIONALES = ('latitud', 'longitud', 'dispositivo_info', 'observaciones')
+
+
+def rechazada(marcacion, mensaje):
+    return {'client_uuid': marcacion['client_uuid'], 'estado': RECHAZADA, 'error': mensaje}
+
+
+@transaction.atomic
+def escribir_lote(asistencias):
+    """
+    Inserta las marcaciones con bulk_create y actualiza el rollup diario y el
+    estado de marcación de cada empleado (bulk_create no emite señales).
+    """
+    Attendance.objects.bulk_create(asistencias)
+    registrar_en_rollup(asistencias)
+
+    ultimas = {}
+    for asistencia in asistencias:
+        ultima = ultimas.get(asistencia.empleado_id)
+        if ultima is None or asistencia.fecha_hora >= ultima.fecha_hora:
+            ultimas[asistencia.empleado_id] = asistencia
+    for asistencia in ultimas.values():
+        registrar_en_estado(asistencia)
+    return asistencias
+
+
+def ingerir_lote(marcaciones, usuario, ahora=None):
+    """
+    Registra un lote de marcaciones validadas (dicts con client_uuid,
+    codigo_qr, fecha_hora y opcionalmente tipo, empleado_id y datos del
+    dispositivo) y retorna un resultado por marcación, en el mismo orden.
+    """
+    for _ in range(INTENTOS_LOTE):
+        try:
+            return _ingerir(marcaciones, usuario, ahora)
+        except IntegrityError:
+            # Otra petición registró alguno de los client_uuid en paralelo; al
+            # reintentar se informan como duplicados
+            continue
+    return _en_conflicto(marcaciones)
+
+
+def _en_conflicto(marcaciones):
+    """
+    Resultado de un lote que siguió chocando con cargas concurrentes: las ya
+    registradas son duplicadas y el resto se rechaza para que se reenvíe.
+    """
+    existentes = dict(Attendance.objects.filter(
+        client_uuid__in=[m['client_uuid'] for m in marcaciones]
+    ).values_list('client_uuid', 'id'))
+    return [
+        {'client_uuid': m['client_uuid'], 'estado': DUPLICADA, 'id': existentes[m['client_uuid']]}
+        if m['client_uuid'] in existentes
+        else rechazada(m, 'Conflicto con otra carga simultánea; reintente el envío')
+        for m in marcaciones
+    ]
+
+
+def _ingerir(marcaciones, usuario, ahora=None):
+    # write_behind importa este módulo (escribir_lote)
+    from .write_behind import pendientes_entre
+
+    ahora = ahora or timezone.now()
+    resultados = [None] * len(marcaciones)
+    empleado_propio = getattr(usuario, 'empleado_id', None)
+
+    # 1. Idempotencia por client_uuid
+    existentes = dict(Attendance.objects.filter(
+        client_uuid__in=[m['client_uuid'] for m in marcaciones]
+    ).values_list('client_uuid', 'id'))
+
+    pendientes, vistos = [], set()
+    for indice, marcacion in enumerate(marcaciones):
+        uuid = marcacion['client_uuid']
+        empleado_id = marcacion.get('empleado_id') or empleado_propio
+        if uuid in existentes:
+            resultados[indice] = {'client_uuid': uuid, 'estado': DUPLICADA, 'id': existentes[uuid]}
+        elif uuid in vistos:
+            resultados[indice] = rechazada(marcacion, 'client_uuid repetido en el lote')
+        elif not empleado_id:
+            resultados[indice] = rechazada(marcacion, 'No se encontró el empleado asociado al usuario')
+        elif empleado_id != empleado_propio and not usuario.is_staff:
+            resultados[indice] = rechazada(marcacion, 'No tienes permisos para registrar marcaciones de otro empleado')
+        elif marcacion['fecha_hora'] > ahora + TOLERANCIA_FUTURO:
+            resultados[indice] = rechazada(marcacion, 'La fecha y hora no puede ser futura')
+        else:
+            vistos.add(uuid)
+            pendientes.append((indice, empleado_id))
+
+    # 2. Códigos QR y empleados en bloque
+    codigos = registro_qr.obtener_varios(marcaciones[i]['codigo_qr'] for i, _ in pendientes)
+    empleados = {
+        empleado_id: (empresa_id, shift_type)
+        for empleado_id, empresa_id, shift_type in Employee.objects.filter(
+            pk__in={empleado_id for _, empleado_id in pendientes}
+        ).order_by().values_list('id', 'empresa_id', 'shift_type')
+    }
+
+    por_empleado = {}
+    for indice, empleado_id in pendientes:
+        marcacion = marcaciones[indice]
+        qr_code = codigos.get(marcacion['codigo_qr'])
+        if qr_code is None or not qr_code[2]:
+            resultados[indice] = rechazada(marcacion, 'Código QR inválido o inactivo')
+        elif empleado_id not in empleados:
+            resultados[indice] = rechazada(marcacion, 'No se encontró el empleado')
+        elif empleado_id != empleado_propio and not sin_restriccion(usuario) and \
+                empleados[empleado_id][0] != getattr(usuario, 'empresa_id', None):
+            # Mismo alcance que AlcanceEmpresaMixin: el personal solo registra
+            # marcaciones de empleados de su empresa
+            resultados[indice] = rechazada(marcacion, 'No tienes permisos para registrar marcaciones de otra empresa')
+        elif empleados[empleado_id][0] != qr_code[1]:
+            resultados[indice] = rechazada(marcacion, 'No tienes permisos para marcar en esta ubicación')
+        else:
+            por_empleado.setdefault(empleado_id, []).append(indice)
+
+    if not por_empleado:
+        return resultados
+
+    # 3. Recorrido cronológico por empleado sobre sus marcaciones previas.
+    # Basta leer DURACION_MAXIMA_JORNADA antes de la marcación más antigua:
+    # un turno abierto desde antes ya no se cierra y no influye en el tipo
+    # (la ventana anti-duplicados es menor).
+    mas_antigua = min(marcaciones[i]['fecha_hora'] for indices in por_empleado.values() for i in indices)
+    mas_reciente = max(marcaciones[i]['fecha_hora'] for indices in por_empleado.values() for i in indices)
+    desde = mas_antigua - max(DURACION_MAXIMA_JORNADA, VENTANA_DUPLICADOS)
+
+    registradas = Attendance.objects.filter(
+        empleado_id__in=por_empleado,
+        fecha_hora__gte=desde,
+        fecha_hora__lte=mas_reciente
+    ).order_by().values_list('empleado_id', 'fecha_hora', 'tipo')
+    historial = {}
+    for empleado_id, fecha_hora, tipo in chain(registradas, pendientes_entre(por_empleado, desde, mas_reciente)):
+        historial.setdefault(empleado_id, []).append((fecha_hora, 0, tipo, None))
+
+    nuevas = []
+    for empleado_id, indices in por_empleado.items():
+        empresa_id, shift_type = empleados[empleado_id]
+        empleado = Employee(id=empleado_id, empresa_id=empresa_id)
+        eventos = historial.get(empleado_id, []) + [
+            (marcaciones[i]['fecha_hora'], 1, marcaciones[i].get('tipo'), i) for i in indices
+        ]
+        eventos.sort(key=lambda evento: evento[:2])
+
+        ultimo_tipo = ultima_fecha_hora = inicio_turno = None
+        for fecha_hora, _, tipo, indice in eventos:
+            if indice is not None:
+                marcacion = marcaciones[indice]
+                if es_duplicada(ultima_fecha_hora, fecha_hora):
+                    resultados[indice] = rechazada(
+                        marcacion, 'Existe otra marcación dentro de los 5 minutos previos'
+                    )
+                    continue
+                tipo = tipo or determinar_tipo(
+                    ultimo_tipo, ultima_fecha_hora, fecha_hora, inicio_turno, shift_type
+                )
+                asistencia = Attendance(
+                    empleado=empleado,
+                    fecha_hora=fecha_hora,
+                    tipo=tipo,
+                    metodo='qr_movil' if empleado_id == empleado_propio else 'manual_seguridad',
+                    registrado_por=None if empleado_id == empleado_propio else usuario.get_username(),
+                    client_uuid=marcacion['client_uuid'],
+                    **{campo: marcacion.get(campo) for campo in CAMPOS_OPCIONALES}
+                )
+                nuevas.append((indice, asistencia))
+            ultimo_tipo, ultima_fecha_hora = tipo, fecha_hora
+            inicio_turno = fecha_hora if tipo == 'entrada' else None
+
+    # 4. Escritura en una sola transacción
+    escribir_lote([asistencia for _, asistencia in nuevas])
+
+    for indice, asistencia in nuevas:
+        resultados[indice] = {
+            'client_uuid': asistencia.client_uuid,
+            'estado': REGISTRADA,
+            'id': asistencia.pk,
+            'tipo': asistencia.tipo,
+            'fecha_hora': asistencia.fecha_hora,
+        }
+    return resultados
@@ -0,0 +1,145 @@
+"""
+Motor de emparejamiento de jornadas (entrada/salida).
+
+Las marcaciones de un empleado se obtienen una sola vez, ordenadas, y se
+emparejan en un único recorrido lineal: cada entrada abre una jornada que
+cierra la siguiente salida. Las salidas sin entrada previa se descartan y
+una entrada seguida de otra entrada deja la primera como jornada abierta.
+
+Los turnos nocturnos (turno_3, turno_4) cruzan la medianoche; para ellos la
+ventana de lectura se extiende hasta la mañana siguiente, y cada jornada se
+atribuye al día de su entrada. Antes de que el tipo de marcación considerara
+el turno abierto, la salida de madrugada se registraba como 'entrada'; en
+turnos nocturnos una entrada del día siguiente dentro de la duración máxima
+cierra la jornada abierta.
+"""
+from collections import namedtuple
+from datetime import timedelta
+from itertools import groupby
+from operator import itemgetter
+
+from django.utils import timezone
+
+from .archive import modelo_para_rango
+from .filters import rango_fechas
+
+TURNOS_NOCTURNOS = {'turno_3', 'turno_4'}
+
+# Horas posteriores a la medianoche en que aún puede cerrar un turno nocturno
+EXTENSION_NOCTURNA = timedelta(hours=12)
+
+# Una salida más lejana que esto de su entrada no se considera la misma jornada
+DURACION_MAXIMA_JORNADA = timedelta(hours=16)
+
+
+class Intervalo(namedtuple('Intervalo', ['entrada', 'salida', 'fecha'])):
+    """
+    Jornada trabajada; salida es None si la jornada sigue abierta y fecha es
+    el día local al que se atribuye (el de la entrada).
+    """
+    __slots__ = ()
+
+    @property
+    def horas(self):
+        """Horas trabajadas (0 si la jornada está abierta)"""
+        if self.salida is None:
+            return 0
+        return (self.salida - self.entrada).total_seconds() / 3600
+
+
+def emparejar(marcaciones, duracion_maxima=DURACION_MAXIMA_JORNADA, tz=None, shift_type=None):
+    """
+    Empareja marcaciones (fecha_hora, tipo) ordenadas por fecha_hora y
+    retorna la lista de intervalos en un solo recorrido.
+    """
+    # La zona horaria se resuelve una vez: localtime() la busca en cada llamada
+    tz = tz or timezone.get_current_timezone()
+    nocturno = shift_type in TURNOS_NOCTURNOS
+    intervalos = []
+    abierta = None
+    for fecha_hora, tipo in marcaciones:
+        if tipo == 'entrada' and nocturno and abierta is not None and (
+            fecha_hora - abierta <= duracion_maxima
+            and fecha_hora.astimezone(tz).date() != abierta.astimezone(tz).date()
+        ):
+            # Salida de madrugada registrada como entrada
+            tipo = 'salida'
+        if tipo == 'entrada':
+            if abierta is not None:
+                intervalos.append(Intervalo(abierta, None, abierta.astimezone(tz).date()))
+            abierta = fecha_hora
+        elif abierta is not None:
+            salida = fecha_hora if fecha_hora - abierta <= duracion_maxima else None
+            intervalos.append(Intervalo(abierta, salida, abierta.astimezone(tz).date()))
+            abierta = None
+    if abierta is not None:
+        intervalos.append(Intervalo(abierta, None, abierta.astimezone(tz).date()))
+    return intervalos
+
+
+def ventana_lectura(fecha_inicio, fecha_fin, shift_type=None):
+    """Rango [desde, hasta) de marcaciones necesarias para los días indicados"""
+    desde, hasta = rango_fechas(fecha_inicio, fecha_fin)
+    if shift_type in TURNOS_NOCTURNOS:
+        hasta += EXTENSION_NOCTURNA
+    return desde, hasta
+
+
+def en_rango(intervalos, fecha_inicio, fecha_fin):
+    """Filtra los intervalos cuya entrada cae entre las fechas indicadas"""
+    return [i for i in intervalos if fecha_inicio <= i.fecha <= fecha_fin]
+
+
+def horas_por_dia(intervalos):
+    """Retorna {fecha: horas} sumando las jornadas cerradas de cada día"""
+    horas = {}
+    for intervalo in intervalos:
+        if intervalo.salida is not None:
+            horas[intervalo.fecha] = horas.get(intervalo.fecha, 0) + intervalo.horas
+    return horas
+
+
+def obtener_marcaciones(empleado_id, fecha_inicio, fecha_fin, shift_type=None):
+    """Retorna en una consulta las marcaciones (instancias) de la ventana de lectura"""
+    desde, hasta = ventana_lectura(fecha_inicio, fecha_fin, shift_type)
+    return list(modelo_para_rango(fecha_inicio).objects.filter(
+        empleado_id=empleado_id,
+        fecha_hora__gte=desde,
+        fecha_hora__lt=hasta
+    ).order_by('fecha_hora', 'id'))
+
+
+def horas_por_empleado(empresa_id, fecha_inicio, fecha_fin, chunk_size=20000, desde_empleado=None):
+    """
+    Calcula las horas trabajadas por empleado y día para toda una empresa.
+
+    Lee todas las marcaciones del rango en un único recorrido ordenado por
+    (empleado, fecha_hora) con un cursor del lado del servidor y empareja cada
+    empleado con un barrido lineal, sin consultas por empleado ni por día.
+    Genera tuplas (empleado_id, {fecha: horas}) en orden de empleado_id, a
+    partir del empleado siguiente a ``desde_empleado``; quien deja de consumir
+    el generador deja de leer filas.
+    """
+    tz = timezone.get_current_timezone()
+    desde, hasta = rango_fechas(fecha_inicio, fecha_fin, tz)
+    filas = modelo_para_rango(fecha_inicio).objects.filter(
+        empleado__empresa_id=empresa_id,
+        fecha_hora__gte=desde,
+        fecha_hora__lt=hasta + EXTENSION_NOCTURNA
+    )
+    if desde_empleado is not None:
+        filas = filas.filter(empleado_id__gt=desde_empleado)
+    filas = filas.order_by('empleado_id', 'fecha_hora', 'id').values_list(
+        'empleado_id', 'empleado__shift_type', 'fecha_hora', 'tipo'
+    ).iterator(chunk_size=chunk_size)
+
+    for empleado_id, grupo in groupby(filas, key=itemgetter(0)):
+        grupo = list(grupo)
+        # La extensión de la ventana solo aplica a turnos nocturnos
+        limite = hasta + EXTENSION_NOCTURNA if grupo[0][1] in TURNOS_NOCTURNOS else hasta
+        intervalos = emparejar(
+            ((fila[2], fila[3]) for fila in grupo if fila[2] < limite), tz=tz, shift_type=grupo[0][1]
+        )
+        horas = horas_por_dia(en_rango(intervalos, fecha_inicio, fecha_fin))
+        if horas:
+            yield empleado_id, horas
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from attendance.archive import archivar, corte_archivo
+from attendance.models import Attendance
+
+
+class Command(BaseCommand):
+    help = (
+        'Mueve a AttendanceArchive las marcaciones anteriores al corte '
+        '(inicio del mes de hace ATTENDANCE_ARCHIVE_MONTHS meses). El rollup '
+        'diario y el estado de marcación no se modifican.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meses', type=int, help='Meses completos a conservar en la tabla vigente')
+        parser.add_argument('--lote', type=int, default=5000, help='Marcaciones por transacción')
+        parser.add_argument('--dry-run', action='store_true', help='Solo informar cuántas marcaciones se moverían')
+
+    def handle(self, *args, **options):
+        corte = corte_archivo(options['meses'])
+        if options['dry_run']:
+            pendientes = Attendance.objects.filter(fecha_hora__lt=corte).count()
+            self.stdout.write(f'{pendientes} marcación(es) anteriores a {corte:%Y-%m-%d} por archivar.')
+            return
+
+        movidas = archivar(corte, options['lote'])
+        self.stdout.write(self.style.SUCCESS(
+            f'{movidas} marcación(es) anteriores a {corte:%Y-%m-%d} movidas al archivo.'
+        ))
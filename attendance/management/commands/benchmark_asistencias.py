@@ -0,0 +1,150 @@
+import random
+import statistics
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connections, transaction
+from django.utils import timezone
+
+from attendance.filters import filtrar_por_fechas, inicio_del_dia
+from attendance.models import Attendance
+from companies.models import Company
+from departments.models import Department
+from employees.models import Employee
+from positions.models import Position
+
+
+class Rollback(Exception):
+    """Fuerza la reversión de los datos sintéticos al terminar"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara planes de consulta y latencias de los filtros de fecha de Attendance '
+        '(fecha_hora__date frente a rangos semiabiertos) sobre datos sintéticos. '
+        'Los datos se generan dentro de una transacción que se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1_000_000, help='Marcaciones a generar (p. ej. 10000000)')
+        parser.add_argument('--empleados', type=int, default=5000, help='Empleados sintéticos')
+        parser.add_argument('--dias', type=int, default=365, help='Días de historia a repartir')
+        parser.add_argument('--repeticiones', type=int, default=5, help='Ejecuciones por consulta')
+        parser.add_argument('--database', default='default', help='Alias de base de datos')
+
+    def handle(self, *args, **options):
+        self.using = options['database']
+        try:
+            with transaction.atomic(using=self.using):
+                empleado_id, hoy = self.generar_datos(options)
+                self.ejecutar_escenarios(empleado_id, hoy, options['repeticiones'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('Datos sintéticos revertidos.'))
+
+    def generar_datos(self, options):
+        filas, n_empleados, dias = options['filas'], options['empleados'], options['dias']
+        inicio = time.perf_counter()
+
+        empresa = Company.objects.using(self.using).create(
+            razon_social='BENCHMARK', ruc='00000000000', direccion='-', telefono='-',
+            email='benchmark@example.com'
+        )
+        departamento = Department.objects.using(self.using).create(
+            nombre='Benchmark', codigo='BENCH', empresa=empresa
+        )
+        cargo = Position.objects.using(self.using).create(
+            nombre='Benchmark', codigo='BENCH', empresa=empresa, departamento=departamento
+        )
+        Employee.objects.using(self.using).bulk_create([
+            Employee(
+                nombres='Empleado', apellidos=str(i), dni=f'{90000000 + i}'[-8:],
+                fecha_nacimiento=date(1990, 1, 1), codigo_empleado=f'BENCH-{i}',
+                fecha_ingreso=date(2020, 1, 1), salario_actual=0, empresa=empresa,
+                departamento=departamento, cargo=cargo
+            )
+            for i in range(n_empleados)
+        ], batch_size=1000)
+        empleados = list(
+            Employee.objects.using(self.using).filter(empresa=empresa).values_list('id', flat=True)
+        )
+
+        connection = connections[self.using]
+        hoy = timezone.localdate()
+        base = inicio_del_dia(hoy - timedelta(days=dias))
+        segundos = dias * 86400
+        adaptar = connection.ops.adapt_datetimefield_value
+        tabla = connection.ops.quote_name(Attendance._meta.db_table)
+        sql = (
+            f'INSERT INTO {tabla} (empleado_id, fecha_hora, tipo, metodo, created) '
+            f'VALUES (%s, %s, %s, %s, %s)'
+        )
+        ahora = adaptar(timezone.now())
+
+        def filas_sinteticas(cantidad):
+            for _ in range(cantidad):
+                fecha_hora = base + timedelta(seconds=random.randrange(segundos))
+                yield (
+                    random.choice(empleados), adaptar(fecha_hora),
+                    random.choice(('entrada', 'salida')), 'qr_movil', ahora
+                )
+
+        with connection.cursor() as cursor:
+            restantes = filas
+            while restantes:
+                lote = min(restantes, 50_000)
+                cursor.executemany(sql, filas_sinteticas(lote))
+                restantes -= lote
+            cursor.execute('ANALYZE')
+
+        self.stdout.write(
+            f'{filas:,} marcaciones / {n_empleados:,} empleados generados en '
+            f'{time.perf_counter() - inicio:.1f}s'
+        )
+        return empleados[0], hoy
+
+    def ejecutar_escenarios(self, empleado_id, hoy, repeticiones):
+        base = Attendance.objects.using(self.using)
+        inicio_semana, inicio_mes = hoy - timedelta(days=6), hoy - timedelta(days=29)
+
+        escenarios = [
+            (
+                'Marcaciones de un empleado en el día',
+                lambda qs: qs.filter(empleado_id=empleado_id, fecha_hora__date=hoy),
+                lambda qs: filtrar_por_fechas(qs.filter(empleado_id=empleado_id), hoy, hoy),
+                lambda qs: qs.order_by('fecha_hora'),
+                list,
+            ),
+            (
+                'Primera página de los últimos 7 días',
+                lambda qs: qs.filter(fecha_hora__date__gte=inicio_semana, fecha_hora__date__lte=hoy),
+                lambda qs: filtrar_por_fechas(qs, inicio_semana, hoy),
+                lambda qs: qs.order_by('-fecha_hora')[:20],
+                list,
+            ),
+            (
+                'Conteo de entradas de los últimos 30 días',
+                lambda qs: qs.filter(tipo='entrada', fecha_hora__date__gte=inicio_mes, fecha_hora__date__lte=hoy),
+                lambda qs: filtrar_por_fechas(qs.filter(tipo='entrada'), inicio_mes, hoy),
+                lambda qs: qs.order_by(),
+                lambda qs: qs.count(),
+            ),
+        ]
+
+        for titulo, anterior, indexable, preparar, ejecutar in escenarios:
+            self.stdout.write(self.style.MIGRATE_HEADING(f'\n{titulo}'))
+            for etiqueta, construir in (('fecha_hora__date', anterior), ('rango semiabierto', indexable)):
+                queryset = preparar(construir(base))
+                plan = queryset.explain()
+                tiempos = []
+                for _ in range(repeticiones):
+                    inicio = time.perf_counter()
+                    ejecutar(queryset.all())
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                self.stdout.write(
+                    f'  [{etiqueta}] mediana {statistics.median(tiempos):.2f} ms, '
+                    f'máx {max(tiempos):.2f} ms'
+                )
+                for linea in plan.splitlines():
+                    self.stdout.write(f'      {linea}')
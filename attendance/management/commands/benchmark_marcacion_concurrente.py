@@ -0,0 +1,139 @@
+import statistics
+import threading
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from attendance.models import QRCode
+from attendance.qr_registry import registro_qr
+from attendance.views import MarcarAsistenciaView
+from companies.models import Company
+from departments.models import Department
+from employees.models import Employee
+from positions.models import Position
+from users.models import CustomUser
+
+PREFIJO = 'BENCH-CONC'
+
+
+class Command(BaseCommand):
+    help = (
+        'Envía marcaciones concurrentes a MarcarAsistenciaView desde varios hilos '
+        '(cada uno con su propia conexión) y reporta errores de bloqueo y latencias. '
+        'Crea datos sintéticos en la base configurada y los elimina al terminar: '
+        'ejecútelo sobre una copia de la base de datos (con DB_NAME y, para medir '
+        'con WAL, DB_SQLITE_WAL=1).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=16, help='Hilos concurrentes')
+        parser.add_argument('--marcaciones', type=int, default=2000, help='Marcaciones totales (una por empleado)')
+
+    def handle(self, *args, **options):
+        hilos, total = options['hilos'], options['marcaciones']
+        self.mostrar_perfil()
+
+        usuarios, empresa = self.generar_datos(total)
+        try:
+            resultados = self.ejecutar(usuarios, hilos)
+        finally:
+            empresa.delete()
+            CustomUser.objects.filter(username__startswith=PREFIJO).delete()
+        self.reportar(resultados, hilos)
+
+    def mostrar_perfil(self):
+        if connection.vendor != 'sqlite':
+            self.stdout.write(f'Motor: {connection.vendor}')
+            return
+        with connection.cursor() as cursor:
+            valores = []
+            for pragma in ('journal_mode', 'synchronous', 'busy_timeout'):
+                cursor.execute(f'PRAGMA {pragma}')
+                valores.append(f'{pragma}={cursor.fetchone()[0]}')
+        self.stdout.write('SQLite: ' + ', '.join(valores))
+
+    def generar_datos(self, total):
+        empresa = Company.objects.create(
+            razon_social=PREFIJO, ruc='00000000001', direccion='-', telefono='-',
+            email='benchmark-concurrente@example.com'
+        )
+        departamento = Department.objects.create(nombre='Benchmark', codigo=PREFIJO, empresa=empresa)
+        cargo = Position.objects.create(
+            nombre='Benchmark', codigo=PREFIJO, empresa=empresa, departamento=departamento
+        )
+        QRCode.objects.create(empresa=empresa, nombre='Benchmark', codigo_qr=PREFIJO, ubicacion='-')
+
+        Employee.objects.bulk_create([
+            Employee(
+                nombres='Empleado', apellidos=str(i), dni=f'{80000000 + i}'[-8:],
+                fecha_nacimiento=date(1990, 1, 1), codigo_empleado=f'{PREFIJO}-{i}',
+                fecha_ingreso=date(2020, 1, 1), salario_actual=0, empresa=empresa,
+                departamento=departamento, cargo=cargo
+            )
+            for i in range(total)
+        ], batch_size=1000)
+        empleados = Employee.objects.filter(empresa=empresa).values_list('id', flat=True)
+        # Contraseña inutilizable: las peticiones se autentican con force_authenticate
+        CustomUser.objects.bulk_create([
+            CustomUser(username=f'{PREFIJO}-{empleado_id}', password='!', empleado_id=empleado_id)
+            for empleado_id in empleados
+        ], batch_size=1000)
+        usuarios = list(CustomUser.objects.filter(username__startswith=PREFIJO))
+        return usuarios, empresa
+
+    def ejecutar(self, usuarios, hilos):
+        vista = MarcarAsistenciaView.as_view()
+        fabrica = APIRequestFactory()
+        registro_qr.limpiar()
+        resultados = []
+        candado = threading.Lock()
+
+        def trabajar(lote):
+            propios = []
+            for usuario in lote:
+                peticion = fabrica.post('/api/v1/attendance/marcar/', {'codigo_qr': PREFIJO}, format='json')
+                force_authenticate(peticion, user=usuario)
+                inicio = time.perf_counter()
+                try:
+                    respuesta = vista(peticion)
+                    resultado = str(respuesta.status_code)
+                except Exception as error:  # noqa: BLE001 - se reporta el tipo de error
+                    resultado = 'bloqueo' if 'locked' in str(error) else type(error).__name__
+                propios.append((resultado, (time.perf_counter() - inicio) * 1000))
+            connections.close_all()
+            with candado:
+                resultados.extend(propios)
+
+        trabajadores = [
+            threading.Thread(target=trabajar, args=(usuarios[i::hilos],)) for i in range(hilos)
+        ]
+        self.inicio = time.perf_counter()
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+        self.duracion = time.perf_counter() - self.inicio
+        return resultados
+
+    def reportar(self, resultados, hilos):
+        conteo = {}
+        for resultado, _ in resultados:
+            conteo[resultado] = conteo.get(resultado, 0) + 1
+        tiempos = sorted(ms for _, ms in resultados)
+        p99 = tiempos[min(len(tiempos) - 1, int(len(tiempos) * 0.99))]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\n{len(resultados)} marcaciones con {hilos} hilos en {self.duracion:.1f}s '
+            f'({len(resultados) / self.duracion:.0f}/s)'
+        ))
+        for resultado, cantidad in sorted(conteo.items()):
+            self.stdout.write(f'  {resultado}: {cantidad}')
+        self.stdout.write(
+            f'  latencia p50 {statistics.median(tiempos):.1f} ms, '
+            f'p99 {p99:.1f} ms, máx {tiempos[-1]:.1f} ms'
+        )
+        estilo = self.style.SUCCESS if not conteo.get('bloqueo') else self.style.ERROR
+        self.stdout.write(estilo(f'Errores de bloqueo: {conteo.get("bloqueo", 0)}'))
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from attendance.write_behind import cola, drenar
+
+
+class Command(BaseCommand):
+    help = (
+        'Vuelca a Attendance las marcaciones de la cola de escritura diferida '
+        '(ATTENDANCE_WRITE_BEHIND). Es seguro reejecutarlo tras una caída: las '
+        'marcaciones ya escritas se descartan por client_uuid.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, help='Marcaciones por transacción (por defecto ATTENDANCE_WRITE_BEHIND_BATCH)')
+        parser.add_argument('--continuo', action='store_true', help='Seguir drenando hasta interrumpir el proceso')
+        parser.add_argument('--intervalo', type=float, default=1.0, help='Segundos de espera con la cola vacía (modo continuo)')
+
+    def handle(self, *args, **options):
+        total = 0
+        try:
+            while True:
+                procesadas = drenar(options['lote'])
+                total += procesadas
+                if procesadas:
+                    self.stdout.write(f'{procesadas} marcación(es) volcada(s)')
+                    continue
+                if not options['continuo']:
+                    break
+                time.sleep(options['intervalo'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Cola drenada: {total} marcación(es) procesada(s), {cola.pendientes()} pendiente(s), '
+            f'{cola.fallidas()} fallida(s) en marcaciones_fallidas.'
+        ))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from attendance.models import AttendanceDailyRollup
+from attendance.rollup import reconstruir_rollup
+
+
+class Command(BaseCommand):
+    help = 'Recalcula el resumen diario de asistencia (AttendanceDailyRollup) desde Attendance'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, help='Reconstruir solo para esta empresa')
+
+    def handle(self, *args, **options):
+        empresa_id = options.get('empresa')
+        reconstruir_rollup(empresa_id)
+
+        filas = AttendanceDailyRollup.objects.all()
+        if empresa_id:
+            filas = filas.filter(empresa_id=empresa_id)
+        self.stdout.write(self.style.SUCCESS(f'Resumen diario reconstruido: {filas.count()} fila(s).'))
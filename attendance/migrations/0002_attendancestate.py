@@ -0,0 +1,51 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def poblar_estados(apps, schema_editor):
+    """Materializa el estado de marcación a partir de la última marcación de cada empleado"""
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceState = apps.get_model('attendance', 'AttendanceState')
+
+    estados = {}
+    ultimas = Attendance.objects.order_by('empleado_id', '-fecha_hora', '-id').values_list(
+        'empleado_id', 'tipo', 'fecha_hora'
+    )
+    for empleado_id, tipo, fecha_hora in ultimas.iterator(chunk_size=5000):
+        if empleado_id not in estados:
+            estados[empleado_id] = AttendanceState(
+                empleado_id=empleado_id,
+                ultimo_tipo=tipo,
+                ultima_fecha_hora=fecha_hora,
+                inicio_turno=fecha_hora if tipo == 'entrada' else None,
+            )
+
+    AttendanceState.objects.bulk_create(estados.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0001_initial'),
+        ('employees', '0002_remove_employee_email_empresa_employee_rest_day_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceState',
+            fields=[
+                ('empleado', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='estado_marcacion', serialize=False, to='employees.employee', verbose_name='Empleado')),
+                ('ultimo_tipo', models.CharField(choices=[('entrada', 'Entrada'), ('salida', 'Salida')], max_length=10, verbose_name='Último Tipo de Marcación')),
+                ('ultima_fecha_hora', models.DateTimeField(verbose_name='Última Fecha y Hora')),
+                ('inicio_turno', models.DateTimeField(blank=True, null=True, verbose_name='Inicio del Turno Abierto')),
+                ('updated', models.DateTimeField(auto_now=True, verbose_name='Fecha de Actualización')),
+            ],
+            options={
+                'verbose_name': 'Estado de Marcación',
+                'verbose_name_plural': 'Estados de Marcación',
+            },
+        ),
+        migrations.RunPython(poblar_estados, migrations.RunPython.noop),
+    ]
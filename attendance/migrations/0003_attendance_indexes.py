@@ -0,0 +1,26 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_attendancestate'),
+        ('employees', '0002_remove_employee_email_empresa_employee_rest_day_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['empleado', 'fecha_hora'], name='attendance_empleado_fecha_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['fecha_hora'], name='attendance_fecha_hora_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['tipo', 'fecha_hora'], name='attendance_tipo_fecha_idx'),
+        ),
+    ]
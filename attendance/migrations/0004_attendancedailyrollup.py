@@ -0,0 +1,64 @@
+# Generated by Django 5.2.1 on 2026-10-18 10:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+from django.db.models.functions import TruncDate
+
+
+def poblar_rollup(apps, schema_editor):
+    """Agrega la historia existente de Attendance en el resumen diario"""
+    Attendance = apps.get_model('attendance', 'Attendance')
+    AttendanceDailyRollup = apps.get_model('attendance', 'AttendanceDailyRollup')
+
+    filas = Attendance.objects.order_by().annotate(
+        fecha=TruncDate('fecha_hora')
+    ).values(
+        'empleado__empresa_id', 'empleado_id', 'fecha', 'metodo'
+    ).annotate(
+        n_entradas=Count('id', filter=Q(tipo='entrada')),
+        n_salidas=Count('id', filter=Q(tipo='salida')),
+    )
+    AttendanceDailyRollup.objects.bulk_create([
+        AttendanceDailyRollup(
+            empresa_id=fila['empleado__empresa_id'],
+            empleado_id=fila['empleado_id'],
+            fecha=fila['fecha'],
+            metodo=fila['metodo'],
+            entradas=fila['n_entradas'],
+            salidas=fila['n_salidas'],
+        )
+        for fila in filas
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_attendance_indexes'),
+        ('companies', '0001_initial'),
+        ('employees', '0002_remove_employee_email_empresa_employee_rest_day_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fecha', models.DateField(verbose_name='Fecha')),
+                ('metodo', models.CharField(choices=[('qr_movil', 'QR desde Móvil'), ('manual_seguridad', 'Manual desde Seguridad'), ('web_admin', 'Web Admin')], max_length=20, verbose_name='Método de Marcación')),
+                ('entradas', models.PositiveIntegerField(default=0, verbose_name='Entradas')),
+                ('salidas', models.PositiveIntegerField(default=0, verbose_name='Salidas')),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='employees.employee', verbose_name='Empleado')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='companies.company', verbose_name='Empresa')),
+            ],
+            options={
+                'verbose_name': 'Resumen Diario de Asistencia',
+                'verbose_name_plural': 'Resúmenes Diarios de Asistencia',
+                'ordering': ['-fecha'],
+                'indexes': [models.Index(fields=['empresa', 'fecha'], name='attendance_rollup_emp_fecha'), models.Index(fields=['empleado', 'fecha'], name='attendance_rollup_empl_fecha'), models.Index(fields=['fecha'], name='attendance_rollup_fecha_idx')],
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'empleado', 'fecha', 'metodo'), name='attendance_rollup_unique')],
+            },
+        ),
+        migrations.RunPython(poblar_rollup, migrations.RunPython.noop),
+    ]
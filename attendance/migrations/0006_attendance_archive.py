@@ -0,0 +1,79 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+COLUMNAS = (
+    'id, empleado_id, fecha_hora, tipo, metodo, latitud, longitud, '
+    'dispositivo_info, registrado_por, observaciones, client_uuid, created'
+)
+
+CREAR_VISTA = (
+    f'CREATE VIEW attendance_historico AS '
+    f'SELECT {COLUMNAS} FROM attendance_attendance '
+    f'UNION ALL '
+    f'SELECT {COLUMNAS} FROM attendance_attendancearchive'
+)
+
+ELIMINAR_VISTA = 'DROP VIEW IF EXISTS attendance_historico'
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_attendance_client_uuid'),
+        ('employees', '0002_remove_employee_email_empresa_employee_rest_day_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceHistorico',
+            fields=[
+                ('fecha_hora', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha y Hora')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('salida', 'Salida')], max_length=10, verbose_name='Tipo de Marcación')),
+                ('metodo', models.CharField(choices=[('qr_movil', 'QR desde Móvil'), ('manual_seguridad', 'Manual desde Seguridad'), ('web_admin', 'Web Admin')], default='qr_movil', max_length=20, verbose_name='Método de Marcación')),
+                ('latitud', models.DecimalField(blank=True, decimal_places=8, max_digits=10, null=True, verbose_name='Latitud')),
+                ('longitud', models.DecimalField(blank=True, decimal_places=8, max_digits=11, null=True, verbose_name='Longitud')),
+                ('dispositivo_info', models.CharField(blank=True, max_length=200, null=True, verbose_name='Info del Dispositivo')),
+                ('registrado_por', models.CharField(blank=True, max_length=100, null=True, verbose_name='Registrado por')),
+                ('observaciones', models.TextField(blank=True, null=True, verbose_name='Observaciones')),
+                ('client_uuid', models.UUIDField(blank=True, editable=False, null=True, unique=True, verbose_name='UUID del Cliente')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+            ],
+            options={
+                'verbose_name': 'Marcación (Histórico)',
+                'verbose_name_plural': 'Marcaciones (Histórico)',
+                'db_table': 'attendance_historico',
+                'ordering': ['-fecha_hora'],
+                'abstract': False,
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('fecha_hora', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha y Hora')),
+                ('tipo', models.CharField(choices=[('entrada', 'Entrada'), ('salida', 'Salida')], max_length=10, verbose_name='Tipo de Marcación')),
+                ('metodo', models.CharField(choices=[('qr_movil', 'QR desde Móvil'), ('manual_seguridad', 'Manual desde Seguridad'), ('web_admin', 'Web Admin')], default='qr_movil', max_length=20, verbose_name='Método de Marcación')),
+                ('latitud', models.DecimalField(blank=True, decimal_places=8, max_digits=10, null=True, verbose_name='Latitud')),
+                ('longitud', models.DecimalField(blank=True, decimal_places=8, max_digits=11, null=True, verbose_name='Longitud')),
+                ('dispositivo_info', models.CharField(blank=True, max_length=200, null=True, verbose_name='Info del Dispositivo')),
+                ('registrado_por', models.CharField(blank=True, max_length=100, null=True, verbose_name='Registrado por')),
+                ('observaciones', models.TextField(blank=True, null=True, verbose_name='Observaciones')),
+                ('client_uuid', models.UUIDField(blank=True, editable=False, null=True, unique=True, verbose_name='UUID del Cliente')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Creación')),
+                ('id', models.BigIntegerField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('empleado', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='employees.employee', verbose_name='Empleado')),
+            ],
+            options={
+                'verbose_name': 'Marcación Archivada',
+                'verbose_name_plural': 'Marcaciones Archivadas',
+                'ordering': ['-fecha_hora'],
+                'abstract': False,
+                'indexes': [models.Index(fields=['empleado', 'fecha_hora'], name='archive_empleado_fecha_idx'), models.Index(fields=['fecha_hora'], name='archive_fecha_hora_idx')],
+            },
+        ),
+        migrations.RunSQL(CREAR_VISTA, ELIMINAR_VISTA),
+    ]
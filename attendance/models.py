@@ -3,7 +3,8 @@ from employees.models import Employee
 from datetime import datetime
 from django.utils import timezone
 
-class Attendance(models.Model):
+class MarcacionBase(models.Model):
+    """Campos comunes de las marcaciones vigentes, archivadas e históricas"""
     TIPO_MARCACION = [
         ('entrada', 'Entrada'),
         ('salida', 'Salida'),
@@ -78,14 +79,22 @@ class Attendance(models.Model):
         verbose_name='Observaciones'
     )
     
+    # Identificador generado por el dispositivo (idempotencia de la carga por lotes)
+    client_uuid = models.UUIDField(
+        unique=True,
+        null=True,
+        blank=True,
+        editable=False,
+        verbose_name='UUID del Cliente'
+    )
+    
     created = models.DateTimeField(
         auto_now_add=True,
         verbose_name='Fecha de Creación'
     )
     
     class Meta:
-        verbose_name = 'Marcación de Asistencia'
-        verbose_name_plural = 'Marcaciones de Asistencia'
+        abstract = True
         ordering = ['-fecha_hora']
     
     def __str__(self):
@@ -102,6 +111,61 @@ class Attendance(models.Model):
         return self.fecha_hora.time()
 
 
+class Attendance(MarcacionBase):
+    """Marcaciones vigentes (las antiguas se mueven a AttendanceArchive)"""
+    
+    class Meta(MarcacionBase.Meta):
+        verbose_name = 'Marcación de Asistencia'
+        verbose_name_plural = 'Marcaciones de Asistencia'
+        indexes = [
+            models.Index(fields=['empleado', 'fecha_hora'], name='attendance_empleado_fecha_idx'),
+            models.Index(fields=['fecha_hora'], name='attendance_fecha_hora_idx'),
+            models.Index(fields=['tipo', 'fecha_hora'], name='attendance_tipo_fecha_idx'),
+        ]
+
+
+class AttendanceArchive(MarcacionBase):
+    """Marcaciones antiguas movidas por el comando archivar_asistencias (conservan su id)"""
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name='ID'
+    )
+    
+    class Meta(MarcacionBase.Meta):
+        verbose_name = 'Marcación Archivada'
+        verbose_name_plural = 'Marcaciones Archivadas'
+        indexes = [
+            models.Index(fields=['empleado', 'fecha_hora'], name='archive_empleado_fecha_idx'),
+            models.Index(fields=['fecha_hora'], name='archive_fecha_hora_idx'),
+        ]
+
+
+class AttendanceHistorico(MarcacionBase):
+    """
+    Vista de solo lectura (UNION ALL) de las marcaciones vigentes y archivadas,
+    para las consultas cuyo rango de fechas alcanza el archivo.
+    """
+    id = models.BigIntegerField(
+        primary_key=True,
+        verbose_name='ID'
+    )
+    
+    # Sin restricción ni borrado en cascada: la vista no admite escrituras
+    empleado = models.ForeignKey(
+        Employee,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+',
+        verbose_name='Empleado'
+    )
+    
+    class Meta(MarcacionBase.Meta):
+        managed = False
+        db_table = 'attendance_historico'
+        verbose_name = 'Marcación (Histórico)'
+        verbose_name_plural = 'Marcaciones (Histórico)'
+
+
 class QRCode(models.Model):
     """Modelo para gestionar códigos QR de las empresas/ubicaciones"""
     empresa = models.ForeignKey(
@@ -140,6 +204,106 @@ class QRCode(models.Model):
         verbose_name = 'Código QR'
         verbose_name_plural = 'Códigos QR'
         ordering = ['empresa', 'nombre']
+        indexes = [
+            models.Index(fields=['empresa', 'activo'], name='qrcode_empresa_activo_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.empresa.razon_social} - {self.nombre}"
+
+class AttendanceState(models.Model):
+    """Estado materializado de marcación por empleado (última marcación y turno abierto)"""
+    empleado = models.OneToOneField(
+        Employee,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='estado_marcacion',
+        verbose_name='Empleado'
+    )
+    
+    ultimo_tipo = models.CharField(
+        max_length=10,
+        choices=Attendance.TIPO_MARCACION,
+        verbose_name='Último Tipo de Marcación'
+    )
+    
+    ultima_fecha_hora = models.DateTimeField(
+        verbose_name='Última Fecha y Hora'
+    )
+    
+    inicio_turno = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Inicio del Turno Abierto'
+    )
+    
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Fecha de Actualización'
+    )
+    
+    class Meta:
+        verbose_name = 'Estado de Marcación'
+        verbose_name_plural = 'Estados de Marcación'
+    
+    def __str__(self):
+        return f"{self.empleado_id} - {self.get_ultimo_tipo_display()} - {self.ultima_fecha_hora.strftime('%d/%m/%Y %H:%M')}"
+
+
+class AttendanceDailyRollup(models.Model):
+    """Conteos diarios pre-agregados de marcaciones por empleado y método"""
+    empresa = models.ForeignKey(
+        'companies.Company',
+        on_delete=models.CASCADE,
+        verbose_name='Empresa'
+    )
+    
+    empleado = models.ForeignKey(
+        Employee,
+        on_delete=models.CASCADE,
+        verbose_name='Empleado'
+    )
+    
+    fecha = models.DateField(
+        verbose_name='Fecha'
+    )
+    
+    metodo = models.CharField(
+        max_length=20,
+        choices=Attendance.METODO_MARCACION,
+        verbose_name='Método de Marcación'
+    )
+    
+    entradas = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Entradas'
+    )
+    
+    salidas = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Salidas'
+    )
+    
+    class Meta:
+        verbose_name = 'Resumen Diario de Asistencia'
+        verbose_name_plural = 'Resúmenes Diarios de Asistencia'
+        ordering = ['-fecha']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['empresa', 'empleado', 'fecha', 'metodo'],
+                name='attendance_rollup_unique'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['empresa', 'fecha'], name='attendance_rollup_emp_fecha'),
+            models.Index(fields=['empleado', 'fecha'], name='attendance_rollup_empl_fecha'),
+            models.Index(fields=['fecha'], name='attendance_rollup_fecha_idx'),
+        ]
     
     def __str__(self):
-        return f"{self.empresa.razon_social} - {self.nombre}"
\ No newline at end of file
+        return f"{self.empleado_id} - {self.fecha} - {self.metodo}"
+    
+    @property
+    def total(self):
+        """Total de marcaciones del día"""
+        return self.entradas + self.salidas
@@ -0,0 +1,118 @@
+"""
+Paginación por cursor (keyset) para las marcaciones.
+
+A diferencia de PageNumberPagination no ejecuta COUNT(*) ni usa OFFSET: cada
+página filtra por la última clave (fecha_hora, id) vista, de modo que una
+página profunda cuesta lo mismo que la primera. Es opcional y se activa con
+``?paginacion=cursor`` para no romper a los clientes existentes.
+"""
+import base64
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """Paginación por (fecha_hora, id), descendente por defecto"""
+    cursor_query_param = 'cursor'
+    page_size = api_settings.PAGE_SIZE or 20
+    page_size_query_param = 'page_size'
+    max_page_size = 500
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ascendente = request.query_params.get('ordering') == 'fecha_hora'
+
+        if self.ascendente:
+            queryset = queryset.order_by('fecha_hora', 'id')
+        else:
+            queryset = queryset.order_by('-fecha_hora', '-id')
+
+        cursor = self.decode_cursor(request)
+        if cursor:
+            fecha_hora, pk = cursor
+            if self.ascendente:
+                queryset = queryset.filter(Q(fecha_hora__gt=fecha_hora) | Q(fecha_hora=fecha_hora, id__gt=pk))
+            else:
+                queryset = queryset.filter(Q(fecha_hora__lt=fecha_hora) | Q(fecha_hora=fecha_hora, id__lt=pk))
+
+        # Se pide un registro extra para saber si existe una página siguiente
+        resultados = list(queryset[:self.page_size + 1])
+        self.siguiente = None
+        if len(resultados) > self.page_size:
+            resultados = resultados[:self.page_size]
+            ultimo = resultados[-1]
+            self.siguiente = (ultimo.fecha_hora, ultimo.pk)
+        return resultados
+
+    def get_page_size(self, request):
+        try:
+            solicitado = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(solicitado, self.max_page_size))
+
+    def decode_cursor(self, request):
+        valor = request.query_params.get(self.cursor_query_param)
+        if not valor:
+            return None
+        try:
+            texto = base64.urlsafe_b64decode(valor.encode('ascii')).decode('ascii')
+            fecha_texto, pk = texto.rsplit('|', 1)
+            fecha_hora = parse_datetime(fecha_texto)
+            pk = int(pk)
+        except (TypeError, ValueError, UnicodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if fecha_hora is None:
+            raise NotFound(self.invalid_cursor_message)
+        return fecha_hora, pk
+
+    def encode_cursor(self, fecha_hora, pk):
+        texto = f'{fecha_hora.isoformat()}|{pk}'
+        return base64.urlsafe_b64encode(texto.encode('ascii')).decode('ascii')
+
+    def get_next_link(self):
+        if self.siguiente is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(*self.siguiente))
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+
+class PaginacionCursorOpcionalMixin:
+    """Usa KeysetPagination cuando la petición incluye ?paginacion=cursor"""
+    paginacion_query_param = 'paginacion'
+
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator'):
+            if self.request is not None and \
+                    self.request.query_params.get(self.paginacion_query_param) == 'cursor':
+                self._paginator = KeysetPagination()
+            elif self.pagination_class is None:
+                self._paginator = None
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
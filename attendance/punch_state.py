@@ -0,0 +1,47 @@
+"""
+Mantenimiento del estado materializado de marcación (AttendanceState).
+
+Cada escritura sobre Attendance actualiza el estado del empleado: una
+marcación nueva y posterior a la última conocida se aplica con un UPDATE
+condicional; ediciones, eliminaciones y marcaciones retroactivas recalculan
+el estado a partir de la marcación más reciente del empleado.
+"""
+from .models import Attendance, AttendanceState
+
+
+def _valores_estado(tipo, fecha_hora):
+    return {
+        'ultimo_tipo': tipo,
+        'ultima_fecha_hora': fecha_hora,
+        'inicio_turno': fecha_hora if tipo == 'entrada' else None,
+    }
+
+
+def recalcular_estado(empleado_id):
+    """Recalcula el estado del empleado desde su última marcación"""
+    ultima = Attendance.objects.filter(
+        empleado_id=empleado_id
+    ).order_by('-fecha_hora', '-id').values('tipo', 'fecha_hora').first()
+
+    if ultima is None:
+        AttendanceState.objects.filter(empleado_id=empleado_id).delete()
+        return None
+
+    estado, _ = AttendanceState.objects.update_or_create(
+        empleado_id=empleado_id,
+        defaults=_valores_estado(ultima['tipo'], ultima['fecha_hora'])
+    )
+    return estado
+
+
+def registrar_en_estado(asistencia):
+    """Aplica una marcación recién insertada al estado del empleado"""
+    actualizados = AttendanceState.objects.filter(
+        empleado_id=asistencia.empleado_id,
+        ultima_fecha_hora__lte=asistencia.fecha_hora
+    ).update(**_valores_estado(asistencia.tipo, asistencia.fecha_hora))
+
+    # Sin estado previo o marcación retroactiva: recalcular
+    if not actualizados:
+        recalcular_estado(asistencia.empleado_id)
+
@@ -0,0 +1,146 @@
+"""
+Registro en memoria de códigos QR.
+
+Mantiene por proceso el mapeo codigo_qr -> (id, empresa_id, activo) para que
+validar un escaneo no requiera consultas a la base de datos. Las entradas se
+invalidan por señales al guardar o eliminar un QRCode (vistas, admin o shell)
+y expiran tras un TTL como red de seguridad.
+
+Opcionalmente puede compartirse entre procesos configurando un alias de caché
+en ``ATTENDANCE_QR_REGISTRY_CACHE``; en ese caso las invalidaciones incrementan
+una versión compartida que descarta las copias locales de los demás procesos.
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .models import QRCode
+
+# Marcador para códigos inexistentes (evita consultar la BD con códigos basura)
+NO_EXISTE = object()
+
+PREFIJO_CACHE = 'attendance:qr:'
+CLAVE_VERSION = 'attendance:qr:version'
+
+
+class QRRegistry:
+    """Registro de códigos QR con invalidación explícita y TTL"""
+
+    def __init__(self):
+        self._entradas = {}
+        self._version = None
+        self._lock = threading.Lock()
+
+    @property
+    def ttl(self):
+        return getattr(settings, 'ATTENDANCE_QR_REGISTRY_TTL', 300)
+
+    @property
+    def cache(self):
+        alias = getattr(settings, 'ATTENDANCE_QR_REGISTRY_CACHE', None)
+        return caches[alias] if alias else None
+
+    def obtener(self, codigo_qr):
+        """Retorna (id, empresa_id, activo) del código QR o None si no existe"""
+        self._sincronizar_version()
+        ahora = time.monotonic()
+
+        entrada = self._entradas.get(codigo_qr)
+        if entrada is not None and entrada[1] > ahora:
+            valor = entrada[0]
+        else:
+            valor = self._cargar(codigo_qr)
+            with self._lock:
+                self._entradas[codigo_qr] = (valor, ahora + self.ttl)
+
+        return None if valor is NO_EXISTE else valor
+
+    def obtener_varios(self, codigos):
+        """
+        Retorna {codigo_qr: (id, empresa_id, activo) o None}, cargando los
+        códigos que no estén en el registro con una sola consulta.
+        """
+        self._sincronizar_version()
+        ahora = time.monotonic()
+
+        valores, faltantes = {}, []
+        for codigo in set(codigos):
+            entrada = self._entradas.get(codigo)
+            if entrada is not None and entrada[1] > ahora:
+                valores[codigo] = entrada[0]
+            else:
+                faltantes.append(codigo)
+
+        if faltantes:
+            cargados = self._cargar_varios(faltantes)
+            with self._lock:
+                for codigo, valor in cargados.items():
+                    self._entradas[codigo] = (valor, ahora + self.ttl)
+            valores.update(cargados)
+
+        return {codigo: None if valor is NO_EXISTE else valor for codigo, valor in valores.items()}
+
+    def invalidar(self, *codigos):
+        """Descarta las entradas de los códigos indicados"""
+        with self._lock:
+            for codigo in codigos:
+                self._entradas.pop(codigo, None)
+
+        cache = self.cache
+        if cache is not None:
+            cache.delete_many([PREFIJO_CACHE + codigo for codigo in codigos])
+            try:
+                self._version = cache.incr(CLAVE_VERSION)
+            except ValueError:
+                cache.set(CLAVE_VERSION, 1, None)
+                self._version = 1
+
+    def limpiar(self):
+        """Vacía el registro local"""
+        with self._lock:
+            self._entradas.clear()
+            self._version = None
+
+    def _cargar(self, codigo_qr):
+        return self._cargar_varios([codigo_qr])[codigo_qr]
+
+    def _cargar_varios(self, codigos):
+        cache = self.cache
+        valores = {}
+        if cache is not None:
+            for clave, valor in cache.get_many([PREFIJO_CACHE + codigo for codigo in codigos]).items():
+                valores[clave[len(PREFIJO_CACHE):]] = tuple(valor) if valor else NO_EXISTE
+
+        faltantes = [codigo for codigo in codigos if codigo not in valores]
+        if faltantes:
+            filas = {
+                fila[0]: fila[1:]
+                for fila in QRCode.objects.filter(codigo_qr__in=faltantes).order_by().values_list(
+                    'codigo_qr', 'id', 'empresa_id', 'activo'
+                )
+            }
+            for codigo in faltantes:
+                valores[codigo] = filas.get(codigo, NO_EXISTE)
+
+            if cache is not None:
+                # Lista vacía como marcador de inexistencia en la caché compartida
+                cache.set_many({
+                    PREFIJO_CACHE + codigo: list(filas[codigo]) if codigo in filas else []
+                    for codigo in faltantes
+                }, self.ttl)
+        return valores
+
+    def _sincronizar_version(self):
+        cache = self.cache
+        if cache is None:
+            return
+        version = cache.get(CLAVE_VERSION)
+        if version != self._version:
+            with self._lock:
+                self._entradas.clear()
+                self._version = version
+
+
+registro_qr = QRRegistry()
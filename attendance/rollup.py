@@ -0,0 +1,146 @@
+"""
+Mantenimiento incremental de AttendanceDailyRollup.
+
+Cada marcación aporta +1 (o -1 al eliminarse) a la fila
+(empresa, empleado, fecha local, método) en la columna de su tipo. Las
+ediciones restan los valores anteriores y suman los nuevos. La operación se
+expresa sobre lotes para que la ingesta masiva pueda reutilizarla.
+"""
+from collections import Counter
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from employees.models import Employee
+from .models import Attendance, AttendanceDailyRollup, AttendanceHistorico
+
+
+def clave_rollup(empresa_id, empleado_id, fecha_hora, metodo):
+    """Clave de la fila de rollup para una marcación"""
+    return (empresa_id, empleado_id, timezone.localtime(fecha_hora).date(), metodo)
+
+
+def empresa_de(asistencia):
+    """Empresa del empleado de la marcación, sin consulta si ya está cargada"""
+    return empresas_de([asistencia]).get(asistencia.empleado_id)
+
+
+def empresas_de(asistencias):
+    """{empleado_id: empresa_id} de un lote, con una consulta para los empleados no cargados"""
+    campo = Attendance._meta.get_field('empleado')
+    empresas = {}
+    for asistencia in asistencias:
+        empleado = campo.get_cached_value(asistencia, None)
+        if empleado is not None and empleado.empresa_id:
+            empresas[asistencia.empleado_id] = empleado.empresa_id
+    faltantes = {asistencia.empleado_id for asistencia in asistencias} - empresas.keys()
+    if faltantes:
+        empresas.update(Employee.objects.filter(pk__in=faltantes).values_list('pk', 'empresa_id'))
+    return empresas
+
+
+def aplicar_deltas(deltas):
+    """
+    Aplica variaciones {clave: Counter({'entradas': n, 'salidas': m})} a las filas
+    de rollup, creando las que falten.
+    """
+    for (empresa_id, empleado_id, fecha, metodo), conteo in deltas.items():
+        if not any(conteo.values()):
+            continue
+        filtro = {
+            'empresa_id': empresa_id,
+            'empleado_id': empleado_id,
+            'fecha': fecha,
+            'metodo': metodo,
+        }
+        cambios = {campo: F(campo) + n for campo, n in conteo.items() if n}
+        if AttendanceDailyRollup.objects.filter(**filtro).update(**cambios):
+            continue
+        if all(n <= 0 for n in conteo.values()):
+            # Nada que restar (p. ej. la fila ya se eliminó en cascada)
+            continue
+        try:
+            with transaction.atomic():
+                AttendanceDailyRollup.objects.create(
+                    **filtro,
+                    entradas=max(conteo.get('entradas', 0), 0),
+                    salidas=max(conteo.get('salidas', 0), 0)
+                )
+        except IntegrityError:
+            # Otra escritura creó la fila en paralelo
+            AttendanceDailyRollup.objects.filter(**filtro).update(**cambios)
+
+
+def acumular(deltas, empresa_id, empleado_id, fecha_hora, metodo, tipo, signo=1):
+    """Suma una marcación (signo=1) o la resta (signo=-1) al acumulador de deltas"""
+    campo = 'entradas' if tipo == 'entrada' else 'salidas'
+    clave = clave_rollup(empresa_id, empleado_id, fecha_hora, metodo)
+    deltas.setdefault(clave, Counter())[campo] += signo
+
+
+def registrar_en_rollup(asistencias, signo=1):
+    """Suma (o resta) un lote de marcaciones al rollup"""
+    deltas = {}
+    empresas = empresas_de(asistencias)
+    for asistencia in asistencias:
+        acumular(
+            deltas, empresas.get(asistencia.empleado_id), asistencia.empleado_id,
+            asistencia.fecha_hora, asistencia.metodo, asistencia.tipo, signo
+        )
+    aplicar_deltas(deltas)
+
+
+def actualizar_en_rollup(anterior, asistencia):
+    """
+    Refleja la edición de una marcación: resta sus valores anteriores
+    (dict con empleado_id, empleado__empresa_id, fecha_hora, metodo y tipo)
+    y suma los actuales.
+    """
+    deltas = {}
+    acumular(
+        deltas, anterior['empleado__empresa_id'], anterior['empleado_id'],
+        anterior['fecha_hora'], anterior['metodo'], anterior['tipo'], -1
+    )
+    acumular(
+        deltas, empresa_de(asistencia), asistencia.empleado_id,
+        asistencia.fecha_hora, asistencia.metodo, asistencia.tipo
+    )
+    aplicar_deltas(deltas)
+
+
+def reconstruir_rollup(empresa_id=None):
+    """
+    Recalcula el rollup (completo o para una empresa) desde la vista
+    AttendanceHistorico, que incluye las marcaciones archivadas.
+    """
+    queryset = AttendanceHistorico.objects.all()
+    if empresa_id:
+        queryset = queryset.filter(empleado__empresa_id=empresa_id)
+
+    filas = queryset.order_by().annotate(
+        fecha=TruncDate('fecha_hora')
+    ).values(
+        'empleado__empresa_id', 'empleado_id', 'fecha', 'metodo'
+    ).annotate(
+        n_entradas=Count('id', filter=Q(tipo='entrada')),
+        n_salidas=Count('id', filter=Q(tipo='salida')),
+    )
+
+    with transaction.atomic():
+        existentes = AttendanceDailyRollup.objects.all()
+        if empresa_id:
+            existentes = existentes.filter(empresa_id=empresa_id)
+        existentes.delete()
+        AttendanceDailyRollup.objects.bulk_create((
+            AttendanceDailyRollup(
+                empresa_id=fila['empleado__empresa_id'],
+                empleado_id=fila['empleado_id'],
+                fecha=fila['fecha'],
+                metodo=fila['metodo'],
+                entradas=fila['n_entradas'],
+                salidas=fila['n_salidas'],
+            )
+            for fila in filas.iterator(chunk_size=5000)
+        ), batch_size=1000)
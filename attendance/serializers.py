@@ -1,7 +1,13 @@
 from rest_framework import serializers
+from drf_spectacular.utils import extend_schema_field
+from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, timedelta
 from .models import Attendance, QRCode
+from .checkin import MarcacionError, validar_marcacion, registrar_marcacion
+from .estadisticas import SECCIONES
+from .ingestion import DUPLICADA, LIMITE_LOTE, RECHAZADA, REGISTRADA
+from .write_behind import encolar_marcacion, habilitada as cola_habilitada, ultima_pendiente
 from employees.models import Employee
 from companies.models import Company
 
@@ -84,18 +90,8 @@ class MarcarAsistenciaSerializer(serializers.Serializer):
         allow_blank=True
     )
     
-    def validate_codigo_qr(self, value):
-        """Validar que el código QR existe y está activo"""
-        try:
-            qr_code = QRCode.objects.get(codigo_qr=value, activo=True)
-            return value
-        except QRCode.DoesNotExist:
-            raise serializers.ValidationError(
-                "Código QR inválido o inactivo"
-            )
-    
     def validate(self, attrs):
-        """Validaciones adicionales"""
+        """Validaciones adicionales (QR, empleado, tipo y duplicados en una consulta)"""
         # Obtener el empleado del contexto (usuario autenticado)
         request = self.context.get('request')
         if not request or not request.user.is_authenticated:
@@ -103,53 +99,85 @@ class MarcarAsistenciaSerializer(serializers.Serializer):
                 "Usuario no autenticado"
             )
         
+        empleado_id = getattr(request.user, 'empleado_id', None)
         try:
-            empleado = Employee.objects.get(user=request.user)
-        except Employee.DoesNotExist:
-            raise serializers.ValidationError(
-                "No se encontró el empleado asociado al usuario"
+            marcacion = validar_marcacion(
+                empleado_id,
+                attrs['codigo_qr'],
+                pendiente=ultima_pendiente(empleado_id)
             )
+        except MarcacionError as error:
+            if error.campo:
+                raise serializers.ValidationError({error.campo: [error.mensaje]})
+            raise serializers.ValidationError(error.mensaje)
         
-        # Validar que el empleado pertenece a la empresa del QR
-        qr_code = QRCode.objects.get(codigo_qr=attrs['codigo_qr'])
-        if empleado.empresa != qr_code.empresa:
-            raise serializers.ValidationError(
-                "No tienes permisos para marcar en esta ubicación"
-            )
-        
-        # Determinar tipo de marcación (entrada/salida)
-        hoy = timezone.now().date()
-        ultima_marcacion = Attendance.objects.filter(
-            empleado=empleado,
-            fecha_hora__date=hoy
-        ).order_by('-fecha_hora').first()
-        
-        if not ultima_marcacion or ultima_marcacion.tipo == 'salida':
-            tipo_marcacion = 'entrada'
-        else:
-            tipo_marcacion = 'salida'
-        
-        # Validar que no haya marcaciones muy recientes (evitar duplicados)
-        hace_5_minutos = timezone.now() - timedelta(minutes=5)
-        marcacion_reciente = Attendance.objects.filter(
-            empleado=empleado,
-            fecha_hora__gte=hace_5_minutos
-        ).exists()
-        
-        if marcacion_reciente:
-            raise serializers.ValidationError(
-                "Ya has marcado recientemente. Espera al menos 5 minutos."
-            )
-        
-        attrs['empleado'] = empleado
-        attrs['tipo'] = tipo_marcacion
-        attrs['metodo'] = 'qr_movil'
-        
+        attrs.update(marcacion)
         return attrs
     
     def create(self, validated_data):
-        """Crear la marcación de asistencia"""
-        return Attendance.objects.create(**validated_data)
+        """Crear la marcación de asistencia (o encolarla en modo write-behind)"""
+        if cola_habilitada():
+            return encolar_marcacion(**validated_data)
+        return registrar_marcacion(**validated_data)
+
+
+class MarcacionLoteItemSerializer(serializers.Serializer):
+    """Marcación registrada sin conexión dentro de un lote"""
+    client_uuid = serializers.UUIDField()
+    codigo_qr = serializers.CharField(max_length=100)
+    fecha_hora = serializers.DateTimeField()
+    tipo = serializers.ChoiceField(choices=Attendance.TIPO_MARCACION, required=False)
+    empleado_id = serializers.IntegerField(required=False)
+    latitud = serializers.DecimalField(
+        max_digits=10, 
+        decimal_places=8, 
+        required=False, 
+        allow_null=True
+    )
+    longitud = serializers.DecimalField(
+        max_digits=11, 
+        decimal_places=8, 
+        required=False, 
+        allow_null=True
+    )
+    dispositivo_info = serializers.CharField(
+        max_length=200, 
+        required=False, 
+        allow_blank=True
+    )
+    observaciones = serializers.CharField(required=False, allow_blank=True)
+
+
+@extend_schema_field(MarcacionLoteItemSerializer(many=True))
+class MarcacionesLoteField(serializers.ListField):
+    """Marcaciones sin validar: la vista valida cada una con MarcacionLoteItemSerializer"""
+
+
+class MarcarAsistenciaLoteSerializer(serializers.Serializer):
+    """Lote de marcaciones (cada una se valida por separado)"""
+    marcaciones = MarcacionesLoteField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        max_length=LIMITE_LOTE
+    )
+
+
+class ResultadoMarcacionLoteSerializer(serializers.Serializer):
+    """Resultado de una marcación del lote"""
+    client_uuid = serializers.UUIDField()
+    estado = serializers.ChoiceField(choices=[REGISTRADA, DUPLICADA, RECHAZADA])
+    id = serializers.IntegerField(required=False)
+    tipo = serializers.ChoiceField(choices=Attendance.TIPO_MARCACION, required=False)
+    fecha_hora = serializers.DateTimeField(required=False)
+    error = serializers.JSONField(required=False, help_text="Mensaje o errores por campo si fue rechazada")
+
+
+class MarcarAsistenciaLoteRespuestaSerializer(serializers.Serializer):
+    """Respuesta del registro de un lote de marcaciones"""
+    registradas = serializers.IntegerField()
+    duplicadas = serializers.IntegerField()
+    rechazadas = serializers.IntegerField()
+    resultados = ResultadoMarcacionLoteSerializer(many=True)
 
 
 class MisAsistenciasSerializer(serializers.ModelSerializer):
@@ -174,6 +202,20 @@ class EstadisticasAsistenciaSerializer(serializers.Serializer):
     fecha_inicio = serializers.DateField(required=False)
     fecha_fin = serializers.DateField(required=False)
     empresa_id = serializers.IntegerField(required=False)
+    secciones = serializers.CharField(
+        required=False,
+        help_text="Secciones separadas por coma: " + ", ".join(SECCIONES)
+    )
+    
+    def validate_secciones(self, value):
+        """Validar y normalizar la lista de secciones solicitadas"""
+        secciones = [seccion.strip() for seccion in value.split(',') if seccion.strip()]
+        invalidas = [seccion for seccion in secciones if seccion not in SECCIONES]
+        if invalidas:
+            raise serializers.ValidationError(
+                f"Secciones inválidas: {', '.join(invalidas)}. Opciones: {', '.join(SECCIONES)}"
+            )
+        return secciones or list(SECCIONES)
     
     def validate(self, attrs):
         """Validar fechas"""
@@ -186,4 +228,49 @@ class EstadisticasAsistenciaSerializer(serializers.Serializer):
                     "La fecha de inicio no puede ser mayor a la fecha fin"
                 )
         
-        return attrs
\ No newline at end of file
+        return attrs
+
+
+class HorasTrabajadasSerializer(serializers.Serializer):
+    """Parámetros para el cálculo masivo de horas trabajadas"""
+    empresa_id = serializers.IntegerField()
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+    desde_empleado = serializers.IntegerField(
+        required=False,
+        help_text="Cursor: id del último empleado de la página anterior"
+    )
+    page_size = serializers.IntegerField(required=False, min_value=1, max_value=500)
+    
+    def validate(self, attrs):
+        """Validar fechas"""
+        if attrs['fecha_inicio'] > attrs['fecha_fin']:
+            raise serializers.ValidationError(
+                "La fecha de inicio no puede ser mayor a la fecha fin"
+            )
+        max_dias = getattr(settings, 'ATTENDANCE_HOURS_MAX_DAYS', 93)
+        if (attrs['fecha_fin'] - attrs['fecha_inicio']).days + 1 > max_dias:
+            raise serializers.ValidationError(
+                f"El rango no puede superar {max_dias} días"
+            )
+        return attrs
+
+
+class HorasEmpleadoSerializer(serializers.Serializer):
+    """Horas de un empleado: por día (fecha ISO -> horas) y total"""
+    empleado_id = serializers.IntegerField()
+    dias = serializers.DictField(child=serializers.FloatField())
+    total_horas = serializers.FloatField()
+
+
+class PeriodoSerializer(serializers.Serializer):
+    fecha_inicio = serializers.DateField()
+    fecha_fin = serializers.DateField()
+
+
+class HorasTrabajadasRespuestaSerializer(serializers.Serializer):
+    """Página de horas trabajadas por empleado"""
+    empresa_id = serializers.IntegerField()
+    periodo = PeriodoSerializer()
+    next = serializers.URLField(allow_null=True)
+    empleados = HorasEmpleadoSerializer(many=True)
@@ -0,0 +1,101 @@
+from django.db import transaction
+from django.db.models import QuerySet
+from django.db.models.signals import pre_delete, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Attendance, QRCode
+from .qr_registry import registro_qr
+from .punch_state import recalcular_estado, registrar_en_estado
+from .rollup import actualizar_en_rollup, registrar_en_rollup
+
+
+def _invalidar(*codigos):
+    # Se invalida de inmediato y otra vez al confirmar la transacción, para que
+    # ningún proceso vuelva a cargar el valor anterior antes del commit
+    registro_qr.invalidar(*codigos)
+    transaction.on_commit(lambda: registro_qr.invalidar(*codigos))
+
+
+@receiver(pre_save, sender=QRCode)
+def recordar_codigo_qr_anterior(sender, instance, **kwargs):
+    """Guarda el código previo para invalidarlo si cambia"""
+    instance._codigo_qr_anterior = None
+    if instance.pk:
+        instance._codigo_qr_anterior = QRCode.objects.filter(
+            pk=instance.pk
+        ).values_list('codigo_qr', flat=True).first()
+
+
+@receiver(post_save, sender=QRCode)
+def invalidar_qr_guardado(sender, instance, **kwargs):
+    """Invalida el registro de QR al crear o editar un código"""
+    codigos = {instance.codigo_qr}
+    if getattr(instance, '_codigo_qr_anterior', None):
+        codigos.add(instance._codigo_qr_anterior)
+    _invalidar(*codigos)
+
+
+@receiver(post_delete, sender=QRCode)
+def invalidar_qr_eliminado(sender, instance, **kwargs):
+    """Invalida el registro de QR al eliminar un código"""
+    _invalidar(instance.codigo_qr)
+
+
+@receiver(pre_save, sender=Attendance)
+def recordar_marcacion_anterior(sender, instance, **kwargs):
+    """Guarda los valores previos para actualizar el estado y el resumen diario"""
+    instance._marcacion_anterior = None
+    if instance.pk:
+        instance._marcacion_anterior = Attendance.objects.filter(pk=instance.pk).values(
+            'empleado_id', 'empleado__empresa_id', 'fecha_hora', 'metodo', 'tipo'
+        ).first()
+
+
+@receiver(post_save, sender=Attendance)
+def actualizar_derivados_guardado(sender, instance, created, **kwargs):
+    """Mantiene el estado de marcación y el resumen diario al crear o editar"""
+    anterior = getattr(instance, '_marcacion_anterior', None)
+    if created or anterior is None:
+        registrar_en_estado(instance)
+        registrar_en_rollup([instance])
+        return
+
+    recalcular_estado(instance.empleado_id)
+    if anterior['empleado_id'] != instance.empleado_id:
+        recalcular_estado(anterior['empleado_id'])
+    actualizar_en_rollup(anterior, instance)
+
+
+def _borrado_directo(origin):
+    """
+    True si el borrado se pidió sobre marcaciones (instancia o queryset). En
+    los borrados en cascada desde Employee o Company, AttendanceState y el
+    rollup se eliminan junto con el empleado y no hay nada que actualizar.
+    """
+    if isinstance(origin, QuerySet):
+        return origin.model is Attendance
+    return origin is None or isinstance(origin, Attendance)
+
+
+@receiver(pre_delete, sender=Attendance)
+def recordar_marcacion_eliminada(sender, instance, origin=None, **kwargs):
+    """Reúne las marcaciones de un mismo borrado para procesarlas en lote"""
+    if origin is not None and _borrado_directo(origin):
+        vars(origin).setdefault('_marcaciones_eliminadas', []).append(instance)
+
+
+@receiver(post_delete, sender=Attendance)
+def actualizar_derivados_eliminado(sender, instance, origin=None, **kwargs):
+    """
+    Recalcula el estado y descuenta las marcaciones del resumen diario al
+    eliminar. El Collector envía post_delete cuando ya borró todas las filas,
+    así que la primera señal de cada borrado procesa el lote completo.
+    """
+    if not _borrado_directo(origin):
+        return
+    eliminadas = [instance] if origin is None else vars(origin).pop('_marcaciones_eliminadas', None)
+    if not eliminadas:
+        return
+    for empleado_id in {asistencia.empleado_id for asistencia in eliminadas}:
+        recalcular_estado(empleado_id)
+    registrar_en_rollup(eliminadas, signo=-1)
@@ -1,3 +1,612 @@
-from django.test import TestCase
+import csv
+import datetime
+import io
+import json
+import os
+import tempfile
+import uuid
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.checks import Tags, run_checks
+from django.db import IntegrityError, connection, connections
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from asistent_app.routers import ReplicaRouter
+from asistent_app.testing import EmpresaTestCase, crear_empleado, crear_empresa
+from users.models import CustomUser
+from .archive import CLAVE_FRONTERA, archivar, corte_archivo, modelo_para_rango
+from .checkin import determinar_tipo
+from .estadisticas import calcular_estadisticas, obtener_fuente
+from .export import EXPORTADORES, exportar_csv
+from .idempotency import CABECERA_REPETIDA, EN_CURSO, clave_cache
+from .ingestion import DUPLICADA, RECHAZADA, ingerir_lote
+from .jornadas import emparejar, horas_por_empleado
+from .models import Attendance, AttendanceDailyRollup, AttendanceHistorico, AttendanceState, QRCode
+from .qr_registry import registro_qr
+from .rollup import reconstruir_rollup
+from .write_behind import cola, drenar
+
+
+class MarcacionTestCase(EmpresaTestCase):
+    """Además, un QR activo de la empresa"""
+
+    def setUp(self):
+        registro_qr.limpiar()
+        super().setUp()
+        self.qr = QRCode.objects.create(empresa=self.empresa, nombre='Puerta', codigo_qr='QR-1', ubicacion='Entrada')
+
+    def marcar(self, codigo_qr='QR-1', **cabeceras):
+        return self.client.post('/api/v1/attendance/marcar/', {'codigo_qr': codigo_qr}, format='json', **cabeceras)
+
+
+class PresupuestoConsultasMarcacionTests(MarcacionTestCase):
+    """
+    Presupuesto de consultas de MarcarAsistenciaView con el estado del
+    empleado y el resumen del día ya creados: contexto del empleado, INSERT,
+    UPDATE del estado y UPDATE del resumen diario. El SAVEPOINT y su RELEASE
+    son la transacción de registrar_marcacion dentro del TestCase.
+    """
+
+    def setUp(self):
+        super().setUp()
+        Attendance.objects.create(
+            empleado=self.empleado, tipo='entrada', fecha_hora=timezone.now() - timedelta(minutes=10)
+        )
+        AttendanceDailyRollup.objects.get_or_create(
+            empresa=self.empresa, empleado=self.empleado, fecha=timezone.localdate(), metodo='qr_movil'
+        )
+
+    def test_qr_en_registro(self):
+        registro_qr.obtener('QR-1')
+        with self.assertNumQueries(6):
+            respuesta = self.marcar()
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(respuesta.json()['data']['tipo'], 'salida')
+
+    def test_qr_fuera_del_registro(self):
+        registro_qr.limpiar()
+        # Una consulta más para cargar el QR en el registro
+        with self.assertNumQueries(7):
+            respuesta = self.marcar()
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+
+    def test_rechazo_sin_escrituras(self):
+        registro_qr.obtener('QR-1')
+        self.marcar()
+        # Duplicada: solo la consulta de contexto
+        with self.assertNumQueries(1):
+            respuesta = self.marcar()
+        self.assertEqual(respuesta.status_code, 400)
+
+    def test_qr_inexistente_sin_consultas_repetidas(self):
+        self.marcar('NO-EXISTE')
+        with self.assertNumQueries(0):
+            respuesta = self.marcar('NO-EXISTE')
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class IdempotenciaMarcacionTests(MarcacionTestCase):
+    def setUp(self):
+        cache.clear()
+        super().setUp()
+
+    def test_reintento_recibe_la_respuesta_original(self):
+        original = self.marcar(HTTP_IDEMPOTENCY_KEY='clave-1')
+        self.assertEqual(original.status_code, 201, original.content)
+
+        repetida = self.marcar(HTTP_IDEMPOTENCY_KEY='clave-1')
+        self.assertEqual(repetida.status_code, 201)
+        self.assertEqual(repetida[CABECERA_REPETIDA], 'true')
+        self.assertEqual(repetida.json(), original.json())
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_misma_clave_con_otro_cuerpo(self):
+        self.marcar(HTTP_IDEMPOTENCY_KEY='clave-1')
+        respuesta = self.marcar('QR-OTRO', HTTP_IDEMPOTENCY_KEY='clave-1')
+        self.assertEqual(respuesta.status_code, 422, respuesta.content)
+
+    def test_peticion_original_en_curso(self):
+        with mock.patch('attendance.idempotency.huella', return_value='firma'):
+            cache.set(clave_cache(self.usuario.pk, 'clave-1'), {'estado': EN_CURSO, 'huella': 'firma'})
+            respuesta = self.marcar(HTTP_IDEMPOTENCY_KEY='clave-1')
+        self.assertEqual(respuesta.status_code, 409, respuesta.content)
+        self.assertFalse(Attendance.objects.exists())
+
+    def test_advertencia_con_cache_local(self):
+        ids = [aviso.id for aviso in run_checks(tags=[Tags.caches], include_deployment_checks=True)]
+        self.assertIn('attendance.W001', ids)
+        with override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache', 'LOCATION': 'cache_idempotencia',
+        }}):
+            ids = [aviso.id for aviso in run_checks(tags=[Tags.caches], include_deployment_checks=True)]
+        self.assertNotIn('attendance.W001', ids)
+
+
+class DeterminarTipoTests(TestCase):
+    def setUp(self):
+        self.inicio = timezone.make_aware(datetime.datetime(2026, 3, 2, 22, 0))
+
+    def test_turno_nocturno_cierra_despues_de_medianoche(self):
+        madrugada = self.inicio + timedelta(hours=8)
+        self.assertEqual(determinar_tipo('entrada', self.inicio, madrugada, self.inicio, 'turno_3'), 'salida')
+        self.assertEqual(determinar_tipo('entrada', self.inicio, madrugada, self.inicio, 'turno_4'), 'salida')
+
+    def test_turno_diurno_no_cruza_el_dia(self):
+        entrada = timezone.make_aware(datetime.datetime(2026, 3, 2, 18, 0))
+        self.assertEqual(determinar_tipo('entrada', entrada, entrada + timedelta(hours=5), entrada, 'turno_1'), 'salida')
+        # 01:00 del día siguiente: la salida no se marcó y empieza otra jornada
+        self.assertEqual(determinar_tipo('entrada', entrada, entrada + timedelta(hours=7), entrada, 'turno_1'), 'entrada')
+
+    def test_turno_abierto_vencido(self):
+        tarde = self.inicio + timedelta(hours=17)
+        self.assertEqual(determinar_tipo('entrada', self.inicio, tarde, self.inicio, 'turno_3'), 'entrada')
+
+    def test_sin_turno_abierto(self):
+        self.assertEqual(determinar_tipo(None, None), 'entrada')
+        self.assertEqual(determinar_tipo('salida', self.inicio, self.inicio + timedelta(hours=1)), 'entrada')
+
+
+class MarcacionTurnoNocturnoTests(MarcacionTestCase):
+    def test_salida_de_madrugada(self):
+        self.empleado.shift_type = 'turno_3'
+        self.empleado.save()
+        Attendance.objects.create(
+            empleado=self.empleado, tipo='entrada', fecha_hora=timezone.now() - timedelta(hours=8)
+        )
+        respuesta = self.marcar()
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+        self.assertEqual(respuesta.json()['data']['tipo'], 'salida')
+
+    def test_lote_cierra_turno_del_dia_anterior(self):
+        self.empleado.shift_type = 'turno_4'
+        self.empleado.save()
+        entrada = timezone.now() - timedelta(hours=8)
+        Attendance.objects.create(empleado=self.empleado, tipo='entrada', fecha_hora=entrada)
+        respuesta = self.client.post('/api/v1/attendance/marcar/lote/', {'marcaciones': [{
+            'client_uuid': '6f1c1c1e-52b1-4f43-9c55-0e0f4b4c7a01',
+            'codigo_qr': 'QR-1',
+            'fecha_hora': (entrada + timedelta(hours=7)).isoformat(),
+        }]}, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(respuesta.json()['resultados'][0]['tipo'], 'salida')
+
+
+class EmparejarTests(MarcacionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.entrada = timezone.make_aware(datetime.datetime(2026, 3, 2, 22, 0))
+        self.salida = self.entrada + timedelta(hours=8)
+
+    def test_turno_que_cruza_la_medianoche(self):
+        intervalos = emparejar([(self.entrada, 'entrada'), (self.salida, 'salida')], shift_type='turno_3')
+        self.assertEqual([(i.fecha, i.horas) for i in intervalos], [(datetime.date(2026, 3, 2), 8)])
+
+    def test_salida_nocturna_registrada_como_entrada(self):
+        marcaciones = [(self.entrada, 'entrada'), (self.salida, 'entrada')]
+        self.assertEqual([i.horas for i in emparejar(marcaciones, shift_type='turno_4')], [8])
+        # En turnos diurnos se mantienen como dos jornadas abiertas
+        self.assertEqual([i.horas for i in emparejar(marcaciones, shift_type='turno_1')], [0, 0])
+
+    def test_horas_por_empleado_turno_nocturno(self):
+        self.empleado.shift_type = 'turno_3'
+        self.empleado.save()
+        Attendance.objects.create(empleado=self.empleado, tipo='entrada', fecha_hora=self.entrada)
+        Attendance.objects.create(empleado=self.empleado, tipo='salida', fecha_hora=self.salida)
+        dia = datetime.date(2026, 3, 2)
+        self.assertEqual(list(horas_por_empleado(self.empresa.pk, dia, dia)), [(self.empleado.pk, {dia: 8})])
+
+
+class HorasTrabajadasViewTests(MarcacionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.dia = timezone.localdate() - timedelta(days=1)
+        entrada = timezone.make_aware(datetime.datetime.combine(self.dia, datetime.time(8, 0)))
+        self.empleados = [self.empleado] + [
+            self.crear_empleado(numero) for numero in (2, 3)
+        ]
+        for empleado in self.empleados:
+            Attendance.objects.create(empleado=empleado, tipo='entrada', fecha_hora=entrada)
+            Attendance.objects.create(empleado=empleado, tipo='salida', fecha_hora=entrada + timedelta(hours=8))
+
+    def consultar(self, **parametros):
+        parametros = {'empresa_id': self.empresa.pk, 'fecha_inicio': self.dia, 'fecha_fin': self.dia, **parametros}
+        return self.client.get('/api/v1/attendance/horas-trabajadas/', parametros)
+
+    def test_paginacion_por_empleado(self):
+        respuesta = self.consultar(page_size=2)
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        pagina = respuesta.json()
+        self.assertEqual([e['empleado_id'] for e in pagina['empleados']], [e.pk for e in self.empleados[:2]])
+        self.assertIn(f'desde_empleado={self.empleados[1].pk}', pagina['next'])
+
+        pagina = self.consultar(page_size=2, desde_empleado=self.empleados[1].pk).json()
+        self.assertEqual([e['empleado_id'] for e in pagina['empleados']], [self.empleados[2].pk])
+        self.assertEqual(pagina['empleados'][0]['total_horas'], 8)
+        self.assertIsNone(pagina['next'])
+
+    def test_rango_maximo(self):
+        with self.settings(ATTENDANCE_HOURS_MAX_DAYS=31):
+            respuesta = self.consultar(fecha_inicio=self.dia - timedelta(days=31))
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class OtraEmpresaTestCase(MarcacionTestCase):
+    """Además, otra empresa con un empleado y un QR propios"""
+
+    def setUp(self):
+        super().setUp()
+        self.otra, departamento, cargo = crear_empresa(2)
+        self.ajeno = crear_empleado(self.otra, departamento, cargo, 9)
+        QRCode.objects.create(empresa=self.otra, nombre='Puerta', codigo_qr='QR-OTRA', ubicacion='Entrada')
+
+
+class MarcacionLoteAlcanceTests(OtraEmpresaTestCase):
+    def enviar(self, usuario):
+        self.client.force_authenticate(usuario)
+        return self.client.post('/api/v1/attendance/marcar/lote/', {'marcaciones': [{
+            'client_uuid': '0b8e2f4e-7c1d-4a55-9a53-0f3c3c8e9b10',
+            'codigo_qr': 'QR-OTRA',
+            'empleado_id': self.ajeno.pk,
+            'fecha_hora': (timezone.now() - timedelta(hours=1)).isoformat(),
+        }]}, format='json')
+
+    def test_personal_de_otra_empresa(self):
+        self.usuario.is_staff = True
+        self.usuario.save()
+        resultado = self.enviar(self.usuario).json()['resultados'][0]
+        self.assertEqual(resultado['estado'], 'rechazada')
+        self.assertFalse(Attendance.objects.filter(empleado=self.ajeno).exists())
+
+    def test_superusuario(self):
+        raiz = CustomUser.objects.create_superuser(username='raiz', password='secreto123', email='r@acme.com')
+        self.assertEqual(self.enviar(raiz).json()['resultados'][0]['estado'], 'registrada')
+
+
+class ExportarAsistenciasTests(OtraEmpresaTestCase):
+    def setUp(self):
+        super().setUp()
+        inicio = timezone.now() - timedelta(days=1)
+        self.entradas = [
+            Attendance.objects.create(empleado=self.empleado, tipo='entrada', fecha_hora=inicio + timedelta(hours=hora))
+            for hora in (0, 2, 4)
+        ]
+        Attendance.objects.create(empleado=self.empleado, tipo='salida', fecha_hora=inicio + timedelta(hours=1))
+        Attendance.objects.create(empleado=self.ajeno, tipo='entrada', fecha_hora=inicio)
+
+    def exportar(self, **parametros):
+        """Bloques de texto de la respuesta (debe transmitirse en streaming)"""
+        respuesta = self.client.get('/api/v1/attendance/exportar/', parametros)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.streaming)
+        return [bloque.decode('utf-8') for bloque in respuesta.streaming_content]
+
+    def test_csv_por_bloques(self):
+        with mock.patch('attendance.export.FILAS_POR_BLOQUE', 2):
+            bloques = self.exportar(formato='csv', tipo='entrada')
+        # Encabezado y dos bloques de filas
+        self.assertEqual(len(bloques), 3)
+        filas = list(csv.DictReader(io.StringIO(''.join(bloques))))
+        self.assertEqual({int(fila['id']) for fila in filas}, {asistencia.pk for asistencia in self.entradas})
+
+    def test_ndjson_con_alcance_de_empresa(self):
+        filas = [json.loads(linea) for linea in ''.join(self.exportar(formato='ndjson')).splitlines()]
+        self.assertEqual(len(filas), 4)
+        self.assertEqual({fila['empresa_id'] for fila in filas}, {self.empresa.pk})
+
+    def test_filtro_de_otra_empresa(self):
+        bloques = self.exportar(formato='ndjson', empleado__empresa=self.otra.pk)
+        self.assertEqual(''.join(bloques), '')
+
+    def test_formato_invalido(self):
+        respuesta = self.client.get('/api/v1/attendance/exportar/', {'formato': 'xlsx'})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class QRAlcanceEmpresaTests(OtraEmpresaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.usuario.is_staff = True
+        self.usuario.save()
+
+    def test_crear_qr_de_otra_empresa(self):
+        respuesta = self.client.post('/api/v1/attendance/qr-codes/', {
+            'empresa': self.otra.pk, 'nombre': 'Ajena', 'codigo_qr': 'QR-AJENO', 'ubicacion': 'Patio',
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertFalse(QRCode.objects.filter(codigo_qr='QR-AJENO').exists())
+
+    def test_mover_qr_a_otra_empresa(self):
+        respuesta = self.client.patch(f'/api/v1/attendance/qr-codes/{self.qr.pk}/', {'empresa': self.otra.pk}, format='json')
+        self.assertEqual(respuesta.status_code, 403)
+        self.qr.refresh_from_db()
+        self.assertEqual(self.qr.empresa_id, self.empresa.pk)
+
+    def test_editar_qr_propio(self):
+        respuesta = self.client.patch(f'/api/v1/attendance/qr-codes/{self.qr.pk}/', {'nombre': 'Portón'}, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+
+
+class ColaEscrituraDiferidaTests(MarcacionTestCase):
+    def setUp(self):
+        super().setUp()
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        configuracion = self.settings(
+            ATTENDANCE_WRITE_BEHIND=True,
+            ATTENDANCE_WRITE_BEHIND_PATH=os.path.join(directorio.name, 'cola.sqlite3'),
+        )
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        self.addCleanup(lambda: cola.conexion.close())
+
+    def encolar(self, horas_atras, **datos):
+        cola.encolar(
+            uuid.uuid4(), self.empleado.pk, timezone.now() - timedelta(hours=horas_atras), 'entrada',
+            {'empresa_id': self.empresa.pk, 'metodo': 'qr_movil', **datos}
+        )
+
+    def test_recuperacion_tras_caida_antes_de_confirmar(self):
+        respuesta = self.marcar()
+        self.assertEqual(respuesta.status_code, 202, respuesta.content)
+        self.encolar(3)
+
+        # El proceso muere después de escribir en Attendance y antes de vaciar la cola
+        with mock.patch.object(cola, 'confirmar', side_effect=SystemExit):
+            with self.assertRaises(SystemExit):
+                drenar()
+        self.assertEqual(Attendance.objects.count(), 2)
+        self.assertEqual(cola.pendientes(), 2)
+
+        # El siguiente drenado descarta lo ya escrito sin duplicarlo
+        self.assertEqual(drenar(), 2)
+        self.assertEqual(Attendance.objects.count(), 2)
+        self.assertEqual(cola.pendientes(), 0)
+        self.assertEqual(cola.fallidas(), 0)
+
+    def test_fila_invalida_no_detiene_la_cola(self):
+        self.encolar(3)
+        self.encolar(2, metodo=None)
+        self.encolar(1)
+
+        self.assertEqual(drenar(), 3)
+        self.assertEqual(Attendance.objects.count(), 2)
+        self.assertEqual(cola.pendientes(), 0)
+        self.assertEqual(cola.fallidas(), 1)
+        self.assertEqual(drenar(), 0)
+
+    def test_lote_considera_la_cola(self):
+        self.encolar(2)
+        ahora = timezone.now()
+        resultados = ingerir_lote([
+            {'client_uuid': uuid.uuid4(), 'codigo_qr': 'QR-1', 'fecha_hora': ahora - timedelta(hours=1)},
+            {'client_uuid': uuid.uuid4(), 'codigo_qr': 'QR-1', 'fecha_hora': ahora - timedelta(hours=2, minutes=-2)},
+        ], self.usuario)
+        self.assertEqual(resultados[0]['tipo'], 'salida')
+        self.assertEqual(resultados[1]['estado'], RECHAZADA)
+
+
+class IngestaConcurrenteTests(MarcacionTestCase):
+    def test_conflictos_repetidos(self):
+        registrada = Attendance.objects.create(
+            empleado=self.empleado, tipo='entrada', fecha_hora=timezone.now() - timedelta(hours=3),
+            client_uuid=uuid.uuid4()
+        )
+        marcaciones = [
+            {'client_uuid': registrada.client_uuid, 'codigo_qr': 'QR-1', 'fecha_hora': registrada.fecha_hora},
+            {'client_uuid': uuid.uuid4(), 'codigo_qr': 'QR-1', 'fecha_hora': timezone.now() - timedelta(hours=1)},
+        ]
+        with mock.patch('attendance.ingestion.escribir_lote', side_effect=IntegrityError) as escribir:
+            resultados = ingerir_lote(marcaciones, self.usuario)
+        self.assertEqual(escribir.call_count, 3)
+        self.assertEqual(resultados[0], {'client_uuid': registrada.client_uuid, 'estado': DUPLICADA, 'id': registrada.pk})
+        self.assertEqual(resultados[1]['estado'], RECHAZADA)
+
+
+class ArchivoAsistenciasTests(MarcacionTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.delete(CLAVE_FRONTERA)
+        self.addCleanup(cache.delete, CLAVE_FRONTERA)
+        self.antigua = Attendance.objects.create(
+            empleado=self.empleado, tipo='entrada', fecha_hora=corte_archivo() - timedelta(days=10)
+        )
+        self.reciente = Attendance.objects.create(
+            empleado=self.empleado, tipo='entrada', fecha_hora=timezone.now() - timedelta(hours=1)
+        )
+        self.assertEqual(archivar(corte_archivo()), 1)
+
+    def test_consulta_sin_fecha_de_inicio_incluye_el_archivo(self):
+        self.assertIs(modelo_para_rango(), AttendanceHistorico)
+        respuesta = self.client.get('/api/v1/attendance/mis-marcaciones/')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(
+            {fila['id'] for fila in respuesta.json()['results']}, {self.antigua.pk, self.reciente.pk}
+        )
+
+    def test_reconstruir_rollup_incluye_el_archivo(self):
+        reconstruir_rollup()
+        fechas = set(AttendanceDailyRollup.objects.values_list('fecha', flat=True))
+        self.assertEqual(fechas, {
+            timezone.localtime(self.antigua.fecha_hora).date(),
+            timezone.localtime(self.reciente.fecha_hora).date(),
+        })
+
+
+class PaginacionCursorTests(MarcacionTestCase):
+    def setUp(self):
+        super().setUp()
+        # Tres pares de marcaciones con la misma fecha_hora: el desempate es el id
+        inicio = timezone.now() - timedelta(days=1)
+        for minuto in (0, 0, 1, 2, 2, 3, 3):
+            Attendance.objects.create(empleado=self.empleado, tipo='entrada', fecha_hora=inicio + timedelta(minutes=minuto))
+
+    def recorrer(self, **parametros):
+        """Ids de todas las páginas siguiendo el enlace 'next'"""
+        respuesta = self.client.get('/api/v1/attendance/', {'paginacion': 'cursor', 'page_size': 2, **parametros})
+        ids = []
+        while True:
+            self.assertEqual(respuesta.status_code, 200, respuesta.content)
+            datos = respuesta.json()
+            ids.extend(fila['id'] for fila in datos['results'])
+            if datos['next'] is None:
+                return ids
+            respuesta = self.client.get(datos['next'])
+
+    def test_recorrido_sin_huecos_ni_repetidos(self):
+        marcaciones = Attendance.objects.all()
+        self.assertEqual(self.recorrer(), list(marcaciones.order_by('-fecha_hora', '-id').values_list('id', flat=True)))
+        self.assertEqual(
+            self.recorrer(ordering='fecha_hora'),
+            list(marcaciones.order_by('fecha_hora', 'id').values_list('id', flat=True))
+        )
+
+    def test_cursor_invalido(self):
+        respuesta = self.client.get('/api/v1/attendance/', {'paginacion': 'cursor', 'cursor': 'no-es-un-cursor'})
+        self.assertEqual(respuesta.status_code, 404)
+
+    def test_paginacion_por_numero_por_defecto(self):
+        respuesta = self.client.get('/api/v1/attendance/')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(set(respuesta.json()), {'count', 'next', 'previous', 'results'})
+        self.assertEqual(respuesta.json()['count'], 7)
+
+
+class EstadisticasSeccionesTests(MarcacionTestCase):
+    def setUp(self):
+        super().setUp()
+        inicio = timezone.now() - timedelta(days=1)
+        Attendance.objects.create(empleado=self.empleado, tipo='entrada', fecha_hora=inicio)
+        Attendance.objects.create(empleado=self.empleado, tipo='salida', fecha_hora=inicio + timedelta(hours=8))
+        # La frontera del archivo queda en caché: no cuenta como recorrido
+        cache.delete(CLAVE_FRONTERA)
+        self.addCleanup(cache.delete, CLAVE_FRONTERA)
+        modelo_para_rango()
+
+    def test_secciones_limitan_los_recorridos(self):
+        for nombre in ('rollup', 'raw'):
+            fuente = obtener_fuente(nombre)
+            for secciones, consultas in ((['resumen', 'por_dia', 'por_metodo'], 1), (['empleados'], 1), (['resumen', 'empleados'], 2)):
+                with self.subTest(fuente=nombre, secciones=secciones), self.assertNumQueries(consultas):
+                    calcular_estadisticas(empresa_id=self.empresa.pk, secciones=secciones, fuente=fuente)
+
+    def test_respuesta_con_las_secciones_pedidas(self):
+        respuesta = self.client.get('/api/v1/attendance/estadisticas/', {'secciones': 'resumen,empleados'})
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        self.assertEqual(set(respuesta.json()), {'resumen', 'empleados_mas_activos'})
+        self.assertEqual(respuesta.json()['resumen']['total_marcaciones'], 2)
+
+        respuesta = self.client.get('/api/v1/attendance/estadisticas/', {'secciones': 'resumen,otra'})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+@override_settings(READ_REPLICA_ALIAS='replica')
+class LecturaReplicaTests(MarcacionTestCase):
+    """
+    Alias que elige ReplicaRouter en cada vista. La base de pruebas no tiene
+    réplica: 'replica' se registra como otro nombre de la conexión 'default'.
+    """
+
+    def setUp(self):
+        super().setUp()
+        connections['replica'] = connections['default']
+        self.addCleanup(delattr, connections._connections, 'replica')
+        Attendance.objects.create(empleado=self.empleado, tipo='entrada', fecha_hora=timezone.now() - timedelta(hours=1))
+
+        self.lecturas = self.espiar('db_for_read')
+        self.escrituras = self.espiar('db_for_write')
+
+    def espiar(self, metodo):
+        """Lista que acumula los alias que retorna ``metodo`` del router"""
+        elegidos = []
+        original = getattr(ReplicaRouter, metodo)
+
+        def registrar(router, model, **hints):
+            elegidos.append(original(router, model, **hints))
+            return elegidos[-1]
+
+        espia = mock.patch.object(ReplicaRouter, metodo, registrar)
+        espia.start()
+        self.addCleanup(espia.stop)
+        return elegidos
+
+    def test_listado_y_estadisticas_leen_de_la_replica(self):
+        for url in ('/api/v1/attendance/', '/api/v1/attendance/estadisticas/'):
+            del self.lecturas[:]
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(set(self.lecturas), {'replica'}, url)
+
+    def test_exportacion_lee_de_la_replica(self):
+        alias = []
+
+        def exportar(queryset):
+            alias.append(queryset.db)
+            return exportar_csv(queryset)
+
+        with mock.patch.dict(EXPORTADORES, {'csv': exportar}):
+            respuesta = self.client.get('/api/v1/attendance/exportar/')
+            b''.join(respuesta.streaming_content)
+        self.assertEqual(alias, ['replica'])
+
+    def test_marcacion_escribe_y_lee_en_default(self):
+        self.assertEqual(self.marcar().status_code, 201)
+        self.assertEqual(set(self.escrituras), {'default'})
+        self.assertNotIn('replica', self.lecturas)
+
+
+class BorradoMarcacionesTests(MarcacionTestCase):
+    """Las consultas de un borrado no dependen de cuántas marcaciones elimina"""
+
+    def marcar_varias(self, empleado, cantidad):
+        inicio = timezone.localtime().replace(hour=8, minute=0) - timedelta(days=1)
+        for minuto in range(cantidad):
+            Attendance.objects.create(empleado=empleado, tipo='entrada', fecha_hora=inicio + timedelta(minutes=minuto))
+
+    def consultas(self, borrar):
+        with CaptureQueriesContext(connection) as consultas:
+            borrar()
+        return len(consultas)
+
+    def test_borrado_en_cascada(self):
+        uno, muchos = self.crear_empleado(2), self.crear_empleado(3)
+        self.marcar_varias(uno, 1)
+        self.marcar_varias(muchos, 50)
+
+        self.assertEqual(self.consultas(uno.delete), self.consultas(muchos.delete))
+        self.assertFalse(AttendanceState.objects.exists())
+        self.assertFalse(AttendanceDailyRollup.objects.exists())
+
+    def test_borrado_de_queryset(self):
+        self.marcar_varias(self.empleado, 50)
+        marcaciones = Attendance.objects.filter(empleado=self.empleado).order_by('-fecha_hora')
+        ids = list(marcaciones.values_list('id', flat=True))
+
+        una = self.consultas(Attendance.objects.filter(pk=ids[0]).delete)
+        self.assertEqual(self.consultas(Attendance.objects.filter(pk__in=ids[1:40]).delete), una)
+
+        ultima = marcaciones.first()
+        self.assertEqual(self.empleado.estado_marcacion.ultima_fecha_hora, ultima.fecha_hora)
+        rollup = AttendanceDailyRollup.objects.get(empleado=self.empleado)
+        self.assertEqual(rollup.entradas, 10)
+
+
+class PresupuestoConsultasListadoTests(MarcacionTestCase):
+    """El número de consultas del listado no depende del tamaño de página"""
+
+    def setUp(self):
+        super().setUp()
+        inicio = timezone.now() - timedelta(days=1)
+        for minuto in range(50):
+            Attendance.objects.create(
+                empleado=self.empleado, tipo='entrada', fecha_hora=inicio + timedelta(minutes=minuto)
+            )
+
+    def test_tamanos_de_pagina(self):
+        def listar(page_size):
+            filas = self.listar('/api/v1/attendance/', paginacion='cursor', page_size=page_size)
+            self.assertEqual(len(filas), page_size)
+
+        self.assertMismasConsultas(lambda: listar(1), lambda: listar(50))
@@ -1,13 +1,16 @@
 from django.urls import path
 from .views import (
     ListAttendanceView,
+    ExportarAsistenciasView,
     AttendanceDetailView,
     MarcarAsistenciaView,
+    MarcarAsistenciaLoteView,
     MisAsistenciasView,
     QRCodesActivosView,
     ListCreateQRCodeView,
     QRCodeDetailView,
     EstadisticasAsistenciaView,
+    HorasTrabajadasView,
     ResumenDiarioView
 )
 
@@ -16,6 +19,7 @@ app_name = 'attendance'
 urlpatterns = [
     # Endpoints principales para empleados
     path('marcar/', MarcarAsistenciaView.as_view(), name='marcar-asistencia'),
+    path('marcar/lote/', MarcarAsistenciaLoteView.as_view(), name='marcar-asistencia-lote'),
     path('mis-marcaciones/', MisAsistenciasView.as_view(), name='mis-asistencias'),
     path('resumen-diario/', ResumenDiarioView.as_view(), name='resumen-diario'),
     path('qr-activos/', QRCodesActivosView.as_view(), name='qr-activos'),
@@ -24,6 +28,8 @@ urlpatterns = [
     path('', ListAttendanceView.as_view(), name='list-attendance'),
     path('<int:pk>/', AttendanceDetailView.as_view(), name='attendance-detail'),
     path('estadisticas/', EstadisticasAsistenciaView.as_view(), name='estadisticas'),
+    path('horas-trabajadas/', HorasTrabajadasView.as_view(), name='horas-trabajadas'),
+    path('exportar/', ExportarAsistenciasView.as_view(), name='exportar-asistencias'),
     
     # Endpoints administrativos - Códigos QR
     path('qr-codes/', ListCreateQRCodeView.as_view(), name='list-create-qr'),
@@ -9,28 +9,50 @@ from rest_framework.generics import (
     ListCreateAPIView
 )
 from rest_framework.views import APIView
+from rest_framework.exceptions import ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.utils.urls import replace_query_param
+from drf_spectacular.utils import extend_schema
+from django.conf import settings
+from django.http import StreamingHttpResponse
 from django.utils import timezone
 from datetime import datetime, timedelta
-from django.db.models import Q, Count, Avg
-from django.db.models.functions import TruncDate
+from itertools import islice
 
 from .models import Attendance, QRCode
 from .serializers import (
     AttendanceListSerializer,
     AttendanceDetailSerializer,
     MarcarAsistenciaSerializer,
+    MarcarAsistenciaLoteSerializer,
+    MarcarAsistenciaLoteRespuestaSerializer,
+    MarcacionLoteItemSerializer,
     MisAsistenciasSerializer,
     QRCodeSerializer,
     QRCodeDetailSerializer,
-    EstadisticasAsistenciaSerializer
+    EstadisticasAsistenciaSerializer,
+    HorasTrabajadasSerializer,
+    HorasTrabajadasRespuestaSerializer
 )
+from .archive import modelo_para_rango
+from .checkin import determinar_tipo
+from .export import EXPORTADORES, FORMATOS
+from .estadisticas import SECCIONES, calcular_estadisticas
+from .filters import filtrar_por_fechas
+from .idempotency import IdempotenciaMixin
+from .ingestion import DUPLICADA, RECHAZADA, REGISTRADA, ingerir_lote
+from .jornadas import emparejar, en_rango, horas_por_empleado, obtener_marcaciones
+from .pagination import PaginacionCursorOpcionalMixin
 from employees.models import Employee
+from asistent_app.prefetch import PrecargaRelacionesMixin
+from asistent_app.routers import LecturaReplicaMixin, alias_lectura
+from asistent_app.tenancy import AlcanceEmpresaMixin, empresa_permitida
 
 
-class ListAttendanceView(ListAPIView):
+class ListAttendanceView(LecturaReplicaMixin, PrecargaRelacionesMixin, AlcanceEmpresaMixin, PaginacionCursorOpcionalMixin, ListAPIView):
     """Listar todas las asistencias (solo admin/supervisores)"""
+    campo_empresa = 'empleado__empresa_id'
     serializer_class = AttendanceListSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
@@ -40,31 +62,46 @@ class ListAttendanceView(ListAPIView):
     ordering = ['-fecha_hora']
     
     def get_queryset(self):
-        queryset = Attendance.objects.select_related(
-            'empleado', 'empleado__empresa'
-        )
-        
-        # Filtros por fecha
+        # Filtros por fecha (el rango decide si se consulta también el archivo)
         fecha_inicio = self.request.query_params.get('fecha_inicio')
         fecha_fin = self.request.query_params.get('fecha_fin')
         
-        if fecha_inicio:
-            queryset = queryset.filter(fecha_hora__date__gte=fecha_inicio)
-        if fecha_fin:
-            queryset = queryset.filter(fecha_hora__date__lte=fecha_fin)
-            
-        return queryset
+        queryset = modelo_para_rango(fecha_inicio).objects.all()
+        return filtrar_por_fechas(queryset, fecha_inicio, fecha_fin)
+
 
+class ExportarAsistenciasView(ListAttendanceView):
+    """Exportar asistencias en streaming (CSV o NDJSON) con los filtros del listado"""
+    pagination_class = None
+    
+    def list(self, request, *args, **kwargs):
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in FORMATOS:
+            raise ValidationError({
+                'formato': f"Formato inválido. Opciones: {', '.join(FORMATOS)}"
+            })
+        
+        # El alias se fija aquí: la consulta se ejecuta al transmitir la
+        # respuesta, fuera del contexto de lectura de la vista
+        queryset = self.filter_queryset(self.get_queryset()).using(alias_lectura())
+        response = StreamingHttpResponse(
+            EXPORTADORES[formato](queryset),
+            content_type=FORMATOS[formato]
+        )
+        response['Content-Disposition'] = f'attachment; filename="asistencias.{formato}"'
+        return response
 
-class AttendanceDetailView(RetrieveUpdateDestroyAPIView):
+
+class AttendanceDetailView(PrecargaRelacionesMixin, AlcanceEmpresaMixin, RetrieveUpdateDestroyAPIView):
     """Ver, editar o eliminar una asistencia específica"""
-    queryset = Attendance.objects.select_related('empleado', 'empleado__empresa')
+    campo_empresa = 'empleado__empresa_id'
+    queryset = Attendance.objects.all()
     serializer_class = AttendanceDetailSerializer
     permission_classes = [IsAuthenticated]
 
 
-class MarcarAsistenciaView(CreateAPIView):
-    """Endpoint principal para marcar asistencia via QR"""
+class MarcarAsistenciaView(IdempotenciaMixin, CreateAPIView):
+    """Endpoint principal para marcar asistencia via QR (admite Idempotency-Key)"""
     serializer_class = MarcarAsistenciaSerializer
     permission_classes = [IsAuthenticated]
     
@@ -72,8 +109,9 @@ class MarcarAsistenciaView(CreateAPIView):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
-        # Crear la marcación
+        # Crear la marcación (sin id si quedó en la cola de escritura diferida)
         attendance = serializer.save()
+        encolada = attendance.pk is None
         
         # Respuesta personalizada
         response_data = {
@@ -88,10 +126,52 @@ class MarcarAsistenciaView(CreateAPIView):
             }
         }
         
+        if encolada:
+            response_data['data']['client_uuid'] = attendance.client_uuid
+            return Response(response_data, status=status.HTTP_202_ACCEPTED)
+        
         return Response(response_data, status=status.HTTP_201_CREATED)
 
 
-class MisAsistenciasView(ListAPIView):
+class MarcarAsistenciaLoteView(APIView):
+    """Registrar un lote de marcaciones realizadas sin conexión"""
+    permission_classes = [IsAuthenticated]
+    
+    @extend_schema(request=MarcarAsistenciaLoteSerializer, responses=MarcarAsistenciaLoteRespuestaSerializer)
+    def post(self, request):
+        serializer = MarcarAsistenciaLoteSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        marcaciones = serializer.validated_data['marcaciones']
+        
+        # Los errores de formato se informan por marcación sin invalidar el lote
+        resultados = [None] * len(marcaciones)
+        validas, indices = [], []
+        for indice, datos in enumerate(marcaciones):
+            item = MarcacionLoteItemSerializer(data=datos)
+            if item.is_valid():
+                validas.append(item.validated_data)
+                indices.append(indice)
+            else:
+                resultados[indice] = {
+                    'client_uuid': datos.get('client_uuid'),
+                    'estado': RECHAZADA,
+                    'error': item.errors
+                }
+        
+        if validas:
+            for indice, resultado in zip(indices, ingerir_lote(validas, request.user)):
+                resultados[indice] = resultado
+        
+        estados = [resultado['estado'] for resultado in resultados]
+        return Response({
+            'registradas': estados.count(REGISTRADA),
+            'duplicadas': estados.count(DUPLICADA),
+            'rechazadas': estados.count(RECHAZADA),
+            'resultados': resultados
+        })
+
+
+class MisAsistenciasView(PaginacionCursorOpcionalMixin, ListAPIView):
     """Ver las propias asistencias del empleado autenticado"""
     serializer_class = MisAsistenciasSerializer
     permission_classes = [IsAuthenticated]
@@ -101,43 +181,36 @@ class MisAsistenciasView(ListAPIView):
     ordering = ['-fecha_hora']
     
     def get_queryset(self):
-        try:
-            empleado = Employee.objects.get(user=self.request.user)
-            queryset = Attendance.objects.filter(empleado=empleado)
-            
-            # Filtros por fecha
-            fecha_inicio = self.request.query_params.get('fecha_inicio')
-            fecha_fin = self.request.query_params.get('fecha_fin')
-            
-            if fecha_inicio:
-                queryset = queryset.filter(fecha_hora__date__gte=fecha_inicio)
-            if fecha_fin:
-                queryset = queryset.filter(fecha_hora__date__lte=fecha_fin)
-                
-            return queryset
-        except Employee.DoesNotExist:
+        empleado_id = getattr(self.request.user, 'empleado_id', None)
+        if not empleado_id:
             return Attendance.objects.none()
+        
+        # Filtros por fecha (el rango decide si se consulta también el archivo)
+        fecha_inicio = self.request.query_params.get('fecha_inicio')
+        fecha_fin = self.request.query_params.get('fecha_fin')
+        
+        queryset = modelo_para_rango(fecha_inicio).objects.filter(empleado_id=empleado_id)
+        return filtrar_por_fechas(queryset, fecha_inicio, fecha_fin)
 
 
-class QRCodesActivosView(ListAPIView):
+class QRCodesActivosView(PrecargaRelacionesMixin, ListAPIView):
     """Listar códigos QR activos para la empresa del empleado"""
     serializer_class = QRCodeSerializer
     permission_classes = [IsAuthenticated]
     
     def get_queryset(self):
-        try:
-            empleado = Employee.objects.get(user=self.request.user)
-            return QRCode.objects.filter(
-                empresa=empleado.empresa,
-                activo=True
-            )
-        except Employee.DoesNotExist:
+        empresa_id = getattr(self.request.user, 'empresa_id', None)
+        if not empresa_id:
             return QRCode.objects.none()
+        return QRCode.objects.filter(
+            empresa_id=empresa_id,
+            activo=True
+        )
 
 
-class ListCreateQRCodeView(ListCreateAPIView):
+class ListCreateQRCodeView(PrecargaRelacionesMixin, AlcanceEmpresaMixin, ListCreateAPIView):
     """Listar y crear códigos QR (solo admin)"""
-    queryset = QRCode.objects.select_related('empresa')
+    queryset = QRCode.objects.all()
     serializer_class = QRCodeDetailSerializer
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter]
@@ -145,14 +218,14 @@ class ListCreateQRCodeView(ListCreateAPIView):
     search_fields = ['nombre', 'ubicacion', 'codigo_qr']
 
 
-class QRCodeDetailView(RetrieveUpdateDestroyAPIView):
+class QRCodeDetailView(PrecargaRelacionesMixin, AlcanceEmpresaMixin, RetrieveUpdateDestroyAPIView):
     """Ver, editar o eliminar un código QR específico"""
-    queryset = QRCode.objects.select_related('empresa')
+    queryset = QRCode.objects.all()
     serializer_class = QRCodeDetailSerializer
     permission_classes = [IsAuthenticated]
 
 
-class EstadisticasAsistenciaView(APIView):
+class EstadisticasAsistenciaView(LecturaReplicaMixin, APIView):
     """Generar estadísticas de asistencia"""
     permission_classes = [IsAuthenticated]
     
@@ -161,70 +234,66 @@ class EstadisticasAsistenciaView(APIView):
         serializer.is_valid(raise_exception=True)
         
         # Obtener parámetros validados
-        empleado_id = serializer.validated_data.get('empleado_id')
-        fecha_inicio = serializer.validated_data.get('fecha_inicio')
-        fecha_fin = serializer.validated_data.get('fecha_fin')
-        empresa_id = serializer.validated_data.get('empresa_id')
-        
-        # Construir queryset base
-        queryset = Attendance.objects.select_related('empleado')
+        datos = serializer.validated_data
         
-        # Aplicar filtros
-        if empleado_id:
-            queryset = queryset.filter(empleado_id=empleado_id)
-        if empresa_id:
-            queryset = queryset.filter(empleado__empresa_id=empresa_id)
-        if fecha_inicio:
-            queryset = queryset.filter(fecha_hora__date__gte=fecha_inicio)
-        if fecha_fin:
-            queryset = queryset.filter(fecha_hora__date__lte=fecha_fin)
+        # Todas las secciones se calculan con a lo sumo dos recorridos
+        response_data = calcular_estadisticas(
+            empleado_id=datos.get('empleado_id'),
+            empresa_id=empresa_permitida(request.user, datos.get('empresa_id')),
+            fecha_inicio=datos.get('fecha_inicio'),
+            fecha_fin=datos.get('fecha_fin'),
+            secciones=datos.get('secciones', SECCIONES)
+        )
         
-        # Calcular estadísticas
-        total_marcaciones = queryset.count()
-        total_entradas = queryset.filter(tipo='entrada').count()
-        total_salidas = queryset.filter(tipo='salida').count()
+        return Response(response_data)
+
+
+class HorasTrabajadasView(LecturaReplicaMixin, APIView):
+    """Horas trabajadas por empleado y día para una empresa y un rango de fechas"""
+    permission_classes = [IsAuthenticated]
+    
+    @extend_schema(parameters=[HorasTrabajadasSerializer], responses=HorasTrabajadasRespuestaSerializer)
+    def get(self, request):
+        serializer = HorasTrabajadasSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        datos = serializer.validated_data
+        empresa_id = empresa_permitida(request.user, datos['empresa_id'])
+        page_size = datos.get('page_size') or getattr(settings, 'ATTENDANCE_HOURS_PAGE_SIZE', 100)
         
-        # Marcaciones por día
-        marcaciones_por_dia = queryset.annotate(
-            fecha=TruncDate('fecha_hora')
-        ).values('fecha').annotate(
-            total=Count('id'),
-            entradas=Count('id', filter=Q(tipo='entrada')),
-            salidas=Count('id', filter=Q(tipo='salida'))
-        ).order_by('fecha')
+        # Paginación por empleado_id: se consume un empleado más que la página
+        # para saber si hay otra y se cierra el cursor sin leer el resto
+        resultados = horas_por_empleado(
+            empresa_id, datos['fecha_inicio'], datos['fecha_fin'],
+            desde_empleado=datos.get('desde_empleado')
+        )
+        pagina = list(islice(resultados, page_size + 1))
+        resultados.close()
         
-        # Marcaciones por método
-        marcaciones_por_metodo = queryset.values('metodo').annotate(
-            total=Count('id')
-        ).order_by('-total')
+        siguiente = None
+        if len(pagina) > page_size:
+            pagina = pagina[:page_size]
+            siguiente = replace_query_param(
+                request.build_absolute_uri(), 'desde_empleado', pagina[-1][0]
+            )
         
-        # Empleados más activos (si no se filtró por empleado específico)
-        empleados_activos = []
-        if not empleado_id:
-            empleados_activos = queryset.values(
-                'empleado__id',
-                'empleado__nombre',
-                'empleado__apellido'
-            ).annotate(
-                total_marcaciones=Count('id')
-            ).order_by('-total_marcaciones')[:10]
+        empleados = [
+            {
+                'empleado_id': empleado_id,
+                'dias': {fecha.isoformat(): round(valor, 2) for fecha, valor in sorted(horas.items())},
+                'total_horas': round(sum(horas.values()), 2)
+            }
+            for empleado_id, horas in pagina
+        ]
         
-        response_data = {
-            'resumen': {
-                'total_marcaciones': total_marcaciones,
-                'total_entradas': total_entradas,
-                'total_salidas': total_salidas,
-                'periodo': {
-                    'fecha_inicio': fecha_inicio,
-                    'fecha_fin': fecha_fin
-                }
+        return Response({
+            'empresa_id': empresa_id,
+            'periodo': {
+                'fecha_inicio': datos['fecha_inicio'],
+                'fecha_fin': datos['fecha_fin']
             },
-            'marcaciones_por_dia': list(marcaciones_por_dia),
-            'marcaciones_por_metodo': list(marcaciones_por_metodo),
-            'empleados_mas_activos': list(empleados_activos)
-        }
-        
-        return Response(response_data)
+            'next': siguiente,
+            'empleados': empleados
+        })
 
 
 class ResumenDiarioView(APIView):
@@ -233,34 +302,33 @@ class ResumenDiarioView(APIView):
     
     def get(self, request):
         try:
-            empleado = Employee.objects.get(user=request.user)
-            hoy = timezone.now().date()
+            empleado = Employee.objects.select_related('estado_marcacion').get(
+                pk=request.user.empleado_id
+            )
+            estado = getattr(empleado, 'estado_marcacion', None)
+            hoy = timezone.localdate()
             
-            # Marcaciones del día
-            marcaciones_hoy = Attendance.objects.filter(
-                empleado=empleado,
-                fecha_hora__date=hoy
-            ).order_by('fecha_hora')
+            # Marcaciones del día (una sola lectura; incluye la mañana
+            # siguiente en turnos nocturnos para cerrar la jornada)
+            marcaciones = obtener_marcaciones(empleado.pk, hoy, hoy, empleado.shift_type)
+            marcaciones_hoy = [m for m in marcaciones if timezone.localtime(m.fecha_hora).date() == hoy]
             
             # Última marcación
-            ultima_marcacion = marcaciones_hoy.last()
+            ultima_marcacion = marcaciones_hoy[-1] if marcaciones_hoy else None
             
-            # Determinar próxima acción
+            # Determinar próxima acción desde el estado materializado
             proxima_accion = 'entrada'
-            if ultima_marcacion and ultima_marcacion.tipo == 'entrada':
-                proxima_accion = 'salida'
+            if estado:
+                proxima_accion = determinar_tipo(
+                    estado.ultimo_tipo, estado.ultima_fecha_hora,
+                    inicio_turno=estado.inicio_turno, shift_type=empleado.shift_type
+                )
             
-            # Calcular horas trabajadas (aproximado)
-            horas_trabajadas = 0
-            if marcaciones_hoy.count() >= 2:
-                entradas = marcaciones_hoy.filter(tipo='entrada')
-                salidas = marcaciones_hoy.filter(tipo='salida')
-                
-                for i, entrada in enumerate(entradas):
-                    if i < salidas.count():
-                        salida = salidas[i]
-                        delta = salida.fecha_hora - entrada.fecha_hora
-                        horas_trabajadas += delta.total_seconds() / 3600
+            # Calcular horas trabajadas emparejando entradas y salidas
+            jornadas = en_rango(
+                emparejar(((m.fecha_hora, m.tipo) for m in marcaciones), shift_type=empleado.shift_type), hoy, hoy
+            )
+            horas_trabajadas = sum(jornada.horas for jornada in jornadas)
             
             response_data = {
                 'fecha': hoy,
@@ -272,7 +340,7 @@ class ResumenDiarioView(APIView):
                 },
                 'proxima_accion': proxima_accion,
                 'horas_trabajadas_aproximadas': round(horas_trabajadas, 2),
-                'total_marcaciones': marcaciones_hoy.count()
+                'total_marcaciones': len(marcaciones_hoy)
             }
             
             return Response(response_data)
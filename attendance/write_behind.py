@@ -0,0 +1,259 @@
+"""
+Cola de escritura diferida (write-behind) de marcaciones.
+
+En los cambios de turno todos los empleados marcan en pocos minutos y, sobre
+SQLite, cada INSERT en Attendance compite por el único bloqueo de escritura.
+Con ``ATTENDANCE_WRITE_BEHIND = True`` la marcación se valida como siempre
+(registro de QR en memoria y estado materializado), se agrega a una cola
+durable en un archivo SQLite aparte (modo WAL, ``synchronous=FULL``) y se
+responde de inmediato con 202. Un proceso de drenado
+(``manage.py drenar_cola_marcaciones``) la vuelca a Attendance en lotes.
+
+Recuperación ante caídas: cada marcación lleva un ``client_uuid`` y las filas
+de la cola solo se eliminan después de confirmar la transacción en la base
+principal. Si el proceso muere entre ambos pasos, el siguiente drenado
+encuentra esos ``client_uuid`` ya registrados y los descarta sin duplicarlos.
+
+Si el lote falla al escribirse (IntegrityError o DataError) se reintenta fila
+por fila: las que vuelven a fallar pasan a la tabla ``marcaciones_fallidas``
+del mismo archivo, con el error, para revisarlas sin detener la cola.
+"""
+import json
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import DataError, IntegrityError
+
+from employees.models import Employee
+from .ingestion import CAMPOS_OPCIONALES, escribir_lote
+from .models import Attendance
+
+FORMATO_FECHA = '%Y-%m-%dT%H:%M:%S.%f%z'
+
+ESQUEMA = (
+    '''CREATE TABLE IF NOT EXISTS marcaciones_pendientes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        client_uuid TEXT NOT NULL UNIQUE,
+        empleado_id INTEGER NOT NULL,
+        fecha_hora TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        datos TEXT NOT NULL
+    )''',
+    '''CREATE INDEX IF NOT EXISTS marcaciones_pendientes_empleado
+        ON marcaciones_pendientes (empleado_id, fecha_hora)''',
+    '''CREATE TABLE IF NOT EXISTS marcaciones_fallidas (
+        id INTEGER PRIMARY KEY,
+        client_uuid TEXT NOT NULL,
+        empleado_id INTEGER NOT NULL,
+        fecha_hora TEXT NOT NULL,
+        tipo TEXT NOT NULL,
+        datos TEXT NOT NULL,
+        error TEXT NOT NULL,
+        fecha_fallo TEXT NOT NULL
+    )''',
+)
+
+
+def habilitada():
+    return getattr(settings, 'ATTENDANCE_WRITE_BEHIND', False)
+
+
+def _fecha_texto(fecha_hora):
+    # Formato fijo en UTC: el orden lexicográfico coincide con el cronológico
+    return fecha_hora.astimezone(dt_timezone.utc).strftime(FORMATO_FECHA)
+
+
+def _fecha_valor(texto):
+    return datetime.strptime(texto, FORMATO_FECHA)
+
+
+class ColaMarcaciones:
+    """Cola durable en SQLite con una conexión por hilo"""
+
+    def __init__(self, ruta=None):
+        self._ruta = ruta
+        self._local = threading.local()
+
+    @property
+    def ruta(self):
+        return str(self._ruta or settings.ATTENDANCE_WRITE_BEHIND_PATH)
+
+    @property
+    def conexion(self):
+        conexion = getattr(self._local, 'conexion', None)
+        if conexion is None or getattr(self._local, 'ruta', None) != self.ruta:
+            conexion = sqlite3.connect(self.ruta, timeout=5, isolation_level=None, check_same_thread=False)
+            conexion.execute('PRAGMA journal_mode=WAL')
+            conexion.execute('PRAGMA synchronous=FULL')
+            for sentencia in ESQUEMA:
+                conexion.execute(sentencia)
+            self._local.conexion, self._local.ruta = conexion, self.ruta
+        return conexion
+
+    def encolar(self, client_uuid, empleado_id, fecha_hora, tipo, datos):
+        """Agrega una marcación; queda persistida al retornar"""
+        self.conexion.execute(
+            'INSERT INTO marcaciones_pendientes (client_uuid, empleado_id, fecha_hora, tipo, datos) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (str(client_uuid), empleado_id, _fecha_texto(fecha_hora), tipo, json.dumps(datos))
+        )
+
+    def ultima(self, empleado_id):
+        """Última marcación (tipo, fecha_hora) pendiente del empleado, o None"""
+        fila = self.conexion.execute(
+            'SELECT tipo, fecha_hora FROM marcaciones_pendientes WHERE empleado_id = ? '
+            'ORDER BY fecha_hora DESC LIMIT 1',
+            (empleado_id,)
+        ).fetchone()
+        return (fila[0], _fecha_valor(fila[1])) if fila else None
+
+    def entre(self, empleado_ids, desde, hasta):
+        """Marcaciones pendientes (empleado_id, fecha_hora, tipo) de los empleados entre dos fechas"""
+        empleado_ids = list(empleado_ids)
+        marcadores = ', '.join('?' * len(empleado_ids))
+        filas = self.conexion.execute(
+            f'SELECT empleado_id, fecha_hora, tipo FROM marcaciones_pendientes '
+            f'WHERE empleado_id IN ({marcadores}) AND fecha_hora BETWEEN ? AND ?',
+            (*empleado_ids, _fecha_texto(desde), _fecha_texto(hasta))
+        ).fetchall()
+        return [(empleado_id, _fecha_valor(fecha_hora), tipo) for empleado_id, fecha_hora, tipo in filas]
+
+    def leer(self, limite):
+        """Retorna hasta ``limite`` marcaciones pendientes en orden de llegada"""
+        return self.conexion.execute(
+            'SELECT id, client_uuid, empleado_id, fecha_hora, tipo, datos '
+            'FROM marcaciones_pendientes ORDER BY id LIMIT ?',
+            (limite,)
+        ).fetchall()
+
+    def confirmar(self, ids):
+        """Elimina de la cola las marcaciones ya escritas en Attendance"""
+        self.conexion.executemany(
+            'DELETE FROM marcaciones_pendientes WHERE id = ?', [(pk,) for pk in ids]
+        )
+
+    def descartar(self, fila, error):
+        """Mueve una marcación pendiente a marcaciones_fallidas en una sola transacción"""
+        conexion = self.conexion
+        conexion.execute('BEGIN IMMEDIATE')
+        try:
+            conexion.execute(
+                'INSERT INTO marcaciones_fallidas '
+                '(id, client_uuid, empleado_id, fecha_hora, tipo, datos, error, fecha_fallo) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (*fila, str(error), _fecha_texto(datetime.now(dt_timezone.utc)))
+            )
+            conexion.execute('DELETE FROM marcaciones_pendientes WHERE id = ?', (fila[0],))
+        except BaseException:
+            conexion.execute('ROLLBACK')
+            raise
+        conexion.execute('COMMIT')
+
+    def pendientes(self):
+        return self.conexion.execute('SELECT COUNT(*) FROM marcaciones_pendientes').fetchone()[0]
+
+    def fallidas(self):
+        return self.conexion.execute('SELECT COUNT(*) FROM marcaciones_fallidas').fetchone()[0]
+
+
+cola = ColaMarcaciones()
+
+
+def ultima_pendiente(empleado_id):
+    """Última marcación encolada del empleado (None si la cola está deshabilitada)"""
+    if not habilitada() or not empleado_id:
+        return None
+    return cola.ultima(empleado_id)
+
+
+def pendientes_entre(empleado_ids, desde, hasta):
+    """Marcaciones encoladas de los empleados en el rango ([] si la cola está deshabilitada)"""
+    if not habilitada():
+        return []
+    return cola.entre(empleado_ids, desde, hasta)
+
+
+def encolar_marcacion(empleado, tipo, metodo='qr_movil', **datos):
+    """
+    Encola una marcación validada y retorna la instancia sin guardar (sin id)
+    con su ``client_uuid``.
+    """
+    datos.pop('codigo_qr', None)
+    asistencia = Attendance(
+        empleado=empleado,
+        tipo=tipo,
+        metodo=metodo,
+        client_uuid=uuid.uuid4(),
+        **datos
+    )
+    cola.encolar(asistencia.client_uuid, empleado.pk, asistencia.fecha_hora, tipo, {
+        'empresa_id': empleado.empresa_id,
+        'metodo': metodo,
+        **{
+            campo: None if datos.get(campo) is None else str(datos[campo])
+            for campo in CAMPOS_OPCIONALES
+        },
+    })
+    return asistencia
+
+
+def drenar(limite=None):
+    """
+    Vuelca a Attendance un lote de la cola y retorna la cantidad de
+    marcaciones procesadas (0 si la cola está vacía).
+    """
+    limite = limite or getattr(settings, 'ATTENDANCE_WRITE_BEHIND_BATCH', 500)
+    filas = cola.leer(limite)
+    if not filas:
+        return 0
+
+    # Marcaciones ya escritas por un drenado interrumpido antes de confirmar
+    registradas = {
+        str(valor) for valor in Attendance.objects.filter(
+            client_uuid__in=[fila[1] for fila in filas]
+        ).values_list('client_uuid', flat=True)
+    }
+    # Empleados eliminados mientras la marcación esperaba en la cola
+    vigentes = set(Employee.objects.filter(
+        pk__in={fila[2] for fila in filas}
+    ).values_list('id', flat=True))
+
+    asistencias, por_uuid = [], {}
+    for fila in filas:
+        _, client_uuid, empleado_id, fecha_hora, tipo, datos = fila
+        if client_uuid in registradas or empleado_id not in vigentes:
+            continue
+        datos = json.loads(datos)
+        asistencias.append(Attendance(
+            empleado=Employee(id=empleado_id, empresa_id=datos.pop('empresa_id')),
+            fecha_hora=_fecha_valor(fecha_hora),
+            tipo=tipo,
+            client_uuid=uuid.UUID(client_uuid),
+            **datos
+        ))
+        por_uuid[client_uuid] = fila
+
+    if asistencias:
+        try:
+            escribir_lote(asistencias)
+        except (IntegrityError, DataError):
+            # Una fila inválida u otro drenado concurrente: fila por fila
+            _escribir_por_fila(asistencias, por_uuid)
+    cola.confirmar([fila[0] for fila in filas])
+    return len(filas)
+
+
+def _escribir_por_fila(asistencias, por_uuid):
+    """
+    Escribe cada marcación en su propia transacción. Las que ya registró otro
+    drenado se confirman; las demás que fallan pasan a marcaciones_fallidas.
+    """
+    for asistencia in asistencias:
+        try:
+            escribir_lote([asistencia])
+        except (IntegrityError, DataError) as error:
+            if not Attendance.objects.filter(client_uuid=asistencia.client_uuid).exists():
+                cola.descartar(por_uuid[str(asistencia.client_uuid)], error)
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from employees.conteos import anotar_empleados_activos
 from .models import Company
 
 class CompanyAdmin(admin.ModelAdmin):
@@ -71,5 +72,9 @@ class CompanyAdmin(admin.ModelAdmin):
             f'{updated} empresa(s) desactivada(s) exitosamente.'
         )
     desactivar_empresas.short_description = "Desactivar empresas seleccionadas"
+    
+    def get_queryset(self, request):
+        """Anota el conteo de empleados activos (evita un COUNT por fila)"""
+        return anotar_empleados_activos(super().get_queryset(request))
 
 admin.site.register(Company, CompanyAdmin)
\ No newline at end of file
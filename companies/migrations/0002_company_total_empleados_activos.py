@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='company',
+            name='total_empleados_activos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Empleados activos (contador)'),
+        ),
+    ]
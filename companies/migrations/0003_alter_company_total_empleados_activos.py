@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0002_company_total_empleados_activos'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='company',
+            name='total_empleados_activos',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Empleados activos de la empresa; se mantiene con EMPLOYEES_COUNT_MODE = "contador"', verbose_name='Empleados activos (contador)'),
+        ),
+    ]
@@ -12,6 +12,10 @@ class Company(models.Model):
     created = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
     updated = models.DateTimeField(auto_now=True, verbose_name='Fecha de edición')
     activa = models.BooleanField(default=True, verbose_name='¿Está activa?',)
+    total_empleados_activos = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Empleados activos (contador)',
+        help_text='Empleados activos de la empresa; se mantiene con EMPLOYEES_COUNT_MODE = "contador"'
+    )
 
     class Meta:
         verbose_name = 'Empresa'
@@ -22,4 +26,8 @@ class Company(models.Model):
 
     def get_active_employees_count(self):
         """Retorna el número de empleados activos de la empresa"""
-        return self.employee_set.filter(activo=True).count()
\ No newline at end of file
+        from employees.conteos import empleados_activos
+        return empleados_activos(self)
+    
+    get_active_employees_count.short_description = "Empleados activos"
+    get_active_employees_count.admin_order_field = 'empleados_activos'
\ No newline at end of file
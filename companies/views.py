@@ -1,11 +1,14 @@
 from rest_framework import viewsets, filters
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
+from asistent_app.tenancy import AlcanceEmpresaMixin
+from employees.conteos import anotar_empleados_activos
 from .models import Company
 from .serializers import CompanyBasicSerializer, CompanyDetailSerializer
 
-class CompanyViewSet(viewsets.ModelViewSet):
+class CompanyViewSet(AlcanceEmpresaMixin, viewsets.ModelViewSet):
     queryset = Company.objects.all()
+    campo_empresa = 'pk'
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['activa'] 
@@ -17,3 +20,10 @@ class CompanyViewSet(viewsets.ModelViewSet):
         if self.action == 'list':
             return CompanyBasicSerializer
         return CompanyDetailSerializer
+    
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Solo el serializer de detalle muestra el conteo de empleados
+        if self.action != 'list':
+            queryset = anotar_empleados_activos(queryset)
+        return queryset
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from employees.conteos import anotar_empleados_activos
 from .models import Department
 
 class DepartmentAdmin(admin.ModelAdmin):
@@ -83,7 +84,9 @@ class DepartmentAdmin(admin.ModelAdmin):
     desactivar_departamentos.short_description = "Desactivar departamentos seleccionados"
     
     def get_queryset(self, request):
-        """Optimiza las consultas"""
-        return super().get_queryset(request).select_related('empresa', 'dep_padre')
+        """Optimiza las consultas (el conteo de empleados se anota en la misma consulta)"""
+        return anotar_empleados_activos(
+            super().get_queryset(request).select_related('empresa', 'dep_padre')
+        )
 
 admin.site.register(Department, DepartmentAdmin)
\ No newline at end of file
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('departments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['empresa', 'activo'], name='department_empresa_activo_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+from asistent_app.jerarquia import calcular_rutas
+
+
+def poblar_rutas(apps, schema_editor):
+    """Materializa la ruta y el nivel de los departamentos existentes"""
+    Department = apps.get_model('departments', 'Department')
+
+    padres = dict(Department.objects.values_list('id', 'dep_padre_id'))
+    rutas = calcular_rutas(padres)
+    departamentos = [
+        Department(id=pk, ruta=ruta, nivel=nivel) for pk, (ruta, nivel) in rutas.items()
+    ]
+    Department.objects.bulk_update(departamentos, ['ruta', 'nivel'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('departments', '0002_department_empresa_activo_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='department',
+            name='nivel',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nivel'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='ruta',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=512, verbose_name='Ruta'),
+        ),
+        migrations.AddIndex(
+            model_name='department',
+            index=models.Index(fields=['empresa', 'ruta'], name='department_empresa_ruta_idx'),
+        ),
+        migrations.RunPython(poblar_rutas, migrations.RunPython.noop),
+    ]
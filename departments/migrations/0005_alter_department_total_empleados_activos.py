@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 12:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('departments', '0004_department_total_empleados_activos'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='department',
+            name='total_empleados_activos',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Empleados activos del departamento; se mantiene con EMPLOYEES_COUNT_MODE = "contador"', verbose_name='Empleados activos (contador)'),
+        ),
+    ]
@@ -1,7 +1,8 @@
 from django.db import models
+from asistent_app.jerarquia import NodoJerarquico
 from companies.models import Company
 
-class Department(models.Model):
+class Department(NodoJerarquico):
     nombre = models.CharField(max_length=100, verbose_name='Nombre del departamento')
     codigo = models.CharField(max_length=10, verbose_name='Código del departamento' )
     descripcion = models.TextField(verbose_name='Descripción del departamento', blank=True, null=True)
@@ -10,29 +11,50 @@ class Department(models.Model):
     activo = models.BooleanField(default=True, verbose_name='Activo')
     created = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
     updated = models.DateTimeField(auto_now=True, verbose_name='Fecha de edición')
+    total_empleados_activos = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Empleados activos (contador)',
+        help_text='Empleados activos del departamento; se mantiene con EMPLOYEES_COUNT_MODE = "contador"'
+    )
+    
+    # Jerarquía con ruta materializada (ver asistent_app/jerarquia.py)
+    campo_padre = 'dep_padre'
+    
     class Meta:
         verbose_name = 'Departamento'
         verbose_name_plural = 'Departamentos'
         ordering = ['empresa', 'nombre']
         unique_together = ['empresa', 'codigo']
+        indexes = [
+            models.Index(fields=['empresa', 'activo'], name='department_empresa_activo_idx'),
+            models.Index(fields=['empresa', 'ruta'], name='department_empresa_ruta_idx'),
+        ]
     def __str__(self):
         return f"{self.empresa.razon_social} - {self.nombre}"
 
     def get_subdepartamentos(self):
         """Retorna los subdepartamentos de este departamento"""
+        # Precargados por DepartmentDetailSerializer.prefetch_relacionado
+        if hasattr(self, 'subdepartamentos_activos'):
+            return self.subdepartamentos_activos
         return Department.objects.filter(dep_padre=self, activo=True)
     
     def get_nivel_jerarquia(self):
         """Retorna el nivel en la jerarquía (0 = raíz)"""
-        nivel = 0
-        padre = self.dep_padre
-        while padre:
-            nivel += 1
-            padre = padre.dep_padre
-        return nivel
+        return self.nivel
     
     get_nivel_jerarquia.short_description = "Nivel"
     
     def get_empleados_count(self):
         """Retorna el número de empleados en este departamento"""
-        return self.employee_set.filter(activo=True).count()
\ No newline at end of file
+        from employees.conteos import empleados_activos
+        return empleados_activos(self)
+    
+    get_empleados_count.short_description = "Empleados"
+    get_empleados_count.admin_order_field = 'empleados_activos'
+    
+    def get_empleados_subarbol_count(self):
+        """Retorna el número de empleados en este departamento y sus subdepartamentos"""
+        from employees.models import Employee
+        return Employee.objects.filter(
+            activo=True, **self.filtro_subarbol(prefijo='departamento__')
+        ).count()
\ No newline at end of file
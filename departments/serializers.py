@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Department
 from companies.serializers import CompanyBasicSerializer
@@ -19,11 +20,17 @@ class DepartmentDetailSerializer(serializers.ModelSerializer):
     subdepartamentos = DepartmentBasicSerializer(source='get_subdepartamentos', many=True, read_only=True)
     nivel_jerarquia = serializers.ReadOnlyField(source='get_nivel_jerarquia')
     empleados_count = serializers.ReadOnlyField(source='get_empleados_count')
+    empleados_subarbol_count = serializers.ReadOnlyField(source='get_empleados_subarbol_count')
+
+    # Relaciones que no se deducen de los campos (ver asistent_app.prefetch)
+    prefetch_relacionado = [
+        Prefetch('department_set', queryset=Department.objects.filter(activo=True), to_attr='subdepartamentos_activos'),
+    ]
 
     class Meta:
         model = Department
         fields = '__all__'
-        read_only_fields = ['created', 'updated']
+        read_only_fields = ['created', 'updated', 'ruta', 'nivel']
 
     def validate(self, data):
         """Validación para evitar ciclos en jerarquía"""
@@ -31,4 +38,7 @@ class DepartmentDetailSerializer(serializers.ModelSerializer):
             # Evitar que un departamento sea padre de sí mismo
             if hasattr(self, 'instance') and self.instance and data['dep_padre_id'] == self.instance.id:
                 raise serializers.ValidationError("Un departamento no puede ser padre de sí mismo")
+            # Evitar mover un departamento dentro de su propio subárbol
+            if self.instance and self.instance.crearia_ciclo(data['dep_padre_id']):
+                raise serializers.ValidationError("Un departamento no puede depender de uno de sus subdepartamentos")
         return data
\ No newline at end of file
@@ -1,3 +1,74 @@
-from django.test import TestCase
+from asistent_app.jerarquia import segmento
+from asistent_app.testing import EmpresaTestCase, crear_empleado, crear_empresa
+from .models import Department
 
-# Create your tests here.
+
+class JerarquiaDepartamentosTests(EmpresaTestCase):
+    def crear_departamento(self, codigo, padre=None, empresa=None):
+        return Department.objects.create(
+            nombre=f'Departamento {codigo}', codigo=codigo, empresa=empresa or self.empresa, dep_padre=padre
+        )
+
+    def test_subarbol_sin_ruta_no_abarca_otras_empresas(self):
+        otra, departamento_otra, cargo_otra = crear_empresa(2)
+        crear_empleado(otra, departamento_otra, cargo_otra, 9)
+        self.crear_departamento('HIJO', padre=departamento_otra, empresa=otra)
+
+        sin_ruta, = Department.objects.bulk_create([
+            Department(nombre='Sin ruta', codigo='BULK', empresa=self.empresa)
+        ])
+        self.assertEqual(sin_ruta.ruta, '')
+        self.assertEqual(list(sin_ruta.descendientes()), [])
+        self.assertEqual(list(sin_ruta.descendientes(incluir_propio=True)), [])
+        self.assertEqual(sin_ruta.get_empleados_subarbol_count(), 0)
+
+        # Sin ruta guardada, la del nodo se calcula con WITH RECURSIVE
+        self.assertEqual(sin_ruta.ruta_vigente(), segmento(sin_ruta.pk))
+
+    def test_subarbol_acotado_a_la_empresa(self):
+        otra = crear_empresa(2)[0]
+        Department.objects.filter(empresa=otra).update(ruta=self.departamento.ruta)
+        self.assertEqual(list(self.departamento.descendientes(incluir_propio=True)), [self.departamento])
+        self.assertEqual(self.departamento.get_empleados_subarbol_count(), 1)
+
+    def test_arbol(self):
+        hijo = self.crear_departamento('HIJO', padre=self.departamento)
+        self.crear_departamento('NIETO', padre=hijo)
+        crear_empresa(2)
+
+        respuesta = self.client.get('/api/v1/departments/tree/')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        raiz, = respuesta.json()
+        self.assertEqual(raiz['codigo'], 'OPS')
+        self.assertEqual(raiz['hijos'][0]['codigo'], 'HIJO')
+        self.assertEqual(raiz['hijos'][0]['hijos'][0]['codigo'], 'NIETO')
+        self.assertEqual(raiz['hijos'][0]['hijos'][0]['nivel'], 2)
+
+    def test_mover_subarbol(self):
+        hijo = self.crear_departamento('HIJO', padre=self.departamento)
+        nieto = self.crear_departamento('NIETO', padre=hijo)
+        destino = self.crear_departamento('DEST')
+
+        hijo.dep_padre = destino
+        hijo.save()
+        nieto.refresh_from_db()
+        self.assertEqual(nieto.ruta, destino.ruta + segmento(hijo.pk) + segmento(nieto.pk))
+        self.assertEqual(nieto.nivel, 2)
+        self.assertEqual(list(destino.descendientes().order_by('ruta')), [hijo, nieto])
+        self.assertEqual(list(self.departamento.descendientes()), [])
+
+    def test_rechaza_ciclos(self):
+        hijo = self.crear_departamento('HIJO', padre=self.departamento)
+        nieto = self.crear_departamento('NIETO', padre=hijo)
+        self.usuario.is_superuser = True
+        self.usuario.save()
+
+        respuesta = self.client.patch(
+            f'/api/v1/departments/{self.departamento.pk}/', {'dep_padre_id': nieto.pk}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 400, respuesta.content)
+        self.assertIn('subdepartamentos', str(respuesta.json()))
+
+        self.departamento.dep_padre = nieto
+        with self.assertRaises(ValueError):
+            self.departamento.save()
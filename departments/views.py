@@ -1,11 +1,17 @@
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from asistent_app.jerarquia import construir_arbol
+from asistent_app.prefetch import PrecargaRelacionesMixin
+from asistent_app.tenancy import AlcanceEmpresaMixin, empresa_solicitada
+from employees.conteos import anotar_empleados_activos
 from .models import Department
 from .serializers import DepartmentBasicSerializer, DepartmentDetailSerializer
 
-class DepartmentViewSet(viewsets.ModelViewSet):
-    queryset = Department.objects.select_related('empresa').all()
+class DepartmentViewSet(PrecargaRelacionesMixin, AlcanceEmpresaMixin, viewsets.ModelViewSet):
+    queryset = Department.objects.all()
     permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['empresa', 'activo']
@@ -20,8 +26,19 @@ class DepartmentViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """
-        Optimización: usar select_related para evitar N+1 queries
+        Las relaciones de cada serializer las precarga PrecargaRelacionesMixin
         """
-        return Department.objects.select_related(
-            'empresa', 'dep_padre'
-        ).prefetch_related('department_set')
+        queryset = Department.objects.all()
+        # Solo el serializer de detalle muestra el conteo de empleados
+        if self.action != 'list':
+            queryset = anotar_empleados_activos(queryset)
+        return queryset
+    
+    @action(detail=False, methods=['get'])
+    def tree(self, request):
+        """Árbol completo de departamentos de una empresa (una sola consulta)"""
+        empresa_id = empresa_solicitada(request)
+        departamentos = Department.objects.filter(empresa_id=empresa_id).order_by('ruta').values(
+            'id', 'nombre', 'codigo', 'activo', 'dep_padre_id', 'nivel'
+        )
+        return Response(construir_arbol(departamentos, 'dep_padre_id'))
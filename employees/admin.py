@@ -1,4 +1,5 @@
 from django.contrib import admin
+from . import conteos
 from .models import Employee
 
 class EmployeeAdmin(admin.ModelAdmin):
@@ -105,7 +106,7 @@ class EmployeeAdmin(admin.ModelAdmin):
     
     def activar_empleados(self, request, queryset):
         """Activa los empleados seleccionados"""
-        updated = queryset.update(activo=True, fecha_cese=None, motivo_cese=None)
+        updated = conteos.actualizar_empleados(queryset, activo=True, fecha_cese=None, motivo_cese=None)
         self.message_user(
             request,
             f'{updated} empleado(s) activado(s) exitosamente.'
@@ -115,7 +116,7 @@ class EmployeeAdmin(admin.ModelAdmin):
     def desactivar_empleados(self, request, queryset):
         """Desactiva los empleados seleccionados"""
         from datetime import date
-        updated = queryset.update(activo=False, fecha_cese=date.today())
+        updated = conteos.actualizar_empleados(queryset, activo=False, fecha_cese=date.today())
         self.message_user(
             request,
             f'{updated} empleado(s) desactivado(s) exitosamente.'
@@ -0,0 +1,98 @@
+"""
+Conteo de empleados activos por empresa, departamento y cargo.
+
+Los listados y detalles anotan el conteo en su propia consulta
+(``anotar_empleados_activos``) y los métodos ``get_*_count`` de los modelos
+leen esa anotación, de modo que un changelist o un detalle no ejecuta un
+COUNT por fila. Según ``EMPLOYEES_COUNT_MODE``:
+
+- 'anotacion' (por defecto): COUNT correlacionado en la misma consulta.
+- 'contador': lee la columna ``total_empleados_activos`` de Company,
+  Department y Position (sin uso en el otro modo), que las señales de
+  Employee recalculan al guardar o eliminar un empleado. Pensado para
+  empresas muy grandes, donde agrupar en cada listado pesa más que mantener
+  la columna. Tras activarlo (o tras cargas con bulk_create/update) ejecutar
+  ``recalcular_conteos_empleados``; las actualizaciones masivas propias usan
+  ``actualizar_empleados``, que recalcula solo las filas afectadas.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from companies.models import Company
+from departments.models import Department
+from positions.models import Position
+
+from .models import Employee
+
+ANOTACION = 'empleados_activos'
+COLUMNA = 'total_empleados_activos'
+
+# Campo de Employee que apunta a cada modelo con contador
+CAMPOS_EMPLEADO = {
+    Company: 'empresa',
+    Department: 'departamento',
+    Position: 'cargo',
+}
+
+
+def modo():
+    return getattr(settings, 'EMPLOYEES_COUNT_MODE', 'anotacion')
+
+
+def conteo_por_fila(modelo):
+    """COUNT correlacionado de empleados activos de cada fila de ``modelo``"""
+    campo = CAMPOS_EMPLEADO[modelo]
+    conteo = Employee.objects.filter(activo=True, **{campo: OuterRef('pk')}).order_by().values(
+        campo
+    ).annotate(total=Count('pk')).values('total')
+    return Coalesce(Subquery(conteo), 0)
+
+
+def anotar_empleados_activos(queryset):
+    """
+    Agrega ``empleados_activos`` a cada fila de ``queryset``. Se usa una
+    subconsulta correlacionada en lugar de Count('employee', filter=...) con
+    JOIN: el resultado es el mismo, pero no obliga a agrupar por todas las
+    columnas (incluidas las de select_related) y count() la descarta, de modo
+    que el paginador del admin no repite el JOIN.
+    """
+    if modo() == 'contador':
+        return queryset.annotate(**{ANOTACION: F(COLUMNA)})
+    return queryset.annotate(**{ANOTACION: conteo_por_fila(queryset.model)})
+
+
+def empleados_activos(obj):
+    """Conteo de ``obj``: la anotación si existe, si no la columna o un COUNT"""
+    anotado = getattr(obj, ANOTACION, None)
+    if anotado is not None:
+        return anotado
+    if modo() == 'contador':
+        return getattr(obj, COLUMNA)
+    return obj.employee_set.filter(activo=True).count()
+
+
+def recalcular(modelo, ids=None):
+    """Recalcula la columna contador de ``modelo`` (de ``ids`` o de todas las filas)"""
+    queryset = modelo.objects.all() if ids is None else modelo.objects.filter(pk__in=ids)
+    return queryset.update(**{COLUMNA: conteo_por_fila(modelo)})
+
+
+def actualizar_empleados(queryset, **valores):
+    """
+    ``queryset.update(**valores)`` sobre empleados que, en modo 'contador',
+    recalcula además los contadores de sus empresas, departamentos y cargos
+    (update no emite las señales que los mantienen).
+    """
+    if modo() != 'contador':
+        return queryset.update(**valores)
+
+    columnas = [f'{campo}_id' for campo in CAMPOS_EMPLEADO.values()]
+    with transaction.atomic():
+        # Antes del update: puede cambiar las filas que el queryset selecciona
+        padres = list(queryset.order_by().values_list(*columnas).distinct())
+        actualizados = queryset.update(**valores)
+        for indice, modelo in enumerate(CAMPOS_EMPLEADO):
+            recalcular(modelo, {fila[indice] for fila in padres if fila[indice] is not None})
+    return actualizados
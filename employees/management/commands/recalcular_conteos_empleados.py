@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from employees import conteos
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula la columna total_empleados_activos de empresas, departamentos y cargos. '
+        'Necesario al activar EMPLOYEES_COUNT_MODE = "contador" y tras cargas masivas de empleados.'
+    )
+
+    def handle(self, *args, **options):
+        for modelo in conteos.CAMPOS_EMPLEADO:
+            filas = conteos.recalcular(modelo)
+            self.stdout.write(f'{modelo._meta.verbose_name_plural}: {filas} fila(s) actualizada(s)')
+        self.stdout.write(self.style.SUCCESS('Conteos de empleados recalculados.'))
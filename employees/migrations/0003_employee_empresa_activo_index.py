@@ -0,0 +1,20 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('departments', '0002_department_empresa_activo_index'),
+        ('employees', '0002_remove_employee_email_empresa_employee_rest_day_and_more'),
+        ('positions', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='employee',
+            index=models.Index(fields=['empresa', 'activo'], name='employee_empresa_activo_idx'),
+        ),
+    ]
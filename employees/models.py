@@ -70,6 +70,9 @@ class Employee(models.Model):
         verbose_name_plural = 'Empleados'
         ordering = ['nombres', 'apellidos']
         unique_together = ['empresa', 'codigo_empleado']
+        indexes = [
+            models.Index(fields=['empresa', 'activo'], name='employee_empresa_activo_idx'),
+        ]
         
     def __str__(self):
         return f"{self.apellidos}, {self.nombres} ({self.codigo_empleado})"
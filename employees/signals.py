@@ -0,0 +1,40 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import conteos
+from .models import Employee
+
+
+def _padres(empleado):
+    return {modelo: getattr(empleado, f'{campo}_id') for modelo, campo in conteos.CAMPOS_EMPLEADO.items()}
+
+
+def _padres_guardados(pk):
+    columnas = {modelo: f'{campo}_id' for modelo, campo in conteos.CAMPOS_EMPLEADO.items()}
+    fila = Employee.objects.filter(pk=pk).values(*columnas.values()).first()
+    return {modelo: fila[columna] for modelo, columna in columnas.items()} if fila else {}
+
+
+@receiver(pre_save, sender=Employee)
+def recordar_padres(sender, instance, **kwargs):
+    """Guarda empresa, departamento y cargo previos para recalcular también sus contadores"""
+    if conteos.modo() != 'contador' or instance.pk is None:
+        return
+    instance._padres_previos = _padres_guardados(instance.pk)
+
+
+@receiver(post_save, sender=Employee)
+def actualizar_contadores(sender, instance, **kwargs):
+    if conteos.modo() != 'contador':
+        return
+    previos = getattr(instance, '_padres_previos', {})
+    for modelo, padre_id in _padres(instance).items():
+        conteos.recalcular(modelo, {padre_id, previos.get(modelo, padre_id)})
+
+
+@receiver(post_delete, sender=Employee)
+def descontar_empleado(sender, instance, **kwargs):
+    if conteos.modo() != 'contador':
+        return
+    for modelo, padre_id in _padres(instance).items():
+        conteos.recalcular(modelo, [padre_id])
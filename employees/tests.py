@@ -1,3 +1,48 @@
-from django.test import TestCase
+from django.test import override_settings
 
-# Create your tests here.
+from asistent_app.testing import EmpresaTestCase
+from users.models import CustomUser
+
+
+@override_settings(EMPLOYEES_COUNT_MODE='contador')
+class ContadoresAccionesAdminTests(EmpresaTestCase):
+    def setUp(self):
+        super().setUp()
+        self.empleados = [self.empleado] + [self.crear_empleado(numero) for numero in (2, 3)]
+        self.client.force_login(CustomUser.objects.create_superuser(
+            username='admin', password='secreto123', email='admin@acme.com'
+        ))
+
+    def accion(self, nombre, empleados):
+        return self.client.post('/admin/employees/employee/', {
+            'action': nombre, '_selected_action': [empleado.pk for empleado in empleados],
+        })
+
+    def contadores(self):
+        return [
+            type(obj).objects.values_list('total_empleados_activos', flat=True).get(pk=obj.pk)
+            for obj in (self.empresa, self.departamento, self.cargo)
+        ]
+
+    def test_desactivar_y_activar(self):
+        self.assertEqual(self.contadores(), [3, 3, 3])
+
+        self.assertEqual(self.accion('desactivar_empleados', self.empleados[:2]).status_code, 302)
+        self.assertEqual(self.contadores(), [1, 1, 1])
+
+        self.accion('activar_empleados', self.empleados[:1])
+        self.assertEqual(self.contadores(), [2, 2, 2])
+
+
+class PresupuestoConsultasListadoTests(EmpresaTestCase):
+    def test_listado(self):
+        # 41 empleados: la página 3 tiene una fila y la 1, veinte
+        for numero in range(2, 42):
+            self.crear_empleado(numero)
+        self.usuario.is_staff = True
+        self.usuario.save()
+
+        def listar(pagina, filas):
+            self.assertEqual(len(self.listar('/api/v1/employees/register/', page=pagina)), filas)
+
+        self.assertMismasConsultas(lambda: listar(3, 1), lambda: listar(1, 20))
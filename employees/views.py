@@ -4,24 +4,26 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
+from asistent_app.tenancy import AlcanceEmpresaMixin
 from .models import Employee
 from .serializers import EmployeeSerializer, EmployeeRegistrationSerializer
 
 User = get_user_model()
 
-class EmployeeRegistrationViewSet(viewsets.ModelViewSet):
+class EmployeeRegistrationViewSet(AlcanceEmpresaMixin, viewsets.ModelViewSet):
     queryset = Employee.objects.all()  # Cambiar de .none() a .all()
     serializer_class = EmployeeRegistrationSerializer
     permission_classes = [IsAuthenticated]
     http_method_names = ['get', 'post', 'put', 'patch', 'delete', 'options']  # Agregar métodos
     
     def get_queryset(self):
-        # Filtrar empleados por empresa del usuario si es necesario
+        # El alcance por empresa del usuario lo aplica AlcanceEmpresaMixin
         return Employee.objects.filter(activo=True)
     
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
         if serializer.is_valid():
+            self.validar_alcance(serializer)
             employee_data = serializer.save()
             return Response({
                 'message': 'Empleado y usuario creados exitosamente',
@@ -35,6 +37,7 @@ class EmployeeRegistrationViewSet(viewsets.ModelViewSet):
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
         if serializer.is_valid():
+            self.validar_alcance(serializer)
             employee_data = serializer.save()
             return Response({
                 'message': 'Empleado y usuario actualizados exitosamente',
@@ -1,4 +1,5 @@
 from django.contrib import admin
+from employees.conteos import anotar_empleados_activos
 from .models import Position
 
 class PositionAdmin(admin.ModelAdmin):
@@ -95,10 +96,10 @@ class PositionAdmin(admin.ModelAdmin):
     desactivar_cargos.short_description = "Desactivar cargos seleccionados"
     
     def get_queryset(self, request):
-        """Optimiza las consultas"""
-        return super().get_queryset(request).select_related(
+        """Optimiza las consultas (el conteo de empleados se anota en la misma consulta)"""
+        return anotar_empleados_activos(super().get_queryset(request).select_related(
             'empresa', 'departamento', 'cargo_superior'
-        )
+        ))
     
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         """Filtra los campos relacionados según la empresa seleccionada"""
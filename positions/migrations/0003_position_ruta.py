@@ -0,0 +1,44 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:36
+
+from django.db import migrations, models
+
+from asistent_app.jerarquia import calcular_rutas
+
+
+def poblar_rutas(apps, schema_editor):
+    """Materializa la ruta y el nivel de los cargos existentes"""
+    Position = apps.get_model('positions', 'Position')
+
+    padres = dict(Position.objects.values_list('id', 'cargo_superior_id'))
+    rutas = calcular_rutas(padres)
+    cargos = [
+        Position(id=pk, ruta=ruta, nivel=nivel) for pk, (ruta, nivel) in rutas.items()
+    ]
+    Position.objects.bulk_update(cargos, ['ruta', 'nivel'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0001_initial'),
+        ('departments', '0003_department_ruta'),
+        ('positions', '0002_position_empresa_activo_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='position',
+            name='nivel',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Nivel'),
+        ),
+        migrations.AddField(
+            model_name='position',
+            name='ruta',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=512, verbose_name='Ruta'),
+        ),
+        migrations.AddIndex(
+            model_name='position',
+            index=models.Index(fields=['empresa', 'ruta'], name='position_empresa_ruta_idx'),
+        ),
+        migrations.RunPython(poblar_rutas, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('positions', '0003_position_ruta'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='position',
+            name='total_empleados_activos',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Empleados activos (contador)'),
+        ),
+    ]
@@ -1,8 +1,9 @@
 from django.db import models
+from asistent_app.jerarquia import NodoJerarquico
 from companies.models import Company
 from departments.models import Department
 
-class Position(models.Model):
+class Position(NodoJerarquico):
     nombre = models.CharField(max_length=50, verbose_name='Nombre')
     codigo = models.CharField(max_length=10, verbose_name='Código')
     descripcion = models.TextField(verbose_name='Descripción', blank=True, null=True)
@@ -16,27 +17,37 @@ class Position(models.Model):
     activo = models.BooleanField(default=True, verbose_name='Activo')
     created = models.DateTimeField(auto_now_add=True, verbose_name='Fecha de creación')
     updated = models.DateTimeField(auto_now=True, verbose_name='Fecha de edición')
+    total_empleados_activos = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name='Empleados activos (contador)',
+        help_text='Empleados activos del cargo; se mantiene con EMPLOYEES_COUNT_MODE = "contador"'
+    )
+    
+    # Organigrama con ruta materializada (ver asistent_app/jerarquia.py)
+    campo_padre = 'cargo_superior'
+    
     class Meta:
         verbose_name = "Cargo"
         verbose_name_plural = "Cargos"
         ordering = ['empresa', 'departamento', 'nombre']
         unique_together = ['departamento', 'codigo']
+        indexes = [
+            models.Index(fields=['empresa', 'activo'], name='position_empresa_activo_idx'),
+            models.Index(fields=['empresa', 'ruta'], name='position_empresa_ruta_idx'),
+        ]
 
     def __str__(self):
         return f"{self.departamento.nombre} - {self.nombre}"
     
     def get_cargos_subordinados(self):
         """Retorna los cargos que reportan a este cargo"""
+        # Precargados por PositionDetailSerializer.prefetch_relacionado
+        if hasattr(self, 'subordinados_activos'):
+            return self.subordinados_activos
         return Position.objects.filter(cargo_superior=self, activo=True)
     
     def get_nivel_jerarquico(self):
         """Retorna el nivel jerárquico del cargo (0 = más alto)"""
-        nivel = 0
-        superior = self.cargo_superior
-        while superior:
-            nivel += 1
-            superior = superior.cargo_superior
-        return nivel
+        return self.nivel
     
     get_nivel_jerarquico.short_description = "Nivel"
     
@@ -54,4 +65,8 @@ class Position(models.Model):
     
     def get_empleados_count(self):
         """Retorna el número de empleados en este cargo"""
-        return self.employee_set.filter(activo=True).count()
\ No newline at end of file
+        from employees.conteos import empleados_activos
+        return empleados_activos(self)
+    
+    get_empleados_count.short_description = "Empleados"
+    get_empleados_count.admin_order_field = 'empleados_activos'
\ No newline at end of file
@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Position
 from companies.serializers import CompanyBasicSerializer
@@ -23,10 +24,15 @@ class PositionDetailSerializer(serializers.ModelSerializer):
     nivel_jerarquico = serializers.ReadOnlyField(source='get_nivel_jerarquico')
     rango_salarial = serializers.ReadOnlyField(source='get_rango_salarial')
     
+    # Relaciones que no se deducen de los campos (ver asistent_app.prefetch)
+    prefetch_relacionado = [
+        Prefetch('position_set', queryset=Position.objects.filter(activo=True), to_attr='subordinados_activos'),
+    ]
+    
     class Meta:
         model = Position
         fields = '__all__'
-        read_only_fields = ['created', 'updated']
+        read_only_fields = ['created', 'updated', 'ruta', 'nivel']
     
     def validate(self, data):
         """Validaciones personalizadas"""
@@ -40,5 +46,8 @@ class PositionDetailSerializer(serializers.ModelSerializer):
         if 'cargo_superior_id' in data and data['cargo_superior_id']:
             if hasattr(self, 'instance') and self.instance and data['cargo_superior_id'] == self.instance.id:
                 raise serializers.ValidationError("Un cargo no puede ser superior de sí mismo")
+            # Ciclos indirectos: el nuevo superior no puede reportar a este cargo
+            if self.instance and self.instance.crearia_ciclo(data['cargo_superior_id']):
+                raise serializers.ValidationError("Un cargo no puede reportar a uno de sus subordinados")
         
         return data
\ No newline at end of file
@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .models import Position
+
+
+@receiver(post_delete, sender=Position)
+def reubicar_subordinados(sender, instance, using, **kwargs):
+    """Los subordinados quedan sin superior (SET_NULL): se actualiza su ruta"""
+    instance._desprender_subarbol(using)
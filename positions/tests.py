@@ -1,3 +1,32 @@
-from django.test import TestCase
+from asistent_app.testing import EmpresaTestCase
+from .models import Position
 
-# Create your tests here.
+
+class PresupuestoConsultasListadoTests(EmpresaTestCase):
+    def crear_cargo(self, numero, **extra):
+        return Position.objects.create(
+            nombre=f'Cargo {numero:02d}', codigo=f'C{numero}', empresa=self.empresa,
+            departamento=self.departamento, **extra
+        )
+
+    def test_listado(self):
+        # 41 cargos: la página 3 tiene una fila y la 1, veinte
+        for numero in range(1, 41):
+            self.crear_cargo(numero)
+
+        def listar(pagina, filas):
+            self.assertEqual(len(self.listar('/api/v1/positions/', page=pagina)), filas)
+
+        self.assertMismasConsultas(lambda: listar(3, 1), lambda: listar(1, 20))
+
+    def test_detalle_con_subordinados(self):
+        uno, muchos = self.crear_cargo(1), self.crear_cargo(2)
+        self.crear_cargo(3, cargo_superior=uno)
+        for numero in range(4, 54):
+            self.crear_cargo(numero, cargo_superior=muchos)
+
+        def detalle(cargo):
+            respuesta = self.client.get(f'/api/v1/positions/{cargo.pk}/')
+            self.assertEqual(respuesta.status_code, 200, respuesta.content)
+
+        self.assertMismasConsultas(lambda: detalle(uno), lambda: detalle(muchos))
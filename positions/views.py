@@ -1,11 +1,17 @@
 from rest_framework import viewsets, filters
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
+from asistent_app.jerarquia import construir_arbol
+from asistent_app.prefetch import PrecargaRelacionesMixin
+from asistent_app.tenancy import AlcanceEmpresaMixin, empresa_solicitada
 from .models import Position
 from .serializers import PositionBasicSerializer, PositionDetailSerializer
 
-class PositionViewSet(viewsets.ModelViewSet):
-    queryset = Position.objects.select_related('empresa', 'departamento').all()
+class PositionViewSet(PrecargaRelacionesMixin, AlcanceEmpresaMixin, viewsets.ModelViewSet):
+    # Las relaciones de cada serializer las precarga PrecargaRelacionesMixin
+    queryset = Position.objects.all()
     Permission_classes = [IsAuthenticated]
     filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
     filterset_fields = ['empresa', 'departamento', 'activo']
@@ -17,3 +23,13 @@ class PositionViewSet(viewsets.ModelViewSet):
         if self.action == 'list':
             return PositionBasicSerializer
         return PositionDetailSerializer
+    
+    @action(detail=False, methods=['get'])
+    def organigrama(self, request):
+        """Organigrama completo (cadena de cargo_superior) de una empresa en una sola consulta"""
+        empresa_id = empresa_solicitada(request)
+        cargos = Position.objects.filter(empresa_id=empresa_id).order_by('ruta').values(
+            'id', 'nombre', 'codigo', 'activo', 'cargo_superior_id', 'nivel',
+            'departamento_id', 'departamento__nombre'
+        )
+        return Response(construir_arbol(cargos, 'cargo_superior_id'))
@@ -1,8 +1,33 @@
 from rest_framework import serializers
-from django.contrib.auth import authenticate
+from django.contrib.auth import authenticate, get_user_model
 from django.utils.translation import gettext_lazy as _
 from rest_framework import serializers
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework.exceptions import Throttled
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from . import lockout
+from .backends import EmailOrUsernameModelBackend
+from .tokens import RefreshTokenRevocable
+
+
+def claims_de_usuario(user):
+    """
+    Claims adicionales del token. ClaimsJWTAuthentication autentica con
+    ellos sin consultar la base, así que el refresh también los recalcula.
+    """
+    empleado = user.empleado
+    return {
+        'username': user.username,
+        'email': user.email,
+        'is_staff': user.is_staff,
+        'is_superuser': user.is_superuser,
+        'empleado_id': user.empleado_id,
+        'employee_id': empleado.id if empleado else None,
+        'empresa_id': empleado.empresa_id if empleado else None,
+        'company': empleado.empresa.razon_social if empleado and empleado.empresa else None,
+    }
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     """
@@ -29,14 +54,28 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
         password = attrs.get('password')
         
         if login and password:
-            # Usar el backend personalizado para autenticar
+            request = self.context.get('request')
+            ip = lockout.ip_de(request)
+            
+            # Demasiados fallos recientes: se rechaza sin calcular el hash
+            espera = lockout.espera_ip(ip)
+            if espera is None:
+                usuario = EmailOrUsernameModelBackend().resolver_usuario(login)
+                clave = lockout.clave_cuenta(usuario, get_user_model().normalizar_login(login))
+                espera = lockout.espera_cuenta(clave)
+            if espera is not None:
+                raise Throttled(wait=espera, detail=str(_('Demasiados intentos fallidos. Intente más tarde.')))
+            
+            # Usar el backend personalizado para autenticar (con el usuario ya resuelto)
             user = authenticate(
-                request=self.context.get('request'),
+                request=request,
                 username=login,  # El backend personalizado manejará email o username
-                password=password
+                password=password,
+                usuario=usuario
             )
             
             if not user:
+                lockout.registrar_fallo(clave, ip, usuario)
                 msg = _('No se puede iniciar sesión con las credenciales proporcionadas.')
                 raise serializers.ValidationError(msg, code='authorization')
             
@@ -44,10 +83,14 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
                 msg = _('La cuenta de usuario está desactivada.')
                 raise serializers.ValidationError(msg, code='authorization')
             
-            # Verificar si la cuenta está bloqueada
+            # Verificar si la cuenta está bloqueada (el bloqueo por intentos vence solo)
+            if lockout.bloqueo_vencido(user):
+                user.desbloquear_cuenta()
             if hasattr(user, 'cuenta_bloqueada') and user.cuenta_bloqueada:
                 msg = _('La cuenta está bloqueada. Contacte al administrador.')
                 raise serializers.ValidationError(msg, code='authorization')
+            
+            lockout.registrar_exito(clave)
         else:
             msg = _('Debe incluir "login" y "password".')
             raise serializers.ValidationError(msg, code='authorization')
@@ -64,11 +107,45 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
     def get_token(cls, user):
         token = super().get_token(user)
         
-        # Agregar información adicional al token si es necesario
-        token['username'] = user.username
-        token['email'] = user.email
-        if hasattr(user, 'empleado') and user.empleado:
-            token['employee_id'] = user.empleado.id
-            token['company'] = user.empleado.empresa.razon_social if user.empleado.empresa else None
+        # Agregar información adicional al token (también usada por
+        # ClaimsJWTAuthentication para evitar consultas por petición)
+        for claim, valor in claims_de_usuario(user).items():
+            token[claim] = valor
+        
+        return token
+
+class RefreshRotativoSerializer(TokenRefreshSerializer):
+    """
+    Refresh con rotación: el token usado se registra en TokenRevocado, no se
+    aceptan tokens de cuentas bloqueadas o desactivadas y los claims se
+    recargan de la base (un cambio de permisos o de empresa no sobrevive al
+    refresh).
+    """
+    
+    token_class = RefreshTokenRevocable
+    
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = get_user_model().objects.select_related('empleado__empresa').filter(**{
+            api_settings.USER_ID_FIELD: refresh.get(api_settings.USER_ID_CLAIM)
+        }).first()
+        if user is None or not user.is_active or user.sesiones_revocadas:
+            raise TokenError(_('La cuenta está bloqueada o desactivada.'))
+        
+        for claim, valor in claims_de_usuario(user).items():
+            refresh[claim] = valor
+        
+        data = {'access': str(refresh.access_token)}
+        
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                # Falla si otra petición ya rotó este mismo token
+                refresh.blacklist()
+            
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            
+            data['refresh'] = str(refresh)
         
-        return token
\ No newline at end of file
+        return data
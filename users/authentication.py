@@ -0,0 +1,143 @@
+"""
+Autenticación JWT basada en los claims firmados del token.
+
+El token de acceso ya incluye user_id, username, empleado_id, empresa_id e
+is_staff (ver CustomTokenObtainPairSerializer.get_token), así que la petición
+se autentica sin consultar CustomUser ni Employee: ``request.user`` es un
+UsuarioToken construido desde los claims. Si una vista necesita un atributo
+que no está en el token, el usuario real se carga una sola vez de forma
+perezosa.
+
+Como el token no refleja cambios posteriores a su emisión, cada petición
+consulta en caché (users/signals.py las actualiza al guardar):
+
+- una marca de revocación de las cuentas bloqueadas por un administrador,
+  desactivadas o eliminadas (el bloqueo por intentos fallidos solo impide
+  nuevos logins);
+- los claims de alcance vigentes (is_staff, is_superuser, empleado y empresa)
+  de las cuentas cuyos permisos o empresa cambiaron: se rechazan los tokens
+  de acceso con otros valores. El refresh recarga los claims de la base.
+
+Una caché local al proceso no ve los cambios hechos en otros procesos, así
+que si ``AUTH_REVOCATION_CACHE`` no es compartida (o no responde) la petición
+se autentica contra la base, como con JWTAuthentication.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.utils.functional import cached_property
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+PREFIJO_REVOCACION = 'auth:revocado:'
+PREFIJO_ALCANCE = 'auth:alcance:'
+
+# Claims que determinan los permisos y la empresa de la petición
+CLAIMS_ALCANCE = ('is_staff', 'is_superuser', 'empleado_id', 'empresa_id')
+
+# Backends que no comparten las marcas entre procesos
+CACHES_LOCALES = (LocMemCache, DummyCache)
+
+# Claim cuya presencia indica un token emitido con los datos del empleado
+CLAIM_EMPLEADO = 'empleado_id'
+
+
+def obtener_cache():
+    return caches[getattr(settings, 'AUTH_REVOCATION_CACHE', 'default')]
+
+
+def cache_compartida():
+    return not isinstance(obtener_cache(), CACHES_LOCALES)
+
+
+def alcance_de(claims):
+    """Valores de CLAIMS_ALCANCE de un token o de un dict con los mismos claims"""
+    return tuple(claims.get(claim) for claim in CLAIMS_ALCANCE)
+
+
+def revocar(user_id):
+    """Marca la cuenta como revocada mientras pueda existir un token vigente"""
+    vigencia = api_settings.REFRESH_TOKEN_LIFETIME.total_seconds()
+    obtener_cache().set(f'{PREFIJO_REVOCACION}{user_id}', True, vigencia)
+
+
+def restablecer(user_id):
+    obtener_cache().delete(f'{PREFIJO_REVOCACION}{user_id}')
+
+
+def fijar_alcance(user_id, claims):
+    """
+    Registra los claims de alcance vigentes de la cuenta mientras pueda
+    existir un token de acceso emitido con los anteriores.
+    """
+    vigencia = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+    obtener_cache().set(f'{PREFIJO_ALCANCE}{user_id}', alcance_de(claims), vigencia)
+
+
+def estado_cuenta(user_id):
+    """(revocada, alcance vigente o None) con una sola lectura de la caché"""
+    revocacion, alcance = f'{PREFIJO_REVOCACION}{user_id}', f'{PREFIJO_ALCANCE}{user_id}'
+    valores = obtener_cache().get_many([revocacion, alcance])
+    return bool(valores.get(revocacion)), valores.get(alcance)
+
+
+class UsuarioToken(TokenUser):
+    """
+    Usuario respaldado por los claims del token. Los atributos ajenos a los
+    claims se delegan al CustomUser, que se carga solo si se piden.
+    """
+
+    @cached_property
+    def empleado_id(self):
+        return self.token.get('empleado_id')
+
+    @cached_property
+    def empresa_id(self):
+        return self.token.get('empresa_id')
+
+    @cached_property
+    def usuario(self):
+        return get_user_model().objects.get(pk=self.pk)
+
+    def __getattr__(self, attr):
+        if attr.startswith('_') or attr == 'token':
+            raise AttributeError(attr)
+        return getattr(self.usuario, attr)
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication sin consultas: confía en los claims y revisa la revocación en caché"""
+
+    def get_user(self, validated_token):
+        # Tokens emitidos antes de incluir los claims del empleado, o marcas
+        # de revocación que otros procesos no verían
+        if CLAIM_EMPLEADO not in validated_token or not cache_compartida():
+            return self.usuario_de_la_base(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('El token no contiene la identificación del usuario')
+
+        try:
+            revocada, alcance = estado_cuenta(user_id)
+        except Exception:
+            # Sin caché no se sabe si el token sigue vigente: se consulta la base
+            return self.usuario_de_la_base(validated_token)
+
+        if revocada:
+            raise AuthenticationFailed('La cuenta está bloqueada o desactivada', code='user_inactive')
+        if alcance is not None and alcance != alcance_de(validated_token):
+            raise InvalidToken('Los permisos de la cuenta cambiaron. Renueve el token.')
+
+        return UsuarioToken(validated_token)
+
+    def usuario_de_la_base(self, validated_token):
+        usuario = super().get_user(validated_token)
+        if usuario.sesiones_revocadas:
+            raise AuthenticationFailed('La cuenta está bloqueada o desactivada', code='user_inactive')
+        return usuario
@@ -1,40 +1,68 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.backends import ModelBackend
-from django.db.models import Q
+from django.db.models import Case, IntegerField, Q, Value, When
 
 User = get_user_model()
 
+# Valor por defecto de ``usuario`` en authenticate: el login aún no se resolvió
+SIN_RESOLVER = object()
+
 class EmailOrUsernameModelBackend(ModelBackend):
     """
     Backend de autenticación personalizado que permite login
     tanto con username como con email.
+    
+    El login se resuelve con una sola consulta exacta sobre las columnas
+    normalizadas (indexadas) y se calcula un solo hash por intento.
     """
     
-    def authenticate(self, request, username=None, password=None, **kwargs):
+    def authenticate(self, request, username=None, password=None, usuario=SIN_RESOLVER, **kwargs):
+        """
+        ``usuario`` permite pasar el resultado de ``resolver_usuario`` si quien
+        llama ya lo obtuvo (el login lo usa para la limitación de intentos).
+        """
         if username is None:
             username = kwargs.get(User.USERNAME_FIELD)
         
-        if username is None or password is None:
+        if not username or password is None:
             return None
         
-        try:
-            # Buscar usuario por username o email
-            user = User.objects.get(
-                Q(username__iexact=username) | Q(email__iexact=username)
-            )
-        except User.DoesNotExist:
-            # Ejecutar el hash de contraseña por defecto para evitar ataques de timing
+        user = self.resolver_usuario(username) if usuario is SIN_RESOLVER else usuario
+        if user is None:
+            # Login inexistente o email compartido por varios usuarios: se
+            # ejecuta el hash por defecto para evitar ataques de timing (con
+            # una contraseña inutilizable lo hace check_password)
             User().set_password(password)
             return None
-        except User.MultipleObjectsReturned:
-            # Si hay múltiples usuarios con el mismo email, usar solo username
-            try:
-                user = User.objects.get(username__iexact=username)
-            except User.DoesNotExist:
-                return None
         
         # Verificar contraseña y si el usuario puede autenticarse
         if user.check_password(password) and self.user_can_authenticate(user):
             return user
         
-        return None
\ No newline at end of file
+        return None
+    
+    def resolver_usuario(self, login):
+        """
+        Usuario cuyo username o email coincide con ``login`` (sin distinguir
+        mayúsculas). El username tiene prioridad; un email compartido por
+        varios usuarios no identifica a ninguno.
+        """
+        login = User.normalizar_login(login)
+        candidatos = list(self.candidatos(login)[:2])
+        if not candidatos:
+            return None
+        if candidatos[0].username_normalizado == login or len(candidatos) == 1:
+            return candidatos[0]
+        return None
+    
+    def candidatos(self, login):
+        """Usuarios que coinciden con el login ya normalizado, primero por username"""
+        return User.objects.select_related('empleado__empresa').filter(
+            Q(username_normalizado=login) | Q(email_normalizado=login)
+        ).annotate(
+            prioridad=Case(
+                When(username_normalizado=login, then=Value(0)),
+                default=Value(1),
+                output_field=IntegerField(),
+            )
+        ).order_by('prioridad', 'id')
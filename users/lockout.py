@@ -0,0 +1,154 @@
+"""
+Limitación de intentos y bloqueo de cuentas en el login.
+
+Los intentos fallidos se cuentan en caché con ventanas deslizantes (contador
+de la ventana actual más la fracción vigente de la anterior), por cuenta y por
+IP. La cuenta es el usuario resuelto, de modo que los intentos con su username
+y con su email suman en el mismo contador; un login que no corresponde a
+ningún usuario se cuenta por su texto normalizado. Ningún intento fallido
+escribe en la tabla de usuarios: solo se persiste el cambio de estado al
+bloquear o desbloquear la cuenta, con ``update_fields``.
+
+- Con ``AUTH_LOGIN_MAX_FALLOS`` fallos de la misma cuenta dentro de la
+  ventana se rechazan los siguientes intentos sin calcular el hash y la
+  cuenta (si existe) queda bloqueada. Este bloqueo solo impide el login: las
+  sesiones ya abiertas siguen vigentes (ver CustomUser.bloqueo_por_intentos).
+- Con ``AUTH_LOGIN_MAX_FALLOS_IP`` fallos desde la misma IP se rechazan sus
+  intentos hasta que la ventana se desliza (credential stuffing contra
+  muchas cuentas).
+- El bloqueo por intentos vence tras ``AUTH_LOGIN_DURACION_BLOQUEO`` segundos
+  (None = solo lo levanta un administrador); el login correcto posterior
+  desbloquea la cuenta.
+
+La caché ``AUTH_LOGIN_CACHE`` debe ser compartida entre procesos en producción.
+"""
+import hashlib
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+
+PREFIJO_CACHE = 'auth:login:'
+
+
+def obtener_cache():
+    return caches[getattr(settings, 'AUTH_LOGIN_CACHE', 'default')]
+
+
+class VentanaDeslizante:
+    """Contador aproximado de eventos en los últimos ``ventana`` segundos"""
+
+    def __init__(self, ambito, limite, ventana):
+        self.ambito = ambito
+        self.limite = limite
+        self.ventana = ventana
+
+    def _claves(self, identificador, ahora):
+        resumen = hashlib.sha256(str(identificador).encode('utf-8')).hexdigest()
+        tramo = int(ahora // self.ventana)
+        base = f'{PREFIJO_CACHE}{self.ambito}:{resumen}'
+        return f'{base}:{tramo}', f'{base}:{tramo - 1}'
+
+    def conteo(self, identificador, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        actual, anterior = self._claves(identificador, ahora)
+        valores = obtener_cache().get_many([actual, anterior])
+        peso_anterior = 1 - (ahora % self.ventana) / self.ventana
+        return valores.get(actual, 0) + valores.get(anterior, 0) * peso_anterior
+
+    def registrar(self, identificador, ahora=None):
+        """Suma un evento y retorna el conteo resultante"""
+        ahora = time.time() if ahora is None else ahora
+        actual, _ = self._claves(identificador, ahora)
+        cache = obtener_cache()
+        # El tramo se consulta también durante la ventana siguiente
+        cache.add(actual, 0, self.ventana * 2)
+        try:
+            cache.incr(actual)
+        except ValueError:
+            # La clave expiró entre add e incr
+            cache.set(actual, 1, self.ventana * 2)
+        return self.conteo(identificador, ahora)
+
+    def excedido(self, identificador, ahora=None):
+        return self.conteo(identificador, ahora) >= self.limite
+
+    def espera(self, ahora=None):
+        """Segundos hasta que el tramo actual deja de pesar por completo"""
+        ahora = time.time() if ahora is None else ahora
+        return int(self.ventana - ahora % self.ventana) + self.ventana
+
+    def limpiar(self, identificador, ahora=None):
+        ahora = time.time() if ahora is None else ahora
+        obtener_cache().delete_many(self._claves(identificador, ahora))
+
+
+def ventana():
+    return getattr(settings, 'AUTH_LOGIN_VENTANA', 900)
+
+
+def fallos_por_login():
+    return VentanaDeslizante('usuario', getattr(settings, 'AUTH_LOGIN_MAX_FALLOS', 5), ventana())
+
+
+def fallos_por_ip():
+    return VentanaDeslizante('ip', getattr(settings, 'AUTH_LOGIN_MAX_FALLOS_IP', 50), ventana())
+
+
+def ip_de(request):
+    return request.META.get('REMOTE_ADDR') if request is not None else None
+
+
+def clave_cuenta(usuario, login):
+    """Identificador del contador de fallos: el usuario resuelto o, si no existe, el login normalizado"""
+    return f'id:{usuario.pk}' if usuario is not None else f'login:{login}'
+
+
+def espera_ip(ip):
+    """Segundos que debe esperar la IP (None si puede intentar el login)"""
+    por_ip = fallos_por_ip()
+    if ip and por_ip.excedido(ip):
+        return por_ip.espera()
+    return None
+
+
+def espera_cuenta(clave):
+    """Segundos que debe esperar la cuenta (None si puede intentar el login)"""
+    por_cuenta = fallos_por_login()
+    if por_cuenta.excedido(clave):
+        return por_cuenta.espera()
+    return None
+
+
+def registrar_fallo(clave, ip, usuario=None):
+    """
+    Cuenta el fallo en caché; al alcanzar el límite bloquea ``usuario`` (si
+    existe y aún no está bloqueado).
+    """
+    por_cuenta = fallos_por_login()
+    intentos = por_cuenta.registrar(clave)
+    if ip:
+        fallos_por_ip().registrar(ip)
+
+    # Solo al cruzar el límite: después espera_cuenta corta los intentos
+    if intentos >= por_cuenta.limite and usuario is not None and not usuario.cuenta_bloqueada:
+        usuario.bloquear_cuenta(intentos=int(intentos))
+
+
+def registrar_exito(clave):
+    fallos_por_login().limpiar(clave)
+
+
+def bloqueo_vencido(usuario, ahora=None):
+    """
+    True si el bloqueo por intentos fallidos ya cumplió
+    AUTH_LOGIN_DURACION_BLOQUEO (los bloqueos manuales no vencen)
+    """
+    duracion = getattr(settings, 'AUTH_LOGIN_DURACION_BLOQUEO', 900)
+    if not usuario.cuenta_bloqueada or duracion is None or usuario.fecha_bloqueo is None:
+        return False
+    if not usuario.intentos_fallidos:
+        return False
+    return (ahora or timezone.now()) >= usuario.fecha_bloqueo + timedelta(seconds=duracion)
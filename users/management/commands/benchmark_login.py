@@ -0,0 +1,84 @@
+import random
+import statistics
+import time
+
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from users.backends import EmailOrUsernameModelBackend
+from users.models import CustomUser
+
+PREFIJO = 'bench-login'
+CONTRASENA = 'Benchmark-2024!'
+
+
+class Rollback(Exception):
+    """Fuerza la reversión de los datos sintéticos al terminar"""
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el costo de authenticate() (consultas, hashes y latencia) con username, '
+        'email en mayúsculas, contraseña incorrecta y usuario inexistente. '
+        'Los usuarios sintéticos se crean dentro de una transacción que se revierte al terminar.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=20000, help='Usuarios sintéticos')
+        parser.add_argument('--intentos', type=int, default=50, help='Intentos por escenario')
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.generar_datos(options['usuarios'])
+                self.ejecutar_escenarios(options['usuarios'], options['intentos'])
+                raise Rollback
+        except Rollback:
+            self.stdout.write(self.style.SUCCESS('Datos sintéticos revertidos.'))
+
+    def generar_datos(self, total):
+        # Un solo hash compartido: generar uno por usuario dominaría el tiempo de preparación
+        password = make_password(CONTRASENA)
+        CustomUser.objects.bulk_create([
+            CustomUser(
+                username=f'{PREFIJO}-{i}', username_normalizado=f'{PREFIJO}-{i}',
+                email=f'{PREFIJO}-{i}@example.com', email_normalizado=f'{PREFIJO}-{i}@example.com',
+                password=password
+            )
+            for i in range(total)
+        ], batch_size=2000)
+
+    def ejecutar_escenarios(self, total, intentos):
+        escenarios = [
+            ('username', lambda i: f'{PREFIJO}-{i}', CONTRASENA, True),
+            ('email en mayúsculas', lambda i: f'{PREFIJO}-{i}@EXAMPLE.COM'.upper(), CONTRASENA, True),
+            ('contraseña incorrecta', lambda i: f'{PREFIJO}-{i}', 'incorrecta', False),
+            ('usuario inexistente', lambda i: f'no-existe-{i}', CONTRASENA, False),
+        ]
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{total} usuarios, {intentos} intentos por escenario'))
+        for nombre, login, contrasena, esperado in escenarios:
+            tiempos, consultas, errores = [], [], 0
+            for _ in range(intentos):
+                i = random.randrange(total)
+                with CaptureQueriesContext(connection) as capturadas:
+                    inicio = time.perf_counter()
+                    usuario = authenticate(username=login(i), password=contrasena)
+                    tiempos.append((time.perf_counter() - inicio) * 1000)
+                consultas.append(len(capturadas))
+                errores += (usuario is not None) != esperado
+
+            self.stdout.write(
+                f'  {nombre:<24} p50 {statistics.median(tiempos):7.1f} ms  '
+                f'máx {max(tiempos):7.1f} ms  consultas {max(consultas)}'
+                + (self.style.ERROR(f'  resultados inesperados: {errores}') if errores else '')
+            )
+
+        self.mostrar_plan()
+
+    def mostrar_plan(self):
+        consulta = EmailOrUsernameModelBackend().candidatos(f'{PREFIJO}-1')[:2]
+        self.stdout.write(self.style.MIGRATE_HEADING('\nPlan de la búsqueda del login:'))
+        self.stdout.write(consulta.explain())
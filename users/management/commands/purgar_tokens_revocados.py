@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import TokenRevocado
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina de TokenRevocado los refresh tokens ya vencidos (ya no pueden usarse). '
+        'Programarlo periódicamente, p. ej. una vez al día.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=5000, help='Filas eliminadas por sentencia')
+
+    def handle(self, *args, **options):
+        ahora = timezone.now()
+        total = 0
+        while True:
+            jtis = list(TokenRevocado.objects.filter(expira__lt=ahora).values_list('jti', flat=True)[:options['lote']])
+            if not jtis:
+                break
+            TokenRevocado.objects.filter(jti__in=jtis).delete()
+            total += len(jtis)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} token(s) vencido(s) eliminado(s); quedan {TokenRevocado.objects.count()}.'
+        ))
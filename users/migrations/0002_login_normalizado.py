@@ -0,0 +1,37 @@
+# Generated by Django 5.2.1 on 2026-10-18 11:24
+
+from django.db import migrations, models
+
+
+def normalizar_logins(apps, schema_editor):
+    """Completa las columnas en minúsculas de los usuarios existentes"""
+    CustomUser = apps.get_model('users', 'CustomUser')
+
+    usuarios = []
+    for usuario in CustomUser.objects.only('id', 'username', 'email').iterator(chunk_size=2000):
+        usuario.username_normalizado = (usuario.username or '').lower()
+        usuario.email_normalizado = (usuario.email or '').lower()
+        usuarios.append(usuario)
+
+    CustomUser.objects.bulk_update(usuarios, ['username_normalizado', 'email_normalizado'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='email_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='customuser',
+            name='username_normalizado',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(normalizar_logins, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,50 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 from employees.models import Employee
 
 
+# Campos de login con una copia normalizada (``<campo>_normalizado``)
+CAMPOS_LOGIN = ('username', 'email')
+
+
+class CustomUserQuerySet(models.QuerySet):
+    """
+    Mantiene las columnas normalizadas en las escrituras que no pasan por
+    save(): update, bulk_create y bulk_update. Con una expresión (p. ej. un
+    F()) la copia se calcula con LOWER de la base, que en SQLite solo
+    convierte caracteres ASCII.
+    """
+    
+    def update(self, **kwargs):
+        for campo in CAMPOS_LOGIN:
+            if campo in kwargs:
+                valor = kwargs[campo]
+                kwargs[f'{campo}_normalizado'] = (
+                    Lower(valor) if hasattr(valor, 'resolve_expression')
+                    else CustomUser.normalizar_login(valor)
+                )
+        return super().update(**kwargs)
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.normalizar_campos_login()
+        return super().bulk_create(objs, *args, **kwargs)
+    
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs, fields = list(objs), list(fields)
+        for obj in objs:
+            obj.normalizar_campos_login()
+        fields += [f'{campo}_normalizado' for campo in CAMPOS_LOGIN if campo in fields]
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+
+class CustomUserManager(UserManager.from_queryset(CustomUserQuerySet)):
+    pass
+
+
 class CustomUser(AbstractUser):
     empleado = models.OneToOneField(
         Employee,
@@ -19,6 +60,15 @@ class CustomUser(AbstractUser):
     cuenta_bloqueada = models.BooleanField(default=False, verbose_name='Cuenta Bloqueada')
     fecha_bloqueo = models.DateTimeField(null=True, blank=True, verbose_name='Fecha de Bloqueo')
     
+    # Copias en minúsculas de username y email para resolver el login con una
+    # búsqueda exacta indexada (username__iexact no puede usar el índice único).
+    # Las mantienen save() y CustomUserQuerySet; el SQL directo debe
+    # actualizarlas también
+    username_normalizado = models.CharField(max_length=150, db_index=True, editable=False, default='')
+    email_normalizado = models.CharField(max_length=254, db_index=True, editable=False, default='')
+    
+    objects = CustomUserManager()
+    
     class Meta:
         verbose_name = 'Usuario'
         verbose_name_plural = 'Usuarios'
@@ -38,24 +88,76 @@ class CustomUser(AbstractUser):
     def empresa(self):
         return self.empleado.empresa if self.empleado else None
     
+    @property
+    def empresa_id(self):
+        return self.empleado.empresa_id if self.empleado_id else None
+    
+    @property
+    def bloqueo_por_intentos(self):
+        """
+        Bloqueo automático por intentos fallidos (ver users/lockout.py): solo
+        impide nuevos logins, para que quien adivina contraseñas no pueda
+        cerrar las sesiones del usuario.
+        """
+        return self.cuenta_bloqueada and bool(self.intentos_fallidos)
+    
+    @property
+    def sesiones_revocadas(self):
+        """True si los tokens ya emitidos dejan de valer (bloqueo manual o cuenta desactivada)"""
+        return not self.is_active or (self.cuenta_bloqueada and not self.bloqueo_por_intentos)
+    
     @property
     def es_empleado(self):
         return self.empleado is not None
     
+    @staticmethod
+    def normalizar_login(valor):
+        return (valor or '').lower()
+    
+    def normalizar_campos_login(self):
+        for campo in CAMPOS_LOGIN:
+            setattr(self, f'{campo}_normalizado', self.normalizar_login(getattr(self, campo)))
+    
+    def save(self, *args, **kwargs):
+        self.normalizar_campos_login()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            campos = set(update_fields)
+            campos.update(f'{campo}_normalizado' for campo in CAMPOS_LOGIN if campo in campos)
+            kwargs['update_fields'] = campos
+        super().save(*args, **kwargs)
+    
     def tiene_acceso_empresa(self, empresa):
         if self.is_superuser:
             return True
         return self.empleado and self.empleado.empresa == empresa
     
-    def bloquear_cuenta(self):
+    def bloquear_cuenta(self, intentos=None):
         """Bloquea la cuenta del usuario"""
         self.cuenta_bloqueada = True
         self.fecha_bloqueo = timezone.now()
-        self.save()
+        if intentos is not None:
+            self.intentos_fallidos = intentos
+        self.save(update_fields=['cuenta_bloqueada', 'fecha_bloqueo', 'intentos_fallidos'])
     
     def desbloquear_cuenta(self):
         """Desbloquea la cuenta del usuario"""
         self.cuenta_bloqueada = False
         self.intentos_fallidos = 0
         self.fecha_bloqueo = None
-        self.save()
\ No newline at end of file
+        self.save(update_fields=['cuenta_bloqueada', 'fecha_bloqueo', 'intentos_fallidos'])
+
+class TokenRevocado(models.Model):
+    """
+    Refresh token ya usado o revocado. Solo se guarda el jti y su expiración:
+    las filas vencidas se eliminan con el comando purgar_tokens_revocados.
+    """
+    jti = models.CharField(max_length=255, primary_key=True, verbose_name='JTI')
+    expira = models.DateTimeField(db_index=True, verbose_name='Expira')
+    
+    class Meta:
+        verbose_name = 'Token Revocado'
+        verbose_name_plural = 'Tokens Revocados'
+    
+    def __str__(self):
+        return self.jti
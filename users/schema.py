@@ -0,0 +1,7 @@
+"""Extensiones de drf-spectacular para la autenticación propia"""
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+
+
+class ClaimsJWTScheme(SimpleJWTScheme):
+    """ClaimsJWTAuthentication se documenta como el Bearer JWT de simplejwt (jwtAuth)"""
+    target_class = 'users.authentication.ClaimsJWTAuthentication'
@@ -6,6 +6,9 @@ User = get_user_model()
 class CustomUserSerializer(serializers.ModelSerializer):
     employee_info = serializers.SerializerMethodField()
     
+    # Usados por get_employee_info (ver asistent_app.prefetch)
+    select_relacionado = ['empleado__empresa']
+    
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 
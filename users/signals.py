@@ -0,0 +1,61 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from employees.models import Employee
+from .authentication import fijar_alcance, restablecer, revocar
+from .models import CustomUser
+
+# Campos del usuario copiados a los claims de alcance del token
+CAMPOS_ALCANCE = ('is_staff', 'is_superuser', 'empleado_id')
+
+
+def _incluye(update_fields, campos):
+    return update_fields is None or bool(set(update_fields) & set(campos))
+
+
+@receiver(pre_save, sender=CustomUser)
+def recordar_alcance(sender, instance, update_fields=None, **kwargs):
+    """Guarda los permisos y el empleado previos para detectar cambios de alcance"""
+    if instance.pk is None or not _incluye(update_fields, CAMPOS_ALCANCE + ('empleado',)):
+        return
+    instance._alcance_previo = CustomUser.objects.filter(pk=instance.pk).values(*CAMPOS_ALCANCE).first()
+
+
+@receiver(post_save, sender=CustomUser)
+def sincronizar_revocacion(sender, instance, **kwargs):
+    """
+    Revoca los tokens vigentes de cuentas bloqueadas o desactivadas (el
+    bloqueo por intentos fallidos no cierra las sesiones abiertas)
+    """
+    if instance.sesiones_revocadas:
+        revocar(instance.pk)
+    else:
+        restablecer(instance.pk)
+
+    previo = vars(instance).pop('_alcance_previo', None)
+    if previo and any(previo[campo] != getattr(instance, campo) for campo in CAMPOS_ALCANCE):
+        fijar_alcance(instance.pk, {
+            **{campo: getattr(instance, campo) for campo in CAMPOS_ALCANCE},
+            'empresa_id': instance.empresa_id,
+        })
+
+
+@receiver(post_delete, sender=CustomUser)
+def revocar_eliminado(sender, instance, **kwargs):
+    revocar(instance.pk)
+
+
+@receiver(pre_save, sender=Employee)
+def recordar_empresa(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or not _incluye(update_fields, ('empresa', 'empresa_id')):
+        return
+    instance._empresa_previa = Employee.objects.filter(pk=instance.pk).values_list('empresa_id', flat=True).first()
+
+
+@receiver(post_save, sender=Employee)
+def actualizar_alcance_usuarios(sender, instance, **kwargs):
+    """Al cambiar de empresa el empleado, sus tokens dejan de valer para la anterior"""
+    if vars(instance).pop('_empresa_previa', instance.empresa_id) == instance.empresa_id:
+        return
+    for usuario in CustomUser.objects.filter(empleado=instance).values('pk', *CAMPOS_ALCANCE):
+        fijar_alcance(usuario.pop('pk'), {**usuario, 'empresa_id': instance.empresa_id})
@@ -1,3 +1,173 @@
-from django.test import TestCase
+import tempfile
+import warnings
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.hashers import get_hasher
+from django.core.cache import cache
+from django.core.paginator import UnorderedObjectListWarning
+from django.test import override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+
+from asistent_app.testing import EmpresaTestCase, crear_empresa
+from .authentication import ClaimsJWTAuthentication, UsuarioToken
+from .backends import EmailOrUsernameModelBackend
+from .models import CustomUser
+
+
+class TokenTestCase(EmpresaTestCase):
+    """El usuario del empleado es superusuario y obtiene tokens por el login"""
+
+    def setUp(self):
+        # Los contadores de intentos y las marcas de revocación viven en caché
+        cache.clear()
+        super().setUp()
+        self.client = APIClient()
+        self.autenticacion = ClaimsJWTAuthentication()
+
+    def crear_usuario(self):
+        return CustomUser.objects.create_superuser(
+            username='ana', password='secreto123', email='ana@acme.com', empleado=self.empleado
+        )
+
+    def tokens(self):
+        respuesta = self.client.post('/api/auth/login/', {'login': 'ana', 'password': 'secreto123'}, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        return respuesta.json()
+
+    def usuario_de(self, access):
+        return self.autenticacion.get_user(self.autenticacion.get_validated_token(access))
+
+
+class ClaimsCacheCompartidaTests(TokenTestCase):
+    def setUp(self):
+        directorio = tempfile.TemporaryDirectory()
+        self.addCleanup(directorio.cleanup)
+        configuracion = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directorio.name,
+        }})
+        configuracion.enable()
+        self.addCleanup(configuracion.disable)
+        super().setUp()
+
+    def test_autentica_sin_consultas(self):
+        access = self.tokens()['access']
+        with self.assertNumQueries(0):
+            usuario = self.usuario_de(access)
+        self.assertIsInstance(usuario, UsuarioToken)
+        self.assertEqual(usuario.empresa_id, self.empresa.pk)
+
+    def test_superusuario_degradado(self):
+        tokens = self.tokens()
+        self.usuario.is_superuser = False
+        self.usuario.save()
+
+        with self.assertRaises(InvalidToken):
+            self.usuario_de(tokens['access'])
+
+        respuesta = self.client.post('/api/auth/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        usuario = self.usuario_de(respuesta.json()['access'])
+        self.assertFalse(usuario.is_superuser)
+
+    def test_empleado_cambia_de_empresa(self):
+        access = self.tokens()['access']
+        self.empleado.empresa = crear_empresa(2)[0]
+        self.empleado.save()
+        with self.assertRaises(InvalidToken):
+            self.usuario_de(access)
+
+    def test_bloqueo_por_intentos_no_cierra_sesiones(self):
+        access = self.tokens()['access']
+        for intento in range(5):
+            login = 'ana' if intento % 2 else 'ANA@acme.com'
+            self.client.post('/api/auth/login/', {'login': login, 'password': 'incorrecta'}, format='json')
+
+        self.usuario.refresh_from_db()
+        self.assertTrue(self.usuario.cuenta_bloqueada)
+        self.assertIsInstance(self.usuario_de(access), UsuarioToken)
+
+    def test_cuenta_desactivada(self):
+        tokens = self.tokens()
+        self.usuario.is_active = False
+        self.usuario.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.usuario_de(tokens['access'])
+        respuesta = self.client.post('/api/auth/refresh/', {'refresh': tokens['refresh']}, format='json')
+        self.assertEqual(respuesta.status_code, 401)
+
+
+class ClaimsCacheLocalTests(TokenTestCase):
+    """Con la caché local por defecto, los tokens se validan contra la base"""
+
+    def test_autentica_contra_la_base(self):
+        access = self.tokens()['access']
+        self.assertIsInstance(self.usuario_de(access), CustomUser)
+
+        self.usuario.is_superuser = False
+        self.usuario.save()
+        self.assertFalse(self.usuario_de(access).is_superuser)
+
+    def test_cuenta_bloqueada(self):
+        access = self.tokens()['access']
+        self.usuario.cuenta_bloqueada = True
+        self.usuario.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.usuario_de(access)
+
+
+class UsuariosAlcanceEmpresaTests(TokenTestCase):
+    def test_listado_de_la_propia_empresa(self):
+        self.usuario.is_superuser = False
+        self.usuario.is_staff = True
+        self.usuario.save()
+        CustomUser.objects.create_user(username='sin_empleado', password='secreto123')
+        self.client.force_authenticate(self.usuario)
+
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', UnorderedObjectListWarning)
+            respuesta = self.client.get('/api/v1/users/users/')
+        self.assertEqual([fila['username'] for fila in respuesta.json()['results']], ['ana'])
+        self.assertEqual(self.client.post('/api/v1/users/users/', {'username': 'nuevo'}, format='json').status_code, 403)
+
+
+class LimitacionLoginTests(TokenTestCase):
+    def intentar(self, login, password='incorrecta'):
+        return self.client.post('/api/auth/login/', {'login': login, 'password': password}, format='json')
+
+    def test_username_y_email_comparten_contador(self):
+        for intento in range(5):
+            self.assertEqual(self.intentar('ana' if intento % 2 else 'ana@acme.com').status_code, 400)
+        self.assertEqual(self.intentar('ana@acme.com', 'secreto123').status_code, 429)
+        self.assertEqual(self.intentar('ana', 'secreto123').status_code, 429)
+
+
+class ResolucionLoginTests(TokenTestCase):
+    def hashes(self, login, password='incorrecta'):
+        """Cantidad de hashes calculados por un intento de login"""
+        hasher = type(get_hasher())
+        with mock.patch.object(hasher, 'encode', autospec=True, side_effect=hasher.encode) as encode:
+            self.assertIsNone(EmailOrUsernameModelBackend().authenticate(None, username=login, password=password))
+        return encode.call_count
+
+    def test_un_hash_en_cada_fallo(self):
+        CustomUser.objects.create_user(username='beto', password='secreto123', email='ana@acme.com')
+        sin_clave = CustomUser.objects.create_user(username='sin_clave', email='s@acme.com')
+        sin_clave.set_unusable_password()
+        sin_clave.save()
+
+        self.assertEqual(self.hashes('ana'), 1)
+        self.assertEqual(self.hashes('nadie'), 1)
+        self.assertEqual(self.hashes('ANA@acme.com'), 1)  # email compartido
+        self.assertEqual(self.hashes('sin_clave'), 1)
+
+    def test_escrituras_masivas_normalizan_el_login(self):
+        CustomUser.objects.filter(pk=self.usuario.pk).update(username='Ana.Perez', email='Ana@ACME.com')
+        CustomUser.objects.bulk_create([CustomUser(username='Beto', email='BETO@acme.com')])
+        self.usuario.refresh_from_db()
+
+        backend = EmailOrUsernameModelBackend()
+        self.assertEqual(backend.resolver_usuario('ana.perez'), self.usuario)
+        self.assertEqual(backend.resolver_usuario('ana@acme.com'), self.usuario)
+        self.assertEqual(backend.resolver_usuario('beto@acme.com').username, 'Beto')
@@ -0,0 +1,40 @@
+"""
+Revocación compacta de refresh tokens.
+
+Con ROTATE_REFRESH_TOKENS cada refresh emite un token nuevo y, con
+BLACKLIST_AFTER_ROTATION, el anterior se revoca. En lugar de la app
+token_blacklist (que guarda cada token emitido en OutstandingToken y una
+segunda fila al revocarlo) solo se guarda el jti revocado y su expiración en
+TokenRevocado, indexado por clave primaria. Las filas vencidas ya no pueden
+usarse y se eliminan con ``purgar_tokens_revocados``, de modo que la tabla
+queda acotada a los tokens revocados dentro de REFRESH_TOKEN_LIFETIME.
+"""
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import IntegrityError, transaction
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .models import TokenRevocado
+
+
+class RefreshTokenRevocable(RefreshToken):
+    """Refresh token que se rechaza si su jti está en TokenRevocado"""
+
+    def verify(self, *args, **kwargs):
+        super().verify(*args, **kwargs)
+        if TokenRevocado.objects.filter(jti=self[api_settings.JTI_CLAIM]).exists():
+            raise TokenError('El token fue revocado')
+
+    def blacklist(self):
+        """
+        Revoca el token. La inserción es también la comprobación: si dos
+        peticiones rotan el mismo token a la vez, solo la primera lo consigue.
+        """
+        expira = datetime.fromtimestamp(self['exp'], tz=dt_timezone.utc)
+        try:
+            with transaction.atomic():
+                return TokenRevocado.objects.create(jti=self[api_settings.JTI_CLAIM], expira=expira)
+        except IntegrityError:
+            raise TokenError('El token fue revocado')
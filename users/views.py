@@ -3,17 +3,24 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.contrib.auth import get_user_model
+from asistent_app.prefetch import PrecargaRelacionesMixin, precargar
+from asistent_app.tenancy import AlcanceEmpresaMixin
 from .serializers import CustomUserSerializer
 
 User = get_user_model()
 
-class CustomUserViewSet(viewsets.ModelViewSet):
-    queryset = User.objects.all()
+class CustomUserViewSet(PrecargaRelacionesMixin, AlcanceEmpresaMixin, viewsets.ModelViewSet):
+    campo_empresa = 'empleado__empresa_id'
+    # Orden estable para la paginación
+    queryset = User.objects.order_by('id')
     serializer_class = CustomUserSerializer
     permission_classes = [IsAuthenticated]
     
     @action(detail=False, methods=['get'])
     def me(self, request):
         """Endpoint para obtener el usuario actual autenticado"""
-        serializer = self.get_serializer(request.user)
+        # Con ClaimsJWTAuthentication request.user es un UsuarioToken: se lee el
+        # usuario real junto con su empleado y empresa en una sola consulta
+        usuario = precargar(User.objects.all(), self.get_serializer_class()).get(pk=request.user.pk)
+        serializer = self.get_serializer(usuario)
         return Response(serializer.data)